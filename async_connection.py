@@ -0,0 +1,136 @@
+import asyncio
+from typing import Union
+
+from connection_manager import get_connection_manager
+from graph_backend import BatchWriteError
+
+
+class AsyncNeo4jConnection:
+    def __init__(self, uri: str, username: str, password: str, database: str = "neo4j"):
+        """
+        Async counterpart of main.Neo4jConnection built on AsyncGraphDatabase
+
+        The pooled async driver is opened lazily on the first awaited call, so
+        the connection can be created outside of the event loop it will run on.
+
+        Args:
+            uri (str): Neo4j URI (e.g., "bolt://localhost:7687")
+            username (str): Neo4j username
+            password (str): Neo4j password
+            database (str): Database name (default is "neo4j")
+        """
+        self.uri = uri
+        self.username = username
+        self.password = password
+        self.database = database
+        self.manager = get_connection_manager(uri, username, password, database)
+
+    async def close(self):
+        """
+        Release this connection. The pooled async driver stays open for other
+        coroutines; call manager.async_close() when the event loop shuts down.
+        """
+        self.manager = None
+
+    async def query(self, query: str, parameters: dict = None) -> Union[list, None]:
+        """
+        Execute a Cypher query
+
+        Args:
+            query (str): Cypher query
+            parameters (dict): Query parameters (optional)
+
+        Returns:
+            list: Query results or None if error occurs
+        """
+        assert self.manager is not None, "Connection already closed!"
+        response = None
+
+        async def work(session):
+            result = await session.run(query, parameters or {})
+            return [record async for record in result]
+
+        try:
+            response = await self.manager.async_run_with_retry(work, database=self.database)
+        except Exception as e:
+            print(f"Query failed: {e}")
+
+        return response
+
+    async def write_transaction(self, query: str, parameters: dict = None):
+        """
+        Execute a write transaction
+
+        Args:
+            query (str): Cypher query for writing data
+            parameters (dict): Query parameters (optional)
+
+        Returns:
+            bool: Whether the transaction committed
+        """
+        assert self.manager is not None, "Connection already closed!"
+
+        async def unit_of_work(tx):
+            result = await tx.run(query, parameters or {})
+            await result.consume()
+
+        try:
+            # execute_write retries transient errors (connection loss included) itself.
+            async with self.manager.async_session(database=self.database) as session:
+                await session.execute_write(unit_of_work)
+            return True
+        except Exception as e:
+            print(f"Write transaction failed: {e}")
+            return False
+
+    async def write_batch(self, query: str, rows: list, batch_size: int = 1000,
+                          parameters: dict = None, concurrency: int = 4) -> int:
+        """
+        Execute an UNWIND write once per batch of rows, several batches at a time
+
+        Args:
+            query (str): Cypher query reading its input from $rows
+            rows (list): Parameter maps, one per row
+            batch_size (int): Rows per transaction
+            parameters (dict): Extra parameters shared by every batch (optional)
+            concurrency (int): Batches allowed in flight at once
+
+        Returns:
+            int: Number of transactions executed
+
+        Raises:
+            BatchWriteError: After all batches were tried, if any failed
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def write_one(batch):
+            batch_parameters = dict(parameters or {})
+            batch_parameters["rows"] = batch
+            async with semaphore:
+                return await self.write_transaction(query, batch_parameters)
+
+        batches = [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+        committed = await asyncio.gather(*(write_one(batch) for batch in batches))
+        failed = [batch for batch, ok in zip(batches, committed) if not ok]
+        if failed:
+            raise BatchWriteError(len(batches), len(failed), sum(len(batch) for batch in failed))
+        return len(batches)
+
+    async def stream(self, query: str, parameters: dict = None, fetch_size: int = 1000):
+        """
+        Stream the records of a read query without materializing them
+
+        Args:
+            query (str): Cypher query
+            parameters (dict): Query parameters (optional)
+            fetch_size (int): Records pulled from the server per round trip
+
+        Yields:
+            neo4j.Record: One record at a time
+        """
+        assert self.manager is not None, "Connection already closed!"
+
+        async with self.manager.async_session(database=self.database, fetch_size=fetch_size) as session:
+            result = await session.run(query, parameters or {})
+            async for record in result:
+                yield record
@@ -0,0 +1,8 @@
+#!/bin/sh
+# Record the LLM cassettes the offline benchmarks replay (see README.md).
+set -e
+cd "$(dirname "$0")/.."
+: "${OPENAI_API_KEY:?set OPENAI_API_KEY to record cassettes}"
+
+python benchmark_ingestion.py --record --output benchmark_results/ingestion-record.json
+python benchmark_query.py --record --output benchmark_results/query-record.json
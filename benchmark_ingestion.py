@@ -0,0 +1,266 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from llm_cassette import get_cassette, save_cassettes
+from memory_graph import get_memory_store
+from output_repair import repair_stats
+from cypher_parameters import PLAN_CACHE_STATS
+
+DOCS_DIR = "docs"
+CASSETTE_PATH = os.path.join("benchmark_data", "ingestion.json.gz")
+RESULTS_PATH = os.path.join("benchmark_results", "ingestion.json")
+
+# Pipelines under test and the document classes each one handles.
+PIPELINES = {
+    "extract_entity_relationship4": ["resume"],
+    "extract_entity_relationship5": ["resume"],
+    "extract_entity_relationships2": ["resume", "science_article", "technical_document"],
+}
+
+# docs/ files that are not resumes; everything else is treated as one.
+DOC_CLASSES = {
+    "Evaluation-of-ECG-based-Recognition-of-Cardiac-Abnormalities-using-Machine-Learning-and-Deep-Learning.pdf": "science_article",
+    "GraphRAG for structured data.pdf": "science_article",
+    "engproc-20-00035.pdf": "science_article",
+    "knowledge graphs.pdf": "science_article",
+    "Motor_Parametric_Calculations_for_Robot.pdf": "technical_document",
+}
+
+# Metrics where a larger value is a regression (the rest regress downwards).
+HIGHER_IS_WORSE = ["pdf_parse_seconds_per_doc", "prompt_tokens_per_doc", "db_round_trips_per_doc"]
+LOWER_IS_WORSE = ["docs_per_sec"]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far, in megabytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_pipeline(name: str, documents: list, verbose: bool = False) -> dict:
+    """
+    Run one pipeline's process_document over the documents and collect metrics
+
+    LLM calls go through the cassette configured in the environment and
+    writes go to an in-memory graph of the pipeline's own.
+
+    Args:
+        name (str): Pipeline module name, e.g. "extract_entity_relationship4"
+        documents (list): (pdf_path, doc_class) pairs
+        verbose (bool): Show the pipeline's own output
+
+    Returns:
+        dict: Aggregate and per-document metrics
+    """
+    module = importlib.import_module(name)
+    usage = get_cassette().stats
+
+    parse_seconds = [0.0]
+    extractors = {
+        attribute: getattr(module, attribute)
+        for attribute in ("extract_text_from_pdf", "extract_pages_from_pdf")
+        if hasattr(module, attribute)
+    }
+
+    def timed(extract):
+        def timed_extract(pdf_path, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return extract(pdf_path, *args, **kwargs)
+            finally:
+                parse_seconds[0] += time.perf_counter() - started
+        return timed_extract
+
+    uri = f"memory://benchmark/{name}"
+    os.environ["GRAPH_BACKEND"] = "memory"
+    os.environ["NEO4J_URI"] = uri
+    store = get_memory_store(uri)
+
+    for attribute, extract in extractors.items():
+        setattr(module, attribute, timed(extract))
+    per_document = []
+    totals_before = dict(usage)
+    repairs_before = repair_stats()
+    PLAN_CACHE_STATS.reset()
+    round_trips_before = store.round_trips
+    started = time.perf_counter()
+    try:
+        for pdf_path, doc_class in documents:
+            before = (dict(usage), parse_seconds[0], store.round_trips)
+            doc_started = time.perf_counter()
+            error = None
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(sys.stdout if verbose else output):
+                    module.process_document(pdf_path, doc_class)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            per_document.append({
+                "document": os.path.basename(pdf_path),
+                "doc_class": doc_class,
+                "seconds": time.perf_counter() - doc_started,
+                "pdf_parse_seconds": parse_seconds[0] - before[1],
+                "llm_calls": usage["calls"] - before[0]["calls"],
+                "prompt_tokens": usage["prompt_tokens"] - before[0]["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"] - before[0]["completion_tokens"],
+                "db_round_trips": store.round_trips - before[2],
+                "error": error,
+            })
+    finally:
+        for attribute, extract in extractors.items():
+            setattr(module, attribute, extract)
+    wall_seconds = time.perf_counter() - started
+
+    succeeded = [doc for doc in per_document if doc["error"] is None]
+    count = max(len(succeeded), 1)
+    return {
+        "documents": len(per_document),
+        "failed": len(per_document) - len(succeeded),
+        "wall_seconds": wall_seconds,
+        "docs_per_sec": len(succeeded) / wall_seconds if wall_seconds else 0.0,
+        "pdf_parse_seconds": parse_seconds[0],
+        "pdf_parse_seconds_per_doc": sum(doc["pdf_parse_seconds"] for doc in succeeded) / count,
+        "llm_calls": usage["calls"] - totals_before["calls"],
+        "prompt_tokens": usage["prompt_tokens"] - totals_before["prompt_tokens"],
+        "prompt_tokens_per_doc": sum(doc["prompt_tokens"] for doc in succeeded) / count,
+        "completion_tokens": usage["completion_tokens"] - totals_before["completion_tokens"],
+        "simulated_llm_latency_seconds": (usage["simulated_latency_seconds"]
+                                          - totals_before["simulated_latency_seconds"]),
+        "db_round_trips": store.round_trips - round_trips_before,
+        "db_round_trips_per_doc": sum(doc["db_round_trips"] for doc in succeeded) / count,
+        "output_parse_paths": {path: count - repairs_before[path] for path, count in repair_stats().items()},
+        "cypher_plan_cache": PLAN_CACHE_STATS.report(),
+        # ru_maxrss never goes down: this is the peak over this pipeline and
+        # every one run before it. Pass one --pipelines name to measure it alone.
+        "peak_rss_mb_so_far": peak_rss_mb(),
+        "per_document": per_document,
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    List metrics that regressed by more than tolerance against a baseline run
+
+    Failed documents always count as a regression: their metrics are left out
+    of the per-document averages, so a run that fails more would otherwise
+    look faster.
+
+    Args:
+        results (dict): Current benchmark results
+        baseline (dict): Results file of an earlier run
+        tolerance (float): Allowed relative change, e.g. 0.1 for 10%
+
+    Returns:
+        list: Human readable regression descriptions
+    """
+    regressions = []
+    for name, current in results["pipelines"].items():
+        if current["failed"]:
+            regressions.append(f"{name}.failed: {current['failed']} of {current['documents']} documents")
+        previous = baseline.get("pipelines", {}).get(name)
+        if not previous:
+            continue
+        for metric in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (metric in HIGHER_IS_WORSE and change > tolerance) or \
+                    (metric in LOWER_IS_WORSE and change < -tolerance):
+                regressions.append(f"{name}.{metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+
+def collect_documents(docs_dir: str, doc_classes: list, limit: Optional[int] = None) -> list:
+    documents = []
+    for file_name in sorted(os.listdir(docs_dir)):
+        if not file_name.lower().endswith(".pdf"):
+            continue
+        doc_class = DOC_CLASSES.get(file_name, "resume")
+        if doc_class in doc_classes:
+            documents.append((os.path.join(docs_dir, file_name), doc_class))
+    return documents[:limit] if limit else documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document ingestion over docs/")
+    parser.add_argument("--pipelines", nargs="+", default=list(PIPELINES), choices=list(PIPELINES))
+    parser.add_argument("--docs", default=DOCS_DIR, help="Directory of PDFs to ingest")
+    parser.add_argument("--limit", type=int, default=None, help="Documents per pipeline")
+    parser.add_argument("--cassette", default=CASSETTE_PATH, help="Recorded LLM responses")
+    parser.add_argument("--record", action="store_true", help="Call OpenAI for unrecorded prompts")
+    parser.add_argument("--latency", default="none",
+                        help="Simulated LLM latency, e.g. fixed:0.5 or lognormal:0,0.5")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the simulated latency")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = parser.parse_args()
+
+    if not args.record and not os.path.exists(args.cassette):
+        # Replaying from a missing cassette fails every document; stop before
+        # writing results that look like a (very fast) run.
+        sys.exit(f"No cassette at {args.cassette}; record one first with --record (needs OPENAI_API_KEY), "
+                 f"see benchmark_data/README.md")
+
+    os.environ["LLM_CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["LLM_CASSETTE_PATH"] = args.cassette
+    os.environ["LLM_CASSETTE_LATENCY"] = args.latency
+    os.environ["LLM_CASSETTE_SEED"] = str(args.seed)
+
+    results = {
+        "benchmark": "ingestion",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "llm_latency": args.latency,
+        "pipelines": {},
+    }
+    for name in args.pipelines:
+        documents = collect_documents(args.docs, PIPELINES[name], args.limit)
+        print(f"Running {name} over {len(documents)} documents...")
+        metrics = run_pipeline(name, documents, verbose=args.verbose)
+        results["pipelines"][name] = metrics
+        print(f"  {metrics['docs_per_sec']:.2f} docs/sec, "
+              f"{metrics['pdf_parse_seconds_per_doc'] * 1000:.1f} ms PDF parse/doc, "
+              f"{metrics['prompt_tokens_per_doc']:.0f} prompt tokens/doc, "
+              f"{metrics['db_round_trips_per_doc']:.1f} DB round trips/doc, "
+              f"process peak RSS so far {metrics['peak_rss_mb_so_far']:.1f} MB, {metrics['failed']} failed")
+        for doc in metrics["per_document"]:
+            if doc["error"]:
+                print(f"  {doc['document']}: {doc['error']}")
+
+    save_cassettes()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from llm_cassette import get_cassette, save_cassettes
+from memory_graph import InMemoryGraphConnection, reset_memory_stores
+
+CASSETTE_PATH = os.path.join("benchmark_data", "query.json.gz")
+RESULTS_PATH = os.path.join("benchmark_results", "query.json")
+GRAPH_URI = "memory://benchmark/query"
+
+# Representative questions; ids stay stable so results can be compared.
+GOLDEN_QUESTIONS = [
+    {"id": "skills-single", "question": "What are the skills of Raza Ali Poonja?"},
+    {"id": "education-single", "question": "Where did Hasnain Ali study?"},
+    {"id": "experience-single", "question": "Which companies has Fiona Zhang worked for?"},
+    {"id": "certifications-single", "question": "What certifications does George Kim hold?"},
+    {"id": "skill-lookup", "question": "Who knows Python?"},
+    {"id": "skill-ranking", "question": "Identify the top three machine learning engineers"},
+    {"id": "publications", "question": "Which people have publications?"},
+    {"id": "contact", "question": "What is the email address of Evan Patel?"},
+]
+
+# Deterministic graph in the shape extract_entity_relationship5 writes:
+# FILE -[HAS_<CATEGORY>]-> "<person>_<category>" -[HAS_VALUE]-> ITEM
+SEED_PEOPLE = {
+    "Bob Smith 1.pdf": ("Bob Smith", {
+        "SKILLS": ["Python", "Django", "PostgreSQL", "Docker"],
+        "EXPERIENCE": ["Backend Engineer at Acme Corp", "Software Developer at Initech"],
+        "EDUCATION": ["BSc Computer Science, University of Toronto"],
+        "CERTIFICATIONS": ["AWS Certified Developer"],
+        "PUBLICATIONS": [],
+        "PERSONAL_DETAILS": ["bob.smith@example.com"],
+    }),
+    "Evan Patel 1.pdf": ("Evan Patel", {
+        "SKILLS": ["Java", "Spring Boot", "Kubernetes"],
+        "EXPERIENCE": ["Platform Engineer at Globex"],
+        "EDUCATION": ["BEng Software Engineering, University of Waterloo"],
+        "CERTIFICATIONS": ["Certified Kubernetes Administrator"],
+        "PUBLICATIONS": [],
+        "PERSONAL_DETAILS": ["evan.patel@example.com"],
+    }),
+    "Fatima_Kiyani.pdf": ("Fatima Kiyani", {
+        "SKILLS": ["Machine Learning", "Python", "TensorFlow"],
+        "EXPERIENCE": ["Data Scientist at Careem"],
+        "EDUCATION": ["MS Data Science, LUMS"],
+        "CERTIFICATIONS": [],
+        "PUBLICATIONS": ["Deep Learning for Urdu OCR"],
+        "PERSONAL_DETAILS": ["fatima.kiyani@example.com"],
+    }),
+    "Fiona Zhang 1.pdf": ("Fiona Zhang", {
+        "SKILLS": ["React", "TypeScript", "GraphQL"],
+        "EXPERIENCE": ["Frontend Engineer at Shopify", "UI Developer at Hooli"],
+        "EDUCATION": ["BSc Computer Science, McGill University"],
+        "CERTIFICATIONS": [],
+        "PUBLICATIONS": [],
+        "PERSONAL_DETAILS": ["fiona.zhang@example.com"],
+    }),
+    "George Kim 1.pdf": ("George Kim", {
+        "SKILLS": ["Go", "Terraform", "AWS"],
+        "EXPERIENCE": ["Site Reliability Engineer at Umbrella"],
+        "EDUCATION": ["BSc Electrical Engineering, KAIST"],
+        "CERTIFICATIONS": ["AWS Solutions Architect", "HashiCorp Terraform Associate"],
+        "PUBLICATIONS": [],
+        "PERSONAL_DETAILS": ["george.kim@example.com"],
+    }),
+    "Hasnain Ali Resume.pdf": ("Hasnain Ali", {
+        "SKILLS": ["Python", "Machine Learning", "LangChain", "Neo4j"],
+        "EXPERIENCE": ["AI Engineer at Techlogix"],
+        "EDUCATION": ["BE Mechanical Engineering, NUST SMME"],
+        "CERTIFICATIONS": ["Deep Learning Specialization"],
+        "PUBLICATIONS": ["ECG based recognition of cardiac abnormalities"],
+        "PERSONAL_DETAILS": ["hasnain.ali@example.com"],
+    }),
+    "Immar_Karim 1.pdf": ("Immar Karim", {
+        "SKILLS": ["C++", "Embedded Systems", "Python"],
+        "EXPERIENCE": ["Firmware Engineer at Siemens"],
+        "EDUCATION": ["BSc Electronics, GIKI"],
+        "CERTIFICATIONS": [],
+        "PUBLICATIONS": [],
+        "PERSONAL_DETAILS": ["immar.karim@example.com"],
+    }),
+    "Muhammad Faris Khan CV.pdf": ("Muhammad Faris Khan", {
+        "SKILLS": ["Machine Learning", "PyTorch", "Computer Vision"],
+        "EXPERIENCE": ["Research Assistant at NUST"],
+        "EDUCATION": ["MS Robotics, NUST SMME"],
+        "CERTIFICATIONS": [],
+        "PUBLICATIONS": ["Motor parametric calculations for robots"],
+        "PERSONAL_DETAILS": ["faris.khan@example.com"],
+    }),
+    "Raza Ali Poonja - Resume.pdf": ("Raza Ali Poonja", {
+        "SKILLS": ["Python", "SQL", "Power BI"],
+        "EXPERIENCE": ["Data Analyst at Engro"],
+        "EDUCATION": ["BBA, IBA Karachi"],
+        "CERTIFICATIONS": ["Microsoft Power BI Data Analyst"],
+        "PUBLICATIONS": [],
+        "PERSONAL_DETAILS": ["raza.poonja@example.com"],
+    }),
+}
+
+
+def seed_graph(connection) -> None:
+    """
+    Write the golden graph with batched UNWIND statements
+
+    Args:
+        connection (InMemoryGraphConnection): Connection to write with
+    """
+    from graph_schema import bootstrap_schema, stamp_root_pointers
+    from skill_index import index_person_skills
+
+    bootstrap_schema(connection, force=True)
+    connection.write_transaction("MERGE (r:RESUME { name: 'resume' })")
+    connection.write_batch(
+        """
+        UNWIND $rows AS row
+        MERGE (f:FILE { name: row.file_name, root_entity_name: row.root_entity_name })
+        WITH f
+        MATCH (r:RESUME { name: 'resume' })
+        MERGE (r)-[:HAS_FILE]->(f)
+        """,
+        [{"file_name": file_name, "root_entity_name": person}
+         for file_name, (person, _) in SEED_PEOPLE.items()],
+    )
+    for file_name, (person, categories) in SEED_PEOPLE.items():
+        for cat_label, items in categories.items():
+            cat_node_name = f"{person}_{cat_label.lower()}"
+            connection.write_transaction(
+                f"""
+                MATCH (f:FILE {{ name: $file_name }})
+                MERGE (c:{cat_label} {{ name: $cat_node_name }})
+                MERGE (f)-[:HAS_{cat_label}]->(c)
+                WITH c
+                UNWIND $items AS item
+                MERGE (i:ITEM {{ name: item }})
+                MERGE (c)-[:HAS_VALUE]->(i)
+                """,
+                {"file_name": file_name, "cat_node_name": cat_node_name, "items": items},
+            )
+            stamp_root_pointers(connection, cat_label, [cat_node_name], person, file_name)
+            stamp_root_pointers(connection, "ITEM", items, person, file_name)
+        index_person_skills(connection, person, categories["SKILLS"], file_name)
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Linear-interpolated percentile, e.g. fraction=0.95 for p95
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p90": percentile(values, 0.90),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+class StageTimer:
+    def __init__(self):
+        """
+        Accumulates wall time per pipeline stage and Cypher execution time
+        for the question currently being answered
+        """
+        self.stages = {}
+        self.cypher_seconds = 0.0
+        self.cypher_statements = 0
+
+    def reset(self):
+        self.stages = {}
+        self.cypher_seconds = 0.0
+        self.cypher_statements = 0
+
+    def wrap(self, stage: str, function):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - started
+        return timed
+
+
+class _TimedChain:
+    def __init__(self, chain, timer: StageTimer):
+        self.chain = chain
+        self.invoke = timer.wrap("cypher_qa", chain.invoke)
+
+
+@contextlib.contextmanager
+def timed_cypher(timer: StageTimer):
+    """
+    Time every statement the in-memory backend executes
+    """
+    execute = InMemoryGraphConnection._execute
+
+    def timed_execute(self, query, parameters=None):
+        started = time.perf_counter()
+        try:
+            return execute(self, query, parameters)
+        finally:
+            timer.cypher_seconds += time.perf_counter() - started
+            timer.cypher_statements += 1
+
+    InMemoryGraphConnection._execute = timed_execute
+    try:
+        yield
+    finally:
+        InMemoryGraphConnection._execute = execute
+
+
+def run_benchmark(questions: list, repeat: int = 1, verbose: bool = False) -> dict:
+    """
+    Answer every golden question against the seeded graph and collect latencies
+
+    Args:
+        questions (list): Dicts with id and question
+        repeat (int): Times each question is answered
+        verbose (bool): Show the pipeline's own output
+
+    Returns:
+        dict: Per-stage and end-to-end latency percentiles plus per-question detail
+    """
+    reset_memory_stores()
+    graph_rag = importlib.import_module("graph_rag")
+    connection = graph_rag.neo4j_connection
+    seed_graph(connection)
+
+    timer = StageTimer()
+    stage_functions = {
+        "main_node": "extract_main_node_chain",
+        "neighbourhood": "get_relationships_for_node",
+        "rephrase": "rephrase_query_chain",
+        "fallback_cypher": "generate_optimized_cypher",
+        "enrich": "enrich_results_with_context",
+    }
+    originals = {name: getattr(graph_rag, name) for name in stage_functions.values()}
+    for stage, name in stage_functions.items():
+        setattr(graph_rag, name, timer.wrap(stage, originals[name]))
+
+    usage = get_cassette().stats
+    output = io.StringIO()
+    per_question = []
+    try:
+        with timed_cypher(timer), contextlib.redirect_stdout(sys.stdout if verbose else output):
+            started = time.perf_counter()
+            graph = graph_rag.create_langchain_graph(connection)
+            schema = graph.get_schema
+            qa = _TimedChain(graph_rag.build_qa_chain(graph), timer)
+            nodes, _, node_properties = graph_rag.get_all_nodes_and_relationships(graph_rag.FILE_NAMES_LIST)
+            setup_seconds = time.perf_counter() - started
+
+            for _ in range(repeat):
+                for item in questions:
+                    timer.reset()
+                    calls_before = usage["calls"]
+                    error = None
+                    started = time.perf_counter()
+                    try:
+                        answer = graph_rag.answer_question(
+                            item["question"], qa, schema, graph_rag.FILE_NAMES_LIST, nodes,
+                            node_properties, retries=1,
+                        )
+                        if answer is None:
+                            error = "no answer"
+                    except Exception as e:
+                        error = f"{type(e).__name__}: {e}"
+                    per_question.append({
+                        "id": item["id"],
+                        "seconds": time.perf_counter() - started,
+                        "stages": dict(timer.stages),
+                        "cypher_seconds": timer.cypher_seconds,
+                        "cypher_statements": timer.cypher_statements,
+                        "llm_calls": usage["calls"] - calls_before,
+                        "error": error,
+                    })
+    finally:
+        for name, function in originals.items():
+            setattr(graph_rag, name, function)
+
+    # Failed questions stop early, so their timings would pull the percentiles down.
+    answered = [question for question in per_question if not question["error"]]
+    stages = sorted({stage for question in answered for stage in question["stages"]})
+    return {
+        "questions": len(questions),
+        "repeat": repeat,
+        "failed": len(per_question) - len(answered),
+        "setup_seconds": setup_seconds,
+        "end_to_end": summarize([question["seconds"] for question in answered]),
+        "stages": {
+            stage: summarize([question["stages"].get(stage, 0.0) for question in answered])
+            for stage in stages
+        },
+        "cypher": summarize([question["cypher_seconds"] for question in answered]),
+        "cypher_statements_per_question": (sum(q["cypher_statements"] for q in answered)
+                                           / max(len(answered), 1)),
+        "llm_calls_per_question": sum(q["llm_calls"] for q in answered) / max(len(answered), 1),
+        "per_question": per_question,
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    List metrics that grew by more than tolerance against a baseline run
+
+    Failed questions always count as a regression.
+
+    Args:
+        results (dict): Current benchmark results
+        baseline (dict): Results file of an earlier run
+        tolerance (float): Allowed relative increase, e.g. 0.1 for 10%
+
+    Returns:
+        list: Human readable regression descriptions
+    """
+    metrics = [("end_to_end", "p50"), ("end_to_end", "p95"), ("cypher", "p50"), ("cypher", "p95")]
+    metrics += [(f"stages.{stage}", "p95") for stage in results["stages"]]
+    regressions = []
+    if results["failed"]:
+        regressions.append(f"failed: {results['failed']} of {results['questions'] * results['repeat']} answers")
+
+    def lookup(data, path, key):
+        for part in path.split("."):
+            data = (data or {}).get(part)
+        return (data or {}).get(key)
+
+    for path, key in metrics:
+        old, new = lookup(baseline, path, key), lookup(results, path, key)
+        if old and new is not None and (new - old) / old > tolerance:
+            regressions.append(f"{path}.{key}: {old:.4g}s -> {new:.4g}s ({(new - old) / old:+.1%})")
+
+    # An extra model round trip is a regression whatever the tolerance.
+    old_calls = baseline.get("llm_calls_per_question")
+    if old_calls is not None and results["llm_calls_per_question"] > old_calls:
+        regressions.append(f"llm_calls_per_question: {old_calls:.2f} -> {results['llm_calls_per_question']:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark graph_rag question answering offline")
+    parser.add_argument("--questions", default=None, help="JSON file of {id, question} (default: golden set)")
+    parser.add_argument("--repeat", type=int, default=1, help="Times each question is answered")
+    parser.add_argument("--cassette", default=CASSETTE_PATH, help="Recorded LLM responses")
+    parser.add_argument("--record", action="store_true", help="Call OpenAI for unrecorded prompts")
+    parser.add_argument("--latency", default="none",
+                        help="Simulated LLM latency, e.g. fixed:0.5 or lognormal:0,0.5")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the simulated latency")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+    args = parser.parse_args()
+
+    if not args.record and not os.path.exists(args.cassette):
+        # Replaying from a missing cassette fails every question; stop before
+        # writing results that look like a (very fast) run.
+        sys.exit(f"No cassette at {args.cassette}; record one first with --record (needs OPENAI_API_KEY), "
+                 f"see benchmark_data/README.md")
+
+    # graph_rag reads these when it is imported, so set them first.
+    os.environ["GRAPH_BACKEND"] = "memory"
+    os.environ["NEO4J_URI"] = GRAPH_URI
+    os.environ["LLM_CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["LLM_CASSETTE_PATH"] = args.cassette
+    os.environ["LLM_CASSETTE_LATENCY"] = args.latency
+    os.environ["LLM_CASSETTE_SEED"] = str(args.seed)
+
+    questions = GOLDEN_QUESTIONS
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as file:
+            questions = json.load(file)
+
+    metrics = run_benchmark(questions, repeat=args.repeat, verbose=args.verbose)
+    save_cassettes()
+
+    results = {
+        "benchmark": "query",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "llm_latency": args.latency,
+        **metrics,
+    }
+    print(f"{metrics['questions']} questions x {metrics['repeat']}: "
+          f"p50 {metrics['end_to_end']['p50'] * 1000:.1f} ms, p95 {metrics['end_to_end']['p95'] * 1000:.1f} ms, "
+          f"cypher p95 {metrics['cypher']['p95'] * 1000:.1f} ms, "
+          f"{metrics['llm_calls_per_question']:.1f} LLM calls/question, {metrics['failed']} failed")
+    for stage, summary in metrics["stages"].items():
+        print(f"  {stage}: p50 {summary['p50'] * 1000:.1f} ms, p95 {summary['p95'] * 1000:.1f} ms")
+    for question in metrics["per_question"]:
+        if question["error"]:
+            print(f"  {question['id']}: {question['error']}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
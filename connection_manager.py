@@ -0,0 +1,547 @@
+import asyncio
+import atexit
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional, Dict, Any, Callable
+
+from neo4j import GraphDatabase, AsyncGraphDatabase
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class ConnectionMetrics:
+    def __init__(self):
+        """
+        Counters describing how the shared pool is being used
+        """
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+        self.failed_health_checks = 0
+
+    def record_acquisition(self, wait: float) -> None:
+        with self._lock:
+            self.acquisitions += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def record_reconnect(self) -> None:
+        with self._lock:
+            self.reconnects += 1
+
+    def record_failed_health_check(self) -> None:
+        with self._lock:
+            self.failed_health_checks += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return a copy of the current counters
+
+        Returns:
+            dict: Acquisition count, wait times (seconds), timeouts and reconnects
+        """
+        with self._lock:
+            return {
+                'acquisitions': self.acquisitions,
+                'total_wait': self.total_wait,
+                'avg_wait': self.total_wait / self.acquisitions if self.acquisitions else 0.0,
+                'max_wait': self.max_wait,
+                'timeouts': self.timeouts,
+                'reconnects': self.reconnects,
+                'failed_health_checks': self.failed_health_checks,
+            }
+
+
+class Neo4jConnectionManager:
+    def __init__(self, uri: str, username: str, password: str, database: str = "neo4j",
+                 max_pool_size: int = 50, acquisition_timeout: float = 60.0,
+                 liveness_check_timeout: float = 30.0, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 **driver_kwargs):
+        """
+        Own a single pooled Neo4j driver and hand out sessions from it
+
+        Args:
+            uri (str): Neo4j URI (e.g., "bolt://localhost:7687")
+            username (str): Neo4j username
+            password (str): Neo4j password
+            database (str): Default database name
+            max_pool_size (int): Maximum number of pooled connections
+            acquisition_timeout (float): Seconds to wait for a free connection
+            liveness_check_timeout (float): Idle seconds after which a pooled
+                connection is pinged before being reused
+            max_retries (int): Reconnection attempts before giving up
+            backoff_base (float): Initial backoff delay in seconds
+            backoff_max (float): Upper bound for a single backoff delay
+            **driver_kwargs: Extra keyword arguments for GraphDatabase.driver
+        """
+        self.uri = uri
+        self.username = username
+        self.password = password
+        self.database = database
+        self.max_pool_size = max_pool_size
+        self.acquisition_timeout = acquisition_timeout
+        self.liveness_check_timeout = liveness_check_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.driver_kwargs = driver_kwargs
+        self.metrics = ConnectionMetrics()
+
+        self._driver = None
+        self._lock = threading.RLock()
+        self._slots = threading.BoundedSemaphore(max_pool_size)
+
+        # The async driver and its slots are bound to the event loop that
+        # creates them, so they are created lazily from inside that loop and
+        # replaced when a later asyncio.run() brings a new one.
+        self._async_driver = None
+        self._async_slots = None
+        self._async_loop = None
+
+    @property
+    def driver(self):
+        """
+        Return the shared driver, connecting on first use
+        """
+        if self._driver is None:
+            self._connect()
+        return self._driver
+
+    def _create_driver(self):
+        return GraphDatabase.driver(
+            self.uri,
+            auth=(self.username, self.password),
+            max_connection_pool_size=self.max_pool_size,
+            connection_acquisition_timeout=self.acquisition_timeout,
+            liveness_check_timeout=self.liveness_check_timeout,
+            **self.driver_kwargs
+        )
+
+    def _create_async_driver(self):
+        return AsyncGraphDatabase.driver(
+            self.uri,
+            auth=(self.username, self.password),
+            max_connection_pool_size=self.max_pool_size,
+            connection_acquisition_timeout=self.acquisition_timeout,
+            liveness_check_timeout=self.liveness_check_timeout,
+            **self.driver_kwargs
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def _connect(self) -> None:
+        """
+        (Re)create the driver, retrying with exponential backoff
+        """
+        with self._lock:
+            if self._driver is not None:
+                return
+
+            last_error = None
+            for attempt in range(self.max_retries):
+                driver = None
+                try:
+                    driver = self._create_driver()
+                    driver.verify_connectivity()
+                    self._driver = driver
+                    print("Connection to Neo4j DB successful")
+                    return
+                except Exception as e:
+                    last_error = e
+                    if driver is not None:
+                        driver.close()
+                    delay = self._backoff(attempt)
+                    print(f"Failed to connect to Neo4j DB (attempt {attempt + 1}/{self.max_retries}): {e}. "
+                          f"Retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+            raise Exception(f"Failed to connect to Neo4j DB: {last_error}")
+
+    def health_check(self) -> bool:
+        """
+        Check that the server is reachable through the shared driver
+
+        Returns:
+            bool: True if the server answered
+        """
+        if self._driver is None:
+            return False
+        try:
+            self._driver.verify_connectivity()
+            return True
+        except Exception as e:
+            self.metrics.record_failed_health_check()
+            print(f"Neo4j health check failed: {e}")
+            return False
+
+    def reconnect(self, stale_driver=None) -> None:
+        """
+        Drop the current driver and connect again with backoff
+
+        Args:
+            stale_driver (neo4j.Driver): The driver that failed; if another
+                thread already replaced it, nothing is closed (optional)
+        """
+        with self._lock:
+            if stale_driver is not None and self._driver is not stale_driver:
+                # Several threads can lose the same driver at once; the first
+                # one reconnects and the rest reuse its driver.
+                if self._driver is None:
+                    self._connect()
+                return
+            if self._driver is not None:
+                try:
+                    self._driver.close()
+                except Exception:
+                    pass
+                self._driver = None
+            self.metrics.record_reconnect()
+            self._connect()
+
+    def ensure_connection(self) -> None:
+        """
+        Ensure the driver is initialized and alive, reconnecting if necessary
+        """
+        if self._driver is None:
+            self._connect()
+        elif not self.health_check():
+            self.reconnect()
+
+    @contextmanager
+    def session(self, database: Optional[str] = None, **kwargs):
+        """
+        Borrow a session from the shared pool
+
+        Args:
+            database (str): Database name (defaults to the manager's database)
+            **kwargs: Extra keyword arguments for driver.session
+
+        Yields:
+            neo4j.Session: An open session, closed on exit
+        """
+        with self._session_on(self.driver, database, **kwargs) as session:
+            yield session
+
+    @contextmanager
+    def _session_on(self, driver, database: Optional[str] = None, **kwargs):
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquisition_timeout):
+            self.metrics.record_timeout()
+            raise TimeoutError(
+                f"Timed out after {self.acquisition_timeout}s waiting for a Neo4j connection"
+            )
+        self.metrics.record_acquisition(time.perf_counter() - start)
+
+        try:
+            session = driver.session(database=database or self.database, **kwargs)
+            try:
+                yield session
+            finally:
+                session.close()
+        finally:
+            self._slots.release()
+
+    def run_with_retry(self, work: Callable, database: Optional[str] = None):
+        """
+        Run work(session) and retry on connection loss
+
+        For reads only: session.execute_write already retries transient
+        errors itself.
+
+        Args:
+            work (Callable): Function receiving an open session
+            database (str): Database name (optional)
+
+        Returns:
+            Whatever work returns
+        """
+        for attempt in range(self.max_retries):
+            driver = self.driver
+            try:
+                with self._session_on(driver, database=database) as session:
+                    return work(session)
+            except (ServiceUnavailable, SessionExpired) as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"Lost connection to Neo4j DB: {e}. Reconnecting in {delay:.1f}s")
+                time.sleep(delay)
+                self.reconnect(driver)
+
+    async def async_driver(self):
+        """
+        Return the shared async driver, connecting on first use
+
+        Returns:
+            neo4j.AsyncDriver: Pooled async driver bound to the running loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_driver is not None and self._async_loop is not loop:
+            # The old driver's sockets belong to a loop that is closed or not
+            # running here, so it cannot be awaited; let it be collected.
+            self._async_driver = self._async_slots = self._async_loop = None
+        if self._async_driver is not None:
+            return self._async_driver
+
+        last_error = None
+        for attempt in range(self.max_retries):
+            driver = None
+            try:
+                driver = self._create_async_driver()
+                await driver.verify_connectivity()
+                if self._async_driver is None:
+                    self._async_driver = driver
+                    self._async_slots = asyncio.Semaphore(self.max_pool_size)
+                    self._async_loop = loop
+                    print("Async connection to Neo4j DB successful")
+                else:
+                    await driver.close()
+                return self._async_driver
+            except Exception as e:
+                last_error = e
+                if driver is not None:
+                    await driver.close()
+                delay = self._backoff(attempt)
+                print(f"Failed to connect to Neo4j DB (attempt {attempt + 1}/{self.max_retries}): {e}. "
+                      f"Retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        raise Exception(f"Failed to connect to Neo4j DB: {last_error}")
+
+    async def async_reconnect(self) -> None:
+        """
+        Drop the current async driver and connect again with backoff
+        """
+        driver, loop = self._async_driver, self._async_loop
+        self._async_driver = self._async_slots = self._async_loop = None
+        if driver is not None and loop is asyncio.get_running_loop():
+            try:
+                await driver.close()
+            except Exception:
+                pass
+        self.metrics.record_reconnect()
+        await self.async_driver()
+
+    @asynccontextmanager
+    async def async_session(self, database: Optional[str] = None, **kwargs):
+        """
+        Borrow an async session from the shared async pool
+
+        Args:
+            database (str): Database name (defaults to the manager's database)
+            **kwargs: Extra keyword arguments for driver.session
+
+        Yields:
+            neo4j.AsyncSession: An open session, closed on exit
+        """
+        driver = await self.async_driver()
+        slots = self._async_slots
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.acquisition_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.record_timeout()
+            raise TimeoutError(
+                f"Timed out after {self.acquisition_timeout}s waiting for a Neo4j connection"
+            )
+        self.metrics.record_acquisition(time.perf_counter() - start)
+
+        try:
+            session = driver.session(database=database or self.database, **kwargs)
+            try:
+                yield session
+            finally:
+                await session.close()
+        finally:
+            slots.release()
+
+    async def async_run_with_retry(self, work: Callable, database: Optional[str] = None):
+        """
+        Await work(session) and retry on connection loss
+
+        For reads only: session.execute_write already retries transient
+        errors itself.
+
+        Args:
+            work (Callable): Coroutine function receiving an open async session
+            database (str): Database name (optional)
+
+        Returns:
+            Whatever work returns
+        """
+        for attempt in range(self.max_retries):
+            try:
+                async with self.async_session(database=database) as session:
+                    return await work(session)
+            except (ServiceUnavailable, SessionExpired) as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"Lost connection to Neo4j DB: {e}. Reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                await self.async_reconnect()
+
+    async def async_close(self) -> None:
+        """
+        Close the shared async driver
+        """
+        driver, loop = self._async_driver, self._async_loop
+        self._async_driver = self._async_slots = self._async_loop = None
+        if driver is not None and loop is asyncio.get_running_loop():
+            await driver.close()
+
+    def close(self) -> None:
+        """
+        Close the shared driver
+        """
+        with self._lock:
+            if self._driver is not None:
+                self._driver.close()
+                self._driver = None
+                print("Neo4j connection closed")
+
+
+_managers: Dict[tuple, Neo4jConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def _env_number(name: str, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def _option_key(value):
+    # Driver options such as TrustSystemCAs() are fresh objects on every call
+    # and compare by identity, so compare them by type and state instead.
+    if type(value).__eq__ is object.__eq__ and hasattr(value, "__dict__"):
+        return type(value).__qualname__, _option_key(vars(value))
+    if isinstance(value, dict):
+        return tuple(sorted((name, _option_key(item)) for name, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return type(value).__name__, tuple(_option_key(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def get_connection_manager(uri: Optional[str] = None, username: Optional[str] = None,
+                           password: Optional[str] = None, database: Optional[str] = None,
+                           **driver_kwargs) -> Neo4jConnectionManager:
+    """
+    Return the process-wide manager for a server, creating it on first use
+
+    Missing arguments fall back to NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD and
+    NEO4J_DATABASE. Pool settings come from NEO4J_MAX_POOL_SIZE,
+    NEO4J_ACQUISITION_TIMEOUT, NEO4J_LIVENESS_CHECK_TIMEOUT, NEO4J_MAX_RETRIES
+    and NEO4J_BACKOFF_BASE.
+
+    Args:
+        uri (str): Neo4j URI (optional)
+        username (str): Neo4j username (optional)
+        password (str): Neo4j password (optional)
+        database (str): Database name (optional)
+        **driver_kwargs: Extra keyword arguments for GraphDatabase.driver;
+            callers passing different options get separate managers
+
+    Returns:
+        Neo4jConnectionManager: Shared manager for (uri, username, database,
+            driver options)
+    """
+    uri = uri or os.getenv("NEO4J_URI")
+    username = username or os.getenv("NEO4J_USERNAME")
+    password = password or os.getenv("NEO4J_PASSWORD")
+    database = database or os.getenv("NEO4J_DATABASE", "neo4j")
+
+    key = (uri, username, database, _option_key(driver_kwargs))
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = Neo4jConnectionManager(
+                uri, username, password, database,
+                max_pool_size=_env_number("NEO4J_MAX_POOL_SIZE", 50, int),
+                acquisition_timeout=_env_number("NEO4J_ACQUISITION_TIMEOUT", 60.0),
+                liveness_check_timeout=_env_number("NEO4J_LIVENESS_CHECK_TIMEOUT", 30.0),
+                max_retries=_env_number("NEO4J_MAX_RETRIES", 5, int),
+                backoff_base=_env_number("NEO4J_BACKOFF_BASE", 0.5),
+                **driver_kwargs
+            )
+            _managers[key] = manager
+        return manager
+
+
+def create_langchain_graph(manager: Optional[Neo4jConnectionManager] = None):
+    """
+    Build a LangChain Neo4jGraph that runs on the shared pooled driver
+
+    Args:
+        manager (Neo4jConnectionManager): Manager to use (defaults to the env one)
+
+    Returns:
+        Neo4jGraph: Graph wrapper sharing the manager's driver
+    """
+    from langchain_community.graphs import Neo4jGraph
+
+    manager = manager or get_connection_manager()
+    graph = Neo4jGraph(
+        url=manager.uri,
+        username=manager.username,
+        password=manager.password,
+        database=manager.database,
+        driver_config={"max_connection_pool_size": 1},
+    )
+    # Neo4jGraph always opens its own driver; swap it for the pooled one so the
+    # QA chain reuses warm connections instead of keeping a second pool alive.
+    graph._driver.close()
+    graph._driver = manager.driver
+    return graph
+
+
+def get_connection_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Return pool metrics for every manager created in this process
+
+    Returns:
+        dict: Metrics snapshot keyed by URI ("uri#2", ... for further managers
+            of the same server with other driver options)
+    """
+    metrics = {}
+    with _managers_lock:
+        for key, manager in _managers.items():
+            name, copy = key[0], 1
+            while name in metrics:
+                copy += 1
+                name = f"{key[0]}#{copy}"
+            metrics[name] = manager.metrics.snapshot()
+    return metrics
+
+
+def close_all_connections() -> None:
+    """
+    Close every shared driver (registered to run at interpreter exit)
+    """
+    with _managers_lock:
+        for manager in _managers.values():
+            manager.close()
+        _managers.clear()
+
+
+atexit.register(close_all_connections)
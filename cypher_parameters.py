@@ -0,0 +1,232 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Statement shapes remembered when estimating plan-cache hits; matches the
+# default size of Neo4j's query cache (server.db.query_cache_size).
+CYPHER_PLAN_CACHE_SIZE = int(os.getenv("CYPHER_PLAN_CACHE_SIZE", "1000"))
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<ident>`[^`]+`|[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<hex>0[xX][0-9A-Fa-f]+|0o[0-7]+)
+  | (?P<number>(?:\d+\.\d+|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+  | (?P<param>\$[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op><>|<=|>=|=~|->|<-|\.\.|\+=|.)
+""", re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+_KEYWORDS = {
+    "MATCH", "OPTIONAL", "MERGE", "CREATE", "WHERE", "RETURN", "WITH", "UNWIND", "SET", "DELETE",
+    "DETACH", "REMOVE", "ORDER", "BY", "LIMIT", "SKIP", "AS", "AND", "OR", "XOR", "NOT", "IN",
+    "DISTINCT", "ON", "CALL", "YIELD", "IS", "NULL", "TRUE", "FALSE", "CONTAINS", "STARTS", "ENDS",
+    "ASC", "DESC", "ASCENDING", "DESCENDING", "UNION", "ALL", "CASE", "WHEN", "THEN", "ELSE", "END",
+    "EXISTS",
+}
+# Statements whose literals Neo4j does not accept as parameters.
+_SCHEMA_STATEMENT = re.compile(r"^\s*(?:CREATE|DROP)\s+(?:INDEX|CONSTRAINT|FULLTEXT|LOOKUP|RANGE|TEXT|POINT)\b|"
+                               r"^\s*SHOW\b", re.IGNORECASE)
+_WORDS = ("ident", "keyword", "param", "number", "string")
+_SPACED_OPERATORS = {"=", "<>", "<=", ">=", "<", ">", "=~", "+="}
+
+
+def _string_value(raw: str) -> str:
+    return re.sub(r"\\(u[0-9A-Fa-f]{4}|.)",
+                  lambda m: chr(int(m.group(1)[1:], 16)) if len(m.group(1)) == 5
+                  else _ESCAPES.get(m.group(1), m.group(1)), raw[1:-1])
+
+
+def _number_value(raw: str):
+    if raw[:2].lower() in ("0x", "0o"):
+        return int(raw, 0)
+    return float(raw) if any(c in raw for c in ".eE") else int(raw)
+
+
+def _spaced(previous: str, previous_kind: str, text: str, kind: str, brackets: list) -> bool:
+    if previous in ("(", "[", "{", ".") or text in (")", "]", "}", ",", ".", ":"):
+        return False
+    if previous == ",":
+        return True
+    if previous == ":":
+        return bool(brackets) and brackets[-1] == "{"
+    if previous in _SPACED_OPERATORS or text in _SPACED_OPERATORS:
+        return True
+    if previous_kind in _WORDS and kind in _WORDS:
+        return True
+    if text in ("(", "["):
+        return previous_kind == "keyword"
+    if text == "{":
+        return previous_kind in _WORDS
+    return previous in (")", "]", "}") and kind in _WORDS
+
+
+def parameterize(query: str, parameters: Optional[dict] = None) -> Tuple[str, dict]:
+    """
+    Lift the literals of a Cypher statement into parameters and canonicalize its text
+
+    String and number literals become $p0, $p1, ... in order of appearance,
+    comments are dropped, spacing is normalized and keywords are upper-cased,
+    so statements that differ only in their values share one text (and one
+    compiled plan). Literals that cannot be parameters (variable-length bounds,
+    schema statements) are kept.
+
+    Args:
+        query (str): Cypher statement, e.g. generated by an LLM
+        parameters (dict): Parameters the statement already uses (optional)
+
+    Returns:
+        tuple: (canonical statement, parameters including the lifted literals)
+    """
+    parameters = dict(parameters or {})
+    query = query.strip().rstrip(";").strip()
+    if _SCHEMA_STATEMENT.match(query):
+        return query, parameters
+
+    tokens = [("number" if match.lastgroup == "hex" else match.lastgroup, match.group())
+              for match in _TOKEN_PATTERN.finditer(query)]
+    significant = [index for index, (kind, _) in enumerate(tokens) if kind != "ws"]
+    taken = {raw[1:] for kind, raw in tokens if kind == "param"} | set(parameters)
+    counter = 0
+
+    def next_name() -> str:
+        nonlocal counter
+        while f"p{counter}" in taken:
+            counter += 1
+        name = f"p{counter}"
+        taken.add(name)
+        return name
+
+    out = []
+    brackets = []
+    previous_kind = None
+    for position, index in enumerate(significant):
+        kind, raw = tokens[index]
+        previous = tokens[significant[position - 1]][1] if position else ""
+        following = tokens[significant[position + 1]][1] if position + 1 < len(significant) else ""
+
+        if kind == "string" or (kind == "number" and previous not in ("*", "..") and following != ".."):
+            name = next_name()
+            if kind == "string":
+                parameters[name] = _string_value(raw)
+            else:
+                parameters[name] = _number_value(raw)
+            kind, text = "param", f"${name}"
+        elif (kind == "ident" and raw.upper() in _KEYWORDS and following != ":"
+              and previous not in (".", ":") and previous.upper() != "AS"):
+            kind, text = "keyword", raw.upper()
+        else:
+            text = raw
+
+        if out and _spaced(out[-1], previous_kind, text, kind, brackets):
+            out.append(" ")
+        out.append(text)
+        previous_kind = kind
+        if text in "([{":
+            brackets.append(text)
+        elif text in ")]}" and brackets:
+            brackets.pop()
+    return "".join(out), parameters
+
+
+class PlanCacheStats:
+    def __init__(self, capacity: int = CYPHER_PLAN_CACHE_SIZE):
+        """
+        Estimates plan-cache reuse from the statement texts sent to the database
+
+        A statement whose canonical text was among the last `capacity`
+        distinct texts counts as a hit, the way Neo4j's LRU query cache
+        reuses a compiled plan.
+
+        Args:
+            capacity (int): Distinct statement shapes the cache holds
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.lifted = 0
+        self._shapes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, lifted: int = 0) -> bool:
+        """
+        Count one execution of a statement
+
+        Args:
+            statement (str): Statement text as sent
+            lifted (int): Literals that were lifted into parameters
+
+        Returns:
+            bool: Whether the statement would reuse a cached plan
+        """
+        with self._lock:
+            self.lifted += lifted
+            hit = statement in self._shapes
+            if hit:
+                self.hits += 1
+                self._shapes.move_to_end(statement)
+                self._shapes[statement] += 1
+            else:
+                self.misses += 1
+                self._shapes[statement] = 1
+                if len(self._shapes) > self.capacity:
+                    self._shapes.popitem(last=False)
+            return hit
+
+    def report(self) -> dict:
+        """
+        Cache counters so far
+
+        Returns:
+            dict: statements, hits, misses, hit_rate, shapes (cached distinct
+                texts), lifted_literals and the most repeated shapes
+        """
+        with self._lock:
+            statements = self.hits + self.misses
+            top = sorted(self._shapes.items(), key=lambda item: -item[1])[:5]
+            return {
+                "statements": statements,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / statements if statements else 0.0,
+                "shapes": len(self._shapes),
+                "lifted_literals": self.lifted,
+                "top_shapes": [{"statement": shape, "executions": count} for shape, count in top],
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.lifted = 0
+            self._shapes.clear()
+
+
+PLAN_CACHE_STATS = PlanCacheStats()
+
+
+def run_cypher(neo4j_connection, query: str, parameters: Optional[dict] = None, write: bool = True,
+               stats: PlanCacheStats = PLAN_CACHE_STATS):
+    """
+    Parameterize a generated statement and execute it
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to execute with
+        query (str): Cypher statement with inline literals
+        parameters (dict): Parameters the statement already uses (optional)
+        write (bool): Run in a write transaction rather than as a read query
+        stats (PlanCacheStats): Counters to record the statement in
+
+    Returns:
+        list: Query records for reads (None on error), None for writes
+    """
+    statement, all_parameters = parameterize(query, parameters)
+    stats.record(statement, len(all_parameters) - len(parameters or {}))
+    if write:
+        return neo4j_connection.write_transaction(statement, all_parameters)
+    return neo4j_connection.query(statement, all_parameters)
@@ -0,0 +1,87 @@
+import os
+import re
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound on characters sent to the model per chunk (~3k tokens).
+CHUNK_MAX_CHARS = int(os.getenv("EXTRACTION_CHUNK_CHARS", "12000"))
+
+# Lines that open a new section: numbered headings ("2.1 Methods"), the usual
+# article section names, and short all-caps lines.
+_SECTION_NAMES = (
+    "abstract|introduction|background|related work|literature review|methods?|methodology|"
+    "materials and methods|experiments?|experimental setup|results?|discussion|evaluation|"
+    "conclusions?|future work|acknowledge?ments?|references|bibliography|appendix"
+)
+_HEADING_PATTERN = re.compile(
+    rf"^(?:(?i:{_SECTION_NAMES})\s*:?|\d+(?:\.\d+)*\.?\s+[A-Z][^\n]{{0,80}}|[A-Z][A-Z0-9 ,&\-]{{3,60}})\s*$",
+    re.MULTILINE,
+)
+
+
+def split_sections(pages: list) -> list:
+    """
+    Split page texts into sections at heading lines and page boundaries
+
+    Args:
+        pages (list): Page texts in order
+
+    Returns:
+        list: Section texts in document order; no text is dropped
+    """
+    sections = []
+    for page in pages:
+        if not page or not page.strip():
+            continue
+        starts = [match.start() for match in _HEADING_PATTERN.finditer(page)
+                  if not match.group(0).strip().isdigit()]
+        bounds = [0] + [start for start in starts if start > 0] + [len(page)]
+        for start, stop in zip(bounds, bounds[1:]):
+            if page[start:stop].strip():
+                sections.append(page[start:stop])
+    return sections
+
+
+def _split_oversized(text: str, max_chars: int) -> list:
+    pieces = []
+    current = ""
+    for paragraph in re.split(r"(\n\s*\n)", text):
+        if len(current) + len(paragraph) > max_chars and current:
+            pieces.append(current)
+            current = ""
+        while len(paragraph) > max_chars:
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        current += paragraph
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def chunk_document(pages: list, max_chars: int = CHUNK_MAX_CHARS) -> list:
+    """
+    Pack consecutive sections into chunks of at most max_chars
+
+    Sections are never split unless a single section exceeds max_chars, in
+    which case it is cut at paragraph boundaries.
+
+    Args:
+        pages (list): Page texts in order
+        max_chars (int): Maximum characters per chunk
+
+    Returns:
+        list: Chunk texts in document order
+    """
+    chunks = []
+    current = ""
+    for section in split_sections(pages):
+        for piece in (_split_oversized(section, max_chars) if len(section) > max_chars else [section]):
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current += piece if not current else "\n" + piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
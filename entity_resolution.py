@@ -0,0 +1,379 @@
+import argparse
+import difflib
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from graph_schema import FULLTEXT_INDEX
+from graph_search import build_lucene_query
+
+load_dotenv()
+
+# Minimum difflib ratio between normalized names (and between each pair of
+# differing words) for a fuzzy match.
+ENTITY_MATCH_THRESHOLD = float(os.getenv("ENTITY_MATCH_THRESHOLD", "0.9"))
+# Only name-like values are matched fuzzily; longer values (job descriptions,
+# publication titles) must normalize to the same string.
+FUZZY_MAX_WORDS = 4
+# Shorter names must normalize to the same string: one edit in "Java" or
+# "C#" names a different thing.
+FUZZY_MIN_CHARS = 8
+# Full-text candidates fetched per name when resolving against the graph.
+CANDIDATE_LIMIT = 25
+
+# Qualifiers that do not change which entity a value names, e.g.
+# "Python (Advanced)" or "English - Fluent".
+_QUALIFIERS = (
+    "basic|beginner|intermediate|advanced|expert|proficient|proficiency|fluent|native|"
+    "working knowledge|familiar"
+)
+_QUALIFIER_PATTERN = re.compile(rf"\s*(?:\((?:{_QUALIFIERS})\)|[-:,]\s*(?:{_QUALIFIERS}))\s*$", re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)*")
+_SAFE_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def normalize_entity(name: str) -> str:
+    """
+    Reduce a value to the form its spellings share
+
+    Version numbers are kept: "Python 2.7" and "Python" are different skills.
+
+    Args:
+        name (str): Value as extracted, e.g. "Python 3 (Advanced)"
+
+    Returns:
+        str: Normalized form, e.g. "python 3"
+    """
+    text = re.sub(r"\s+", " ", name or "").strip()
+    previous = None
+    while text != previous:
+        previous = text
+        text = _QUALIFIER_PATTERN.sub("", text)
+    text = re.sub(r"[^\w+#./& ]+", " ", text.casefold())
+    return re.sub(r"\s+", " ", text).strip(" .")
+
+
+def _fuzzy_candidate(normalized: str, candidate: str, threshold: float) -> bool:
+    # Near-identical strings can still name different things: "windows 10" /
+    # "windows 11" or "software engineer" / "software engineering". Only typos
+    # inside words of matching names are tolerated.
+    if min(len(normalized), len(candidate)) < FUZZY_MIN_CHARS:
+        return False
+    if _NUMBER_PATTERN.findall(normalized) != _NUMBER_PATTERN.findall(candidate):
+        return False
+    words, candidate_words = normalized.split(), candidate.split()
+    if len(words) != len(candidate_words):
+        return False
+    for word, other in zip(words, candidate_words):
+        if word == other:
+            continue
+        if word.startswith(other) or other.startswith(word):
+            return False
+        if difflib.SequenceMatcher(None, word, other).ratio() < threshold:
+            return False
+    return True
+
+
+def _block_keys(normalized: str) -> List[str]:
+    words = normalized.split()
+    if not words:
+        return []
+    return list(dict.fromkeys([f"w:{words[0]}", f"p:{normalized[:4]}"]))
+
+
+class EntityResolver:
+    def __init__(self, threshold: float = ENTITY_MATCH_THRESHOLD,
+                 lookup: Optional[Callable[[str], Iterable[Tuple[str, List[str]]]]] = None):
+        """
+        Maps value spellings onto canonical names
+
+        Candidates are blocked by first word and by 4-character prefix of the
+        normalized name, and only scored against names in the same blocks.
+        Fuzzy matches need names of at least FUZZY_MIN_CHARS with the same
+        numbers and words, each word at most a typo away.
+
+        Args:
+            threshold (float): Minimum similarity for a fuzzy match
+            lookup (Callable): Returns (name, aliases) candidates for a value
+                that are not registered yet, e.g. from a full-text index (optional)
+        """
+        self.threshold = threshold
+        self.lookup = lookup
+        self.aliases: Dict[str, List[str]] = {}
+        self.changed = set()
+        self._by_normalized: Dict[str, str] = {}
+        self._blocks: Dict[str, List[str]] = {}
+        self._looked_up = set()
+
+    def add(self, name: str, aliases: Iterable[str] = ()) -> None:
+        """
+        Register an existing canonical name and its known aliases
+
+        Args:
+            name (str): Canonical name
+            aliases (Iterable[str]): Other spellings already merged into it
+        """
+        normalized = normalize_entity(name)
+        if not normalized or name in self.aliases:
+            return
+        self.aliases[name] = list(dict.fromkeys([name, *(alias for alias in aliases if alias)]))
+        for spelling in self.aliases[name]:
+            self._by_normalized.setdefault(normalize_entity(spelling), name)
+        for key in _block_keys(normalized):
+            self._blocks.setdefault(key, []).append(name)
+
+    def match(self, name: str) -> Optional[str]:
+        """
+        Find the canonical name a value duplicates, without registering it
+
+        Args:
+            name (str): Value as extracted
+
+        Returns:
+            str: Canonical name, or None
+        """
+        normalized = normalize_entity(name)
+        if not normalized:
+            return None
+        if normalized not in self._by_normalized and self.lookup and normalized not in self._looked_up:
+            self._looked_up.add(normalized)
+            for candidate, aliases in self.lookup(name):
+                self.add(candidate, aliases)
+        if normalized in self._by_normalized:
+            return self._by_normalized[normalized]
+        if len(normalized.split()) > FUZZY_MAX_WORDS:
+            return None
+
+        best, best_score = None, self.threshold
+        candidates = dict.fromkeys(c for key in _block_keys(normalized) for c in self._blocks.get(key, []))
+        for candidate in candidates:
+            candidate_normalized = normalize_entity(candidate)
+            if len(candidate_normalized.split()) > FUZZY_MAX_WORDS:
+                continue
+            matcher = difflib.SequenceMatcher(None, normalized, candidate_normalized)
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score >= best_score and _fuzzy_candidate(normalized, candidate_normalized, self.threshold):
+                best, best_score = candidate, score
+        return best
+
+    def resolve(self, name: str) -> str:
+        """
+        Return the canonical name for a value, registering it if it is new
+
+        Args:
+            name (str): Value as extracted
+
+        Returns:
+            str: Canonical name (the value itself, stripped, when it is new)
+        """
+        name = re.sub(r"\s+", " ", name or "").strip()
+        canonical = self.match(name)
+        if canonical is None:
+            self.add(name)
+            return name
+        if name not in self.aliases[canonical]:
+            self.aliases[canonical].append(name)
+            self._by_normalized.setdefault(normalize_entity(name), canonical)
+            self.changed.add(canonical)
+        return canonical
+
+    def resolve_all(self, names: Iterable[str]) -> List[str]:
+        """
+        Resolve values, dropping empty ones and duplicates, keeping order
+
+        Args:
+            names (Iterable[str]): Values as extracted
+
+        Returns:
+            list: Canonical names
+        """
+        return list(dict.fromkeys(filter(None, (self.resolve(name) for name in names if name))))
+
+    @classmethod
+    def from_graph(cls, neo4j_connection, label: str = "ITEM",
+                   threshold: float = ENTITY_MATCH_THRESHOLD) -> "EntityResolver":
+        """
+        Build a resolver over the names already stored under a label
+
+        Stored names are fetched as values are resolved, through the
+        full-text index (one indexed query per new value) rather than by
+        reading the whole label; where the index is missing the lookup falls
+        back to an exact name match.
+
+        Args:
+            neo4j_connection (Neo4jConnection): Connection to read with
+            label (str): Node label (one of graph_schema.FULLTEXT_LABELS)
+            threshold (float): Minimum similarity for a fuzzy match
+
+        Returns:
+            EntityResolver: Resolver whose canonical names are the stored ones
+        """
+        label = _checked(label)
+        search_query = f"""
+        CALL db.index.fulltext.queryNodes($index, $lucene_query, {{limit: $limit}}) YIELD node
+        WHERE node:{label} AND node.name IS NOT NULL
+        RETURN node.name AS name, node.aliases AS aliases
+        """
+        exact_query = f"MATCH (n:{label} {{ name: $name }}) RETURN n.name AS name, n.aliases AS aliases"
+
+        def lookup(name: str) -> List[Tuple[str, List[str]]]:
+            lucene_query = build_lucene_query(name, prefix=False, fuzzy=True, match_all=False)
+            records = None
+            if lucene_query:
+                records = neo4j_connection.query(
+                    search_query, {"index": FULLTEXT_INDEX, "lucene_query": lucene_query, "limit": CANDIDATE_LIMIT}
+                )
+            if records is None:
+                records = neo4j_connection.query(exact_query, {"name": name}) or []
+            return [(record["name"], record["aliases"] or []) for record in records]
+
+        return cls(threshold, lookup=lookup)
+
+
+def _checked(identifier: str) -> str:
+    if not _SAFE_IDENTIFIER.match(identifier):
+        raise ValueError(f"Invalid label or relationship type: {identifier!r}")
+    return identifier
+
+
+def write_aliases(neo4j_connection, label: str, resolver: EntityResolver) -> None:
+    """
+    Store the alias lists of canonical names that gained spellings
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        label (str): Node label
+        resolver (EntityResolver): Resolver used for the writes
+    """
+    rows = [{"name": name, "aliases": resolver.aliases[name]} for name in sorted(resolver.changed)]
+    if not rows:
+        return
+    query = f"""
+    UNWIND $rows AS row
+    MATCH (n:{_checked(label)} {{ name: row.name }})
+    SET n.aliases = row.aliases
+    """
+    neo4j_connection.write_transaction(query, {"rows": rows})
+    resolver.changed.clear()
+
+
+_CYPHER_NAME_PATTERN = re.compile(r"""(name\s*:\s*)(['"])((?:(?!\2).)*)\2""")
+
+
+def resolve_cypher_names(query: str, resolver: EntityResolver) -> str:
+    """
+    Replace the name literals of a generated Cypher query with canonical names
+
+    Args:
+        query (str): Generated Cypher query
+        resolver (EntityResolver): Resolver to canonicalize with
+
+    Returns:
+        str: Query writing to the canonical nodes
+    """
+    def replace(match):
+        canonical = resolver.resolve(match.group(3))
+        if not canonical or match.group(2) in canonical:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}{canonical}{match.group(2)}"
+
+    return _CYPHER_NAME_PATTERN.sub(replace, query)
+
+
+def _merge_node(neo4j_connection, label: str, duplicate: str, canonical: str, aliases: List[str]) -> None:
+    for direction in ("out", "in"):
+        pattern = "(d)-[r]->(m)" if direction == "out" else "(d)<-[r]-(m)"
+        query = f"MATCH (d:{label} {{ name: $duplicate }}) MATCH {pattern} RETURN DISTINCT type(r) AS type"
+        for record in neo4j_connection.query(query, {"duplicate": duplicate}) or []:
+            rel_type = _checked(record["type"])
+            merged = f"(c)-[n:{rel_type}]->(m)" if direction == "out" else f"(c)<-[n:{rel_type}]-(m)"
+            source = f"(d)-[r:{rel_type}]->(m)" if direction == "out" else f"(d)<-[r:{rel_type}]-(m)"
+            query = f"""
+            MATCH (d:{label} {{ name: $duplicate }}), (c:{label} {{ name: $canonical }})
+            MATCH {source}
+            WHERE m <> c AND m <> d
+            MERGE {merged}
+            SET n += properties(r)
+            """
+            neo4j_connection.write_transaction(query, {"duplicate": duplicate, "canonical": canonical})
+
+    query = f"""
+    MATCH (d:{label} {{ name: $duplicate }}), (c:{label} {{ name: $canonical }})
+    SET c.root_names = reduce(names = coalesce(c.root_names, []), name IN coalesce(d.root_names, []) |
+            CASE WHEN name IN names THEN names ELSE names + name END),
+        c.root_files = reduce(files = coalesce(c.root_files, []), file IN coalesce(d.root_files, []) |
+            CASE WHEN file IN files THEN files ELSE files + file END),
+        c.aliases = $aliases
+    DETACH DELETE d
+    """
+    neo4j_connection.write_transaction(
+        query, {"duplicate": duplicate, "canonical": canonical, "aliases": aliases}
+    )
+
+
+def deduplicate_graph(neo4j_connection, label: str = "ITEM", dry_run: bool = False,
+                      threshold: float = ENTITY_MATCH_THRESHOLD) -> dict:
+    """
+    Collapse duplicate nodes of a label that was ingested without resolution
+
+    The best connected spelling of each cluster becomes the canonical node;
+    the others' relationships, root pointers and spellings are moved onto it
+    before they are deleted.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        label (str): Node label
+        dry_run (bool): Only report the clusters
+        threshold (float): Minimum similarity for a fuzzy match
+
+    Returns:
+        dict: {canonical: [duplicates]} of the clusters found
+    """
+    label = _checked(label)
+    query = f"""
+    MATCH (n:{label})
+    WHERE n.name IS NOT NULL
+    OPTIONAL MATCH (n)-[r]-()
+    RETURN n.name AS name, n.aliases AS aliases, count(r) AS degree
+    ORDER BY degree DESC, name
+    """
+    resolver = EntityResolver(threshold)
+    clusters: Dict[str, List[str]] = {}
+    for record in neo4j_connection.query(query) or []:
+        name = record["name"]
+        canonical = resolver.match(name)
+        if canonical is None:
+            resolver.add(name, record["aliases"] or [])
+            continue
+        resolver.aliases[canonical] = list(dict.fromkeys(
+            resolver.aliases[canonical] + [name] + list(record["aliases"] or [])
+        ))
+        clusters.setdefault(canonical, []).append(name)
+
+    for canonical, duplicates in clusters.items():
+        print(f"{canonical} <- {', '.join(duplicates)}")
+        if dry_run:
+            continue
+        for duplicate in duplicates:
+            _merge_node(neo4j_connection, label, duplicate, canonical, resolver.aliases[canonical])
+
+    merged = sum(len(duplicates) for duplicates in clusters.values())
+    print(f"{'Found' if dry_run else 'Merged'} {merged} duplicate {label} nodes into {len(clusters)} canonical nodes")
+    return clusters
+
+
+if __name__ == "__main__":
+    from graph_backend import create_connection
+
+    parser = argparse.ArgumentParser(description="Collapse duplicate nodes of an existing graph")
+    parser.add_argument("--label", default="ITEM", help="Node label to deduplicate")
+    parser.add_argument("--threshold", type=float, default=ENTITY_MATCH_THRESHOLD,
+                        help="Minimum similarity for a fuzzy match")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the clusters")
+    args = parser.parse_args()
+
+    deduplicate_graph(create_connection(), args.label, args.dry_run, args.threshold)
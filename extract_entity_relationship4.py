@@ -1,14 +1,17 @@
 import os
-import PyPDF2
 
-from langchain_openai import ChatOpenAI
+from llm_cassette import get_chat_model
+from llm_accounting import accounted
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser, OutputFixingParser
-from langchain_core.exceptions import OutputParserException
+from langchain.output_parsers import PydanticOutputParser
+from output_repair import parse_llm_output
 from pydantic import BaseModel, Field
 
-from main import Neo4jConnection
-from neo4j import GraphDatabase
+from graph_backend import create_connection
+from pdf_text import extract_text_from_pdf
+from graph_schema import bootstrap_schema, stamp_root_pointers
+from skill_index import index_person_skills
+from entity_resolution import EntityResolver, write_aliases
 from enum import Enum
 
 from dotenv import load_dotenv
@@ -32,14 +35,6 @@ class ContentSchema(BaseModel):
     publications: list[str] = Field(default=[])
     personal_details: list[str] = Field(default=[])
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    full_text = ""
-    with open(pdf_path, "rb") as file:
-        reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            full_text += page.extract_text()
-    return full_text
-
 def get_all_nodes_and_relationships():
     """
     Example function to see what relationships exist.
@@ -47,37 +42,27 @@ def get_all_nodes_and_relationships():
     """
     query = """MATCH (n) OPTIONAL MATCH (n)-[r]-() RETURN DISTINCT n, r"""
 
-    NEO4J_URI = os.getenv("NEO4J_URI")
-    NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
-    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-
     nodes = []
     relationships = []
-    try:
-        with driver.session() as session:
-            result = session.run(query)
-            for record in result:
-                node = record["n"]
-                rel = record["r"]
-
-                if node and "name" in node._properties:
-                    nodes.append(node._properties["name"])
-                if rel is not None:
-                    relationships.append(rel.type)
-    finally:
-        driver.close()
+    for record in create_connection().stream(query):
+        node = record["n"]
+        rel = record["r"]
+
+        if node and "name" in node._properties:
+            nodes.append(node._properties["name"])
+        if rel is not None:
+            relationships.append(rel.type)
 
     return nodes, relationships
 
+@accounted("extract_entity_relationship4.process_document", summary="document")
 def process_document(pdf_path: str, doc_class: str):
 
     full_text = extract_text_from_pdf(pdf_path)
     
     all_nodes, all_relationships = get_all_nodes_and_relationships()
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.1)
+    llm = get_chat_model(model="gpt-4o", temperature=0.1)
     
     prompt_text = f"""
     You are a resume parser. Extract the person's name as root_entity_name,
@@ -98,11 +83,7 @@ def process_document(pdf_path: str, doc_class: str):
     response = chain.invoke({})
     response_content = response.content if hasattr(response, "content") else response
 
-    try:
-        parsed_response = parser.parse(response_content)
-    except OutputParserException:
-        new_parser = OutputFixingParser.from_llm(parser=parser, llm=llm)
-        parsed_response = new_parser.parse(response_content)
+    parsed_response = parse_llm_output(parser, response_content, llm)
 
     root_entity_name = parsed_response.root_entity_name
     extracted_skills = parsed_response.skills
@@ -124,7 +105,9 @@ def process_document(pdf_path: str, doc_class: str):
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-    neo4j_connection = Neo4jConnection(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    neo4j_connection = create_connection(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    bootstrap_schema(neo4j_connection)
+    resolver = EntityResolver.from_graph(neo4j_connection, "ITEM")
     
     query = f"""
     MERGE (r:RESUME {{ name: 'resume' }})
@@ -156,6 +139,7 @@ def process_document(pdf_path: str, doc_class: str):
     ]
 
     for (cat_label, cat_rel, items_list) in categories:
+        items_list = resolver.resolve_all(items_list)
         cat_node_name = cat_label.lower()
         query = f"""
         MERGE (c:{cat_label} {{ name: $cat_node_name }})
@@ -192,6 +176,12 @@ def process_document(pdf_path: str, doc_class: str):
                 {"cat_node_name": cat_node_name, "item_name": item},
             )
 
+        stamp_root_pointers(neo4j_connection, cat_label, [cat_node_name], root_entity_name, file_name)
+        stamp_root_pointers(neo4j_connection, "ITEM", items_list, root_entity_name, file_name)
+
+    write_aliases(neo4j_connection, "ITEM", resolver)
+    index_person_skills(neo4j_connection, root_entity_name, resolver.resolve_all(extracted_skills), file_name)
+
     print(f"Finished processing {file_name} into the Neo4j graph with a two-level structure.")
 
 if __name__ == "__main__":
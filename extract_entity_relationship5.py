@@ -1,14 +1,18 @@
 import os
-import PyPDF2
 
-from langchain_openai import ChatOpenAI
+from llm_cassette import get_chat_model
+from llm_accounting import accounted, call_site
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser, OutputFixingParser
-from langchain_core.exceptions import OutputParserException
+from langchain.output_parsers import PydanticOutputParser
+from output_repair import parse_llm_output
 from pydantic import BaseModel, Field
 
-from main import Neo4jConnection
-from neo4j import GraphDatabase
+from graph_backend import BatchWriteError, IncompleteWriteError, WriteCountingConnection, create_connection
+from pdf_text import extract_text_from_pdf
+from graph_schema import bootstrap_schema, stamp_root_pointers
+from skill_index import index_person_skills
+from entity_resolution import EntityResolver, write_aliases
+from streaming_extraction import BatchedGraphWriter, STREAMING_EXTRACTION, stream_completion
 from enum import Enum
 
 from dotenv import load_dotenv
@@ -32,14 +36,6 @@ class ContentSchema(BaseModel):
     publications: list[str] = Field(default=[])
     personal_details: list[str] = Field(default=[])
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    full_text = ""
-    with open(pdf_path, "rb") as file:
-        reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            full_text += page.extract_text()
-    return full_text
-
 def get_all_nodes_and_relationships():
     """
     Example function to see what relationships exist.
@@ -47,92 +43,53 @@ def get_all_nodes_and_relationships():
     """
     query = """MATCH (n) OPTIONAL MATCH (n)-[r]-() RETURN DISTINCT n, r"""
 
-    NEO4J_URI = os.getenv("NEO4J_URI")
-    NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
-    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-
     nodes = []
     relationships = []
-    try:
-        with driver.session() as session:
-            result = session.run(query)
-            for record in result:
-                node = record["n"]
-                rel = record["r"]
-
-                if node and "name" in node._properties:
-                    nodes.append(node._properties["name"])
-                if rel is not None:
-                    relationships.append(rel.type)
-    finally:
-        driver.close()
-
-    return nodes, relationships
-
-def process_document(pdf_path: str, doc_class: str):
-
-    full_text = extract_text_from_pdf(pdf_path)
-    
-    all_nodes, all_relationships = get_all_nodes_and_relationships()
+    for record in create_connection().stream(query):
+        node = record["n"]
+        rel = record["r"]
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.1)
-    
-    prompt_text = f"""
-    You are a resume parser. Extract the person's name as root_entity_name,
-    plus a list of skills, experience, education, certifications, publications,
-    and personal details from the resume below:
+        if node and "name" in node._properties:
+            nodes.append(node._properties["name"])
+        if rel is not None:
+            relationships.append(rel.type)
 
-    RESUME TEXT:
-    {full_text}
+    return nodes, relationships
 
-    Return JSON with fields:
-    root_entity_name, skills, experience, education, certifications,
-    publications, personal_details
+# ContentSchema list field -> (category label, relationship from the file).
+CATEGORIES = {
+    "skills": ("SKILLS", "HAS_SKILLS"),
+    "experience": ("EXPERIENCE", "HAS_EXPERIENCE"),
+    "education": ("EDUCATION", "HAS_EDUCATION"),
+    "certifications": ("CERTIFICATIONS", "HAS_CERTIFICATIONS"),
+    "publications": ("PUBLICATIONS", "HAS_PUBLICATIONS"),
+    "personal_details": ("PERSONAL_DETAILS", "HAS_PERSONAL_DETAILS"),
+}
+
+def item_query(cat_label: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MERGE (i:ITEM {{ name: row.item_name }})
+    WITH i, row
+    MATCH (c:{cat_label} {{ name: row.cat_node_name }})
+    MERGE (c)-[:HAS_VALUE]->(i)
     """
 
-    parser = PydanticOutputParser(pydantic_object=ContentSchema)
-    prompt = PromptTemplate(template=prompt_text)
-    chain = prompt | llm
-    response = chain.invoke({})
-    response_content = response.content if hasattr(response, "content") else response
-
-    try:
-        parsed_response = parser.parse(response_content)
-    except OutputParserException:
-        new_parser = OutputFixingParser.from_llm(parser=parser, llm=llm)
-        parsed_response = new_parser.parse(response_content)
-
-    root_entity_name = parsed_response.root_entity_name
-    extracted_skills = parsed_response.skills
-    extracted_experience = parsed_response.experience
-    extracted_education = parsed_response.education
-    extracted_certifications = parsed_response.certifications
-    extracted_publications = parsed_response.publications
-    extracted_personal_details = parsed_response.personal_details
-
-    print("Root entity name extracted:", root_entity_name)
-    print("Skills extracted:", extracted_skills)
-    print("Experience extracted:", extracted_experience)
-    print("Education extracted:", extracted_education)
-    print("Certifications extracted:", extracted_certifications)
-    print("Publications extracted:", extracted_publications)
-    print("Personal details extracted:", extracted_personal_details)
-
-    NEO4J_URI = os.getenv("NEO4J_URI")
-    NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
-    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+def write_document_nodes(neo4j_connection, file_name: str, root_entity_name: str) -> None:
+    """
+    Write the resume, file and per-person category nodes of one document
 
-    neo4j_connection = Neo4jConnection(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-    
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        file_name (str): Name of the source file
+        root_entity_name (str): Name of the person
+    """
     query = f"""
     MERGE (r:RESUME {{ name: 'resume' }})
     RETURN r
     """
     neo4j_connection.write_transaction(query)
 
-    file_name = os.path.basename(pdf_path)
     query = """
     MERGE (f:FILE {name: $file_name, root_entity_name: $root_entity_name})
     RETURN f
@@ -146,16 +103,7 @@ def process_document(pdf_path: str, doc_class: str):
     """
     neo4j_connection.write_transaction(query, {"file_name": file_name})
 
-    categories = [
-        ("SKILLS", "HAS_SKILLS", extracted_skills),
-        ("EXPERIENCE", "HAS_EXPERIENCE", extracted_experience),
-        ("EDUCATION", "HAS_EDUCATION", extracted_education),
-        ("CERTIFICATIONS", "HAS_CERTIFICATIONS", extracted_certifications),
-        ("PUBLICATIONS", "HAS_PUBLICATIONS", extracted_publications),
-        ("PERSONAL_DETAILS", "HAS_PERSONAL_DETAILS", extracted_personal_details)
-    ]
-
-    for (cat_label, cat_rel, items_list) in categories:
+    for cat_label, cat_rel in CATEGORIES.values():
         # Create unique category node names by prefixing with root_entity_name
         cat_node_name = f"{root_entity_name}_{cat_label.lower()}"
         query = f"""
@@ -175,23 +123,209 @@ def process_document(pdf_path: str, doc_class: str):
             {"file_name": file_name, "cat_node_name": cat_node_name},
         )
 
-        for item in items_list:
-            query = """
-            MERGE (i:ITEM { name: $item_name })
-            RETURN i
-            """
-            neo4j_connection.write_transaction(query, {"item_name": item})
-
-            query = f"""
-            MATCH (c:{cat_label} {{ name: $cat_node_name }}),
-                  (i:ITEM {{ name: $item_name }})
-            MERGE (c)-[:HAS_VALUE]->(i)
-            RETURN c, i
-            """
-            neo4j_connection.write_transaction(
-                query,
-                {"cat_node_name": cat_node_name, "item_name": item},
-            )
+def build_chain(full_text: str):
+    """
+    Build the extraction chain for one resume
+
+    Args:
+        full_text (str): Document text
+
+    Returns:
+        tuple: (prompt | llm chain, llm)
+    """
+    llm = get_chat_model(model="gpt-4o", temperature=0.1)
+
+    prompt_text = f"""
+    You are a resume parser. Extract the person's name as root_entity_name,
+    plus a list of skills, experience, education, certifications, publications,
+    and personal details from the resume below:
+
+    RESUME TEXT:
+    {full_text}
+
+    Return JSON with fields:
+    root_entity_name, skills, experience, education, certifications,
+    publications, personal_details
+    """
+
+    prompt = PromptTemplate(template=prompt_text)
+    return prompt | llm, llm
+
+class DocumentWriter:
+    def __init__(self, neo4j_connection, file_name: str):
+        """
+        Writes one resume's extraction, item by item as it becomes known
+
+        Items go through entity resolution and are written in UNWIND batches
+        by a background BatchedGraphWriter. Writes that do not commit are
+        counted and reported by finish, so a partly written document is not
+        taken for a written one.
+
+        Args:
+            neo4j_connection (Neo4jConnection): Connection to write with
+            file_name (str): Name of the source file
+        """
+        self.connection = WriteCountingConnection(neo4j_connection)
+        self.file_name = file_name
+        self.resolver = EntityResolver.from_graph(self.connection, "ITEM")
+        self.writer = BatchedGraphWriter(self.connection)
+        self.root_entity_name = None
+        self.pending = []
+        self.written = set()
+
+    def queue_item(self, field: str, item) -> None:
+        item = self.resolver.resolve(item) if isinstance(item, str) else None
+        if not item or (field, item) in self.written:
+            return
+        self.written.add((field, item))
+        cat_label, _ = CATEGORIES[field]
+        self.writer.add(item_query(cat_label), {
+            "cat_node_name": f"{self.root_entity_name}_{cat_label.lower()}",
+            "item_name": item,
+        })
+
+    def start_document(self, root_entity_name: str) -> None:
+        self.root_entity_name = root_entity_name
+        write_document_nodes(self.connection, self.file_name, root_entity_name)
+        for field, item in self.pending:
+            self.queue_item(field, item)
+        self.pending.clear()
+
+    def on_event(self, event: tuple) -> None:
+        """
+        Handle a StreamingJSONParser event
+
+        Args:
+            event (tuple): (kind, key, value)
+        """
+        kind, key, value = event
+        if kind == "field" and key == "root_entity_name" and value and self.root_entity_name is None:
+            self.start_document(str(value))
+        elif kind == "item" and key in CATEGORIES:
+            if self.root_entity_name is None:
+                self.pending.append((key, value))
+            else:
+                self.queue_item(key, value)
+
+    def finish(self, parsed_response: ContentSchema) -> str:
+        """
+        Write whatever is still missing from the final parse and the derived data
+
+        Args:
+            parsed_response (ContentSchema): Parsed extraction
+
+        Returns:
+            str: Root entity name the document was written under
+
+        Raises:
+            BatchWriteError: Some item batches did not commit; the document
+                has to be written again
+            IncompleteWriteError: Some other write transaction did not commit
+        """
+        try:
+            if self.root_entity_name is None:
+                self.start_document(parsed_response.root_entity_name)
+            # Anything the incremental parse missed is written from the final parse.
+            for field in CATEGORIES:
+                for item in getattr(parsed_response, field):
+                    self.queue_item(field, item)
+        finally:
+            self.writer.close()
+        if self.writer.batches_failed:
+            raise BatchWriteError(self.writer.batches_written + self.writer.batches_failed,
+                                  self.writer.batches_failed, self.writer.rows_failed)
+
+        root_entity_name = self.root_entity_name
+        for field, (cat_label, _) in CATEGORIES.items():
+            cat_node_name = f"{root_entity_name}_{cat_label.lower()}"
+            items_list = self.resolver.resolve_all(getattr(parsed_response, field))
+            stamp_root_pointers(self.connection, cat_label, [cat_node_name], root_entity_name, self.file_name)
+            stamp_root_pointers(self.connection, "ITEM", items_list, root_entity_name, self.file_name)
+
+        write_aliases(self.connection, "ITEM", self.resolver)
+        index_person_skills(self.connection, root_entity_name,
+                            self.resolver.resolve_all(parsed_response.skills), self.file_name)
+        if self.connection.failed:
+            raise IncompleteWriteError(f"{self.connection.failed} write transactions for "
+                                       f"{self.file_name} did not commit")
+        return root_entity_name
+
+def print_extraction(parsed_response: ContentSchema) -> None:
+    print("Root entity name extracted:", parsed_response.root_entity_name)
+    print("Skills extracted:", parsed_response.skills)
+    print("Experience extracted:", parsed_response.experience)
+    print("Education extracted:", parsed_response.education)
+    print("Certifications extracted:", parsed_response.certifications)
+    print("Publications extracted:", parsed_response.publications)
+    print("Personal details extracted:", parsed_response.personal_details)
+
+async def aextract_document(full_text: str) -> ContentSchema:
+    """
+    Extract one resume's content without blocking the event loop
+
+    Args:
+        full_text (str): Document text
+
+    Returns:
+        ContentSchema: Parsed extraction
+    """
+    with call_site("extract_entity_relationship5.aextract_document"):
+        chain, llm = build_chain(full_text)
+        response = await chain.ainvoke({})
+        response_content = response.content if hasattr(response, "content") else response
+        parser = PydanticOutputParser(pydantic_object=ContentSchema)
+        return parse_llm_output(parser, response_content, llm)
+
+def write_document(pdf_path: str, parsed_response: ContentSchema, neo4j_connection=None) -> str:
+    """
+    Write one parsed resume to the graph
+
+    Args:
+        pdf_path (str): Path of the source file
+        parsed_response (ContentSchema): Parsed extraction
+        neo4j_connection (Neo4jConnection): Connection to write with (optional)
+
+    Returns:
+        str: Root entity name
+
+    Raises:
+        BatchWriteError, IncompleteWriteError: Part of the document was not written
+    """
+    neo4j_connection = neo4j_connection or create_connection()
+    bootstrap_schema(neo4j_connection)
+    print_extraction(parsed_response)
+    return DocumentWriter(neo4j_connection, os.path.basename(pdf_path)).finish(parsed_response)
+
+@accounted("extract_entity_relationship5.process_document", summary="document")
+def process_document(pdf_path: str, doc_class: str, streaming: bool = STREAMING_EXTRACTION):
+
+    full_text = extract_text_from_pdf(pdf_path)
+    chain, llm = build_chain(full_text)
+    parser = PydanticOutputParser(pydantic_object=ContentSchema)
+
+    NEO4J_URI = os.getenv("NEO4J_URI")
+    NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
+    NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+    neo4j_connection = create_connection(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    bootstrap_schema(neo4j_connection)
+    file_name = os.path.basename(pdf_path)
+
+    # In streaming mode nodes are queued while the completion is still arriving.
+    document_writer = DocumentWriter(neo4j_connection, file_name)
+    try:
+        if streaming:
+            response_content = stream_completion(chain, {}, document_writer.on_event)
+        else:
+            response = chain.invoke({})
+            response_content = response.content if hasattr(response, "content") else response
+        parsed_response = parse_llm_output(parser, response_content, llm)
+    except Exception:
+        document_writer.writer.close()
+        raise
+
+    print_extraction(parsed_response)
+    root_entity_name = document_writer.finish(parsed_response)
 
     print(f"Finished processing {file_name} into the Neo4j graph with a person-specific structure for {root_entity_name}.")
 
@@ -1,14 +1,17 @@
 import os
-import PyPDF2
 
-from langchain_openai import ChatOpenAI
+from llm_cassette import get_chat_model
+from llm_accounting import accounted
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser, OutputFixingParser
-from langchain_core.exceptions import OutputParserException
+from langchain.output_parsers import PydanticOutputParser
+from output_repair import parse_llm_output
 from pydantic import BaseModel, Field
 
-from main import Neo4jConnection
-from neo4j import GraphDatabase
+from graph_backend import create_connection
+from relationship_registry import get_relationship_registry
+from pdf_text import extract_text_from_pdf
+from graph_schema import bootstrap_schema, stamp_root_pointers
+from skill_index import index_skills_from_graph
 from enum import Enum
 
 from dotenv import load_dotenv
@@ -26,52 +29,32 @@ class ContentSchema(BaseModel):
     cypher_queries: list[str] = Field(default=[], description="The list of cypher queries to create the knowledge graph")
     root_entity_name: str = Field(default='', description="The name of the root entity. For e.g 'Bob Smith', 'Robotics Article'")
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    full_text = ""
-    with open(pdf_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            full_text += page.extract_text()
-    return full_text
-    
 def get_all_nodes_and_relationships():
     query = """MATCH (n) OPTIONAL MATCH (n)-[r]-() RETURN DISTINCT n, r"""
     
-    NEO4J_URI = os.getenv('NEO4J_URI')
-    NEO4J_USERNAME = os.getenv('NEO4J_USERNAME')
-    NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
-    
-    driver = GraphDatabase.driver(
-        NEO4J_URI,
-        auth=(NEO4J_USERNAME, NEO4J_PASSWORD)
-    )
-    
     nodes = []
     relationships = []
     
-    try:
-        with driver.session() as session:
-            result = session.run(query)
-
-            for record in result:
-                node = record["n"]
-                rel = record["r"]
-                nodes.append(node._properties['name'])
-                if rel is not None:
-                    relationships.append(rel.type)
-    finally:
-        driver.close()
+    for record in create_connection().stream(query):
+        node = record["n"]
+        rel = record["r"]
+        nodes.append(node._properties['name'])
+        if rel is not None:
+            relationships.append(rel.type)
     
     return nodes, relationships
 
     
+@accounted("extract_entity_relationships.process_document", summary="document")
 def process_document(pdf_path: str, doc_class: str):
     
     full_text = extract_text_from_pdf(pdf_path)
     
-    all_nodes, all_relationships = get_all_nodes_and_relationships()
+    registry = get_relationship_registry()
+    if not registry.types:
+        registry.sync_from_graph(create_connection())
     
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.1)
+    llm = get_chat_model(model="gpt-4o", temperature=0.1)
     parser = PydanticOutputParser(pydantic_object=ContentSchema)
     
     template = """
@@ -285,18 +268,14 @@ def process_document(pdf_path: str, doc_class: str):
     prompt = PromptTemplate(template=template)
     chain = prompt | llm
     
-    response = chain.invoke({"text": full_text, "doc_class": doc_class, "all_relationships": all_relationships})
+    response = chain.invoke({"text": full_text, "doc_class": doc_class, "all_relationships": registry.format_vocabulary()})
     response_content = response.content if hasattr(response, 'content') else response
     
-    try:
-        parsed_response = parser.parse(response_content)
-    except OutputParserException:
-        new_parser = OutputFixingParser.from_llm(parser=parser, llm=llm)
-        parsed_response = new_parser.parse(response_content)
+    parsed_response = parse_llm_output(parser, response_content, llm)
     
     entities = parsed_response.entities
-    relationships = parsed_response.relationships
-    cypher_queries = parsed_response.cypher_queries
+    relationships = registry.normalize_all(parsed_response.relationships)
+    cypher_queries = [registry.rewrite_cypher(query) for query in parsed_response.cypher_queries]
     root_entity_name = parsed_response.root_entity_name
     
     print("Root entity name extracted:", root_entity_name)
@@ -308,7 +287,8 @@ def process_document(pdf_path: str, doc_class: str):
     NEO4J_USERNAME = os.getenv('NEO4J_USERNAME')
     NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
 
-    neo4j_connection = Neo4jConnection(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    neo4j_connection = create_connection(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+    bootstrap_schema(neo4j_connection)
 
     query = f"""MERGE (r:{doc_class} {{name: '{doc_class.lower()}'}}) RETURN r"""
     neo4j_connection.write_transaction(query)
@@ -328,6 +308,8 @@ def process_document(pdf_path: str, doc_class: str):
 
     for cypher_query in cypher_queries:
         neo4j_connection.write_transaction(cypher_query)
+    registry.register_cypher(cypher_queries)
+    registry.save()
 
     root_entity_query = """
         MATCH (b { name: $root_entity_name }), (f { name: $file_name })
@@ -340,6 +322,12 @@ def process_document(pdf_path: str, doc_class: str):
     }
     neo4j_connection.write_transaction(root_entity_query, root_entity_query_params)
 
+    stamp_root_pointers(
+        neo4j_connection, "Entity", [root_entity_name] + entities, root_entity_name, file_name
+    )
+    if doc_class == DocClass.RESUME.value:
+        index_skills_from_graph(neo4j_connection, root_entity_name, file_name)
+
     print(f"Finished processing {file_name} into the Neo4j graph.")
 
 if __name__ == "__main__":
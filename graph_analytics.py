@@ -0,0 +1,427 @@
+import argparse
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from graph_schema import SKILL_INDEX_LABEL
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+load_dotenv()
+
+# How often a cached analytics snapshot re-checks the graph version.
+GRAPH_ANALYTICS_CHECK_SECONDS = float(os.getenv("GRAPH_ANALYTICS_CHECK_SECONDS", "30"))
+# Weight of normalized PageRank when re-ranking retrieval candidates.
+GRAPH_RANK_WEIGHT = float(os.getenv("GRAPH_RANK_WEIGHT", "0.1"))
+PAGERANK_DAMPING = 0.85
+# Re-rank graph_rag's main-node candidates and graph_rag2's people by
+# centrality. Building the snapshot reads the whole graph on the first
+# question and again after every change in node or relationship count, so it
+# is off unless asked for.
+GRAPH_RANK_NODES = os.getenv("GRAPH_RANK_NODES", "0").strip().lower() in ("1", "true", "yes", "on")
+
+_cache: Dict[tuple, "GraphAnalytics"] = {}
+_cache_lock = threading.Lock()
+
+
+def graph_version(neo4j_connection) -> str:
+    """
+    Cheap fingerprint of the graph, read from Neo4j's count store
+
+    Writes that keep the node and relationship counts unchanged are not
+    detected; call invalidate_graph_analytics() after those.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to query with
+
+    Returns:
+        str: "<nodes>:<relationships>"
+    """
+    nodes = neo4j_connection.query("MATCH (n) RETURN count(n) AS count") or []
+    relationships = neo4j_connection.query("MATCH ()-[r]->() RETURN count(r) AS count") or []
+    return f"{nodes[0]['count'] if nodes else 0}:{relationships[0]['count'] if relationships else 0}"
+
+
+class GraphAnalytics:
+    def __init__(self, names: List[Optional[str]], labels: List[List[str]], edges: Iterable[tuple],
+                 version: str = "", roots: Optional[List[List[str]]] = None):
+        """
+        Structural scores of a graph snapshot held as a CSR adjacency matrix
+
+        Relationships are treated as undirected: in this graph a person points
+        at categories and categories at values, so following direction alone
+        would pool all PageRank on leaf values. Scores are vectorized with
+        SciPy when it is installed and computed over the same CSR arrays in
+        plain Python otherwise.
+
+        Args:
+            names (list): Node names, indexed by node position
+            labels (list): Node labels, indexed by node position
+            edges (Iterable[tuple]): (source position, target position) pairs
+            version (str): graph_version() the snapshot was taken at
+            roots (list): Root entities each node position was ingested for
+                (root_names, and root_entity_name on FILE nodes)
+        """
+        self.names = names
+        self.labels = labels
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.positions: Dict[str, List[int]] = {}
+        for position, name in enumerate(names):
+            if name is not None:
+                self.positions.setdefault(name, []).append(position)
+        self.roots: Dict[str, List[int]] = {}
+        for position, node_roots in enumerate(roots or []):
+            for root in dict.fromkeys(node_roots):
+                self.roots.setdefault(root, []).append(position)
+
+        size = len(names)
+        neighbours = [set() for _ in range(size)]
+        for source, target in edges:
+            if source != target:
+                neighbours[source].add(target)
+                neighbours[target].add(source)
+        self.indptr = [0]
+        self.indices = []
+        for adjacent in neighbours:
+            self.indices.extend(sorted(adjacent))
+            self.indptr.append(len(self.indices))
+
+        self.matrix = None
+        if sparse is not None:
+            self.matrix = sparse.csr_matrix(
+                (np.ones(len(self.indices)), np.array(self.indices, dtype=np.int64),
+                 np.array(self.indptr, dtype=np.int64)),
+                shape=(size, size),
+            )
+        self._degree = None
+        self._pagerank = None
+        self._reach: Dict[int, list] = {}
+
+    @classmethod
+    def from_graph(cls, neo4j_connection) -> "GraphAnalytics":
+        """
+        Load the adjacency of the whole graph (the skill index excluded, as
+        its shared skill nodes would rank people by how common their skills
+        are)
+
+        Args:
+            neo4j_connection (Neo4jConnection): Connection to read with
+
+        Returns:
+            GraphAnalytics: Snapshot at the current graph version
+        """
+        version = graph_version(neo4j_connection)
+        positions, names, labels, roots = {}, [], [], []
+        query = f"""
+        MATCH (n) WHERE NOT n:{SKILL_INDEX_LABEL}
+        RETURN elementId(n) AS id, n.name AS name, labels(n) AS labels,
+               n.root_names AS root_names, n.root_entity_name AS root_entity_name
+        """
+        for record in neo4j_connection.stream(query):
+            positions[record["id"]] = len(names)
+            names.append(record["name"])
+            labels.append(list(record["labels"]))
+            roots.append(list(record["root_names"] or []) +
+                         ([record["root_entity_name"]] if record["root_entity_name"] else []))
+
+        query = "MATCH (a)-[r]->(b) RETURN elementId(a) AS source, elementId(b) AS target"
+        edges = (
+            (positions[record["source"]], positions[record["target"]])
+            for record in neo4j_connection.stream(query)
+            if record["source"] in positions and record["target"] in positions
+        )
+        return cls(names, labels, edges, version, roots)
+
+    def _neighbours(self, position: int) -> list:
+        return self.indices[self.indptr[position]:self.indptr[position + 1]]
+
+    def degree(self) -> list:
+        """
+        Number of distinct neighbours of every node
+
+        Returns:
+            list: Degree per node position
+        """
+        if self._degree is None:
+            self._degree = [self.indptr[i + 1] - self.indptr[i] for i in range(len(self.names))]
+        return self._degree
+
+    def pagerank(self, damping: float = PAGERANK_DAMPING, tolerance: float = 1e-8,
+                 max_iterations: int = 100) -> list:
+        """
+        PageRank of every node by power iteration
+
+        Args:
+            damping (float): Probability of following an edge
+            tolerance (float): L1 change at which iteration stops
+            max_iterations (int): Iteration limit
+
+        Returns:
+            list: Scores per node position, summing to 1
+        """
+        if self._pagerank is not None:
+            return self._pagerank
+        size = len(self.names)
+        if not size:
+            self._pagerank = []
+            return self._pagerank
+        degree = self.degree()
+
+        if self.matrix is not None:
+            out_degree = np.array(degree, dtype=float)
+            dangling = out_degree == 0
+            inverse = np.divide(1.0, out_degree, out=np.zeros(size), where=~dangling)
+            ranks = np.full(size, 1.0 / size)
+            for _ in range(max_iterations):
+                spread = self.matrix.T @ (ranks * inverse)
+                updated = (1 - damping) / size + damping * (spread + ranks[dangling].sum() / size)
+                change = np.abs(updated - ranks).sum()
+                ranks = updated
+                if change < tolerance:
+                    break
+            self._pagerank = ranks.tolist()
+            return self._pagerank
+
+        ranks = [1.0 / size] * size
+        for _ in range(max_iterations):
+            dangling = sum(rank for rank, d in zip(ranks, degree) if d == 0)
+            base = (1 - damping) / size + damping * dangling / size
+            updated = [base] * size
+            for position, rank in enumerate(ranks):
+                if degree[position]:
+                    share = damping * rank / degree[position]
+                    for neighbour in self._neighbours(position):
+                        updated[neighbour] += share
+            change = sum(abs(new - old) for new, old in zip(updated, ranks))
+            ranks = updated
+            if change < tolerance:
+                break
+        self._pagerank = ranks
+        return self._pagerank
+
+    def reachable(self, positions: Iterable[int], hops: int) -> List[int]:
+        """
+        Nodes within a number of hops of some start nodes
+
+        Args:
+            positions (Iterable[int]): Start node positions
+            hops (int): Maximum path length
+
+        Returns:
+            list: Positions reached (start nodes excluded), nearest first
+        """
+        starts = list(positions)
+        if self.matrix is not None:
+            visited = np.zeros(len(self.names), dtype=bool)
+            visited[starts] = True
+            frontier = visited.astype(float)
+            reached = []
+            for _ in range(hops):
+                frontier = (self.matrix @ frontier > 0) & ~visited
+                if not frontier.any():
+                    break
+                reached.extend(np.flatnonzero(frontier).tolist())
+                visited |= frontier
+                frontier = frontier.astype(float)
+            return reached
+
+        visited = set(starts)
+        frontier = starts
+        reached = []
+        for _ in range(hops):
+            frontier = sorted({n for position in frontier for n in self._neighbours(position)} - visited)
+            if not frontier:
+                break
+            reached.extend(frontier)
+            visited.update(frontier)
+        return reached
+
+    def reach_counts(self, hops: int = 2) -> list:
+        """
+        How many nodes each node reaches within a number of hops
+
+        Args:
+            hops (int): Maximum path length; the cost grows quickly with it
+
+        Returns:
+            list: Count per node position
+        """
+        if hops not in self._reach:
+            if self.matrix is not None:
+                step = self.matrix + sparse.identity(len(self.names), format="csr")
+                within = step
+                for _ in range(hops - 1):
+                    within = (within @ step).sign()
+                self._reach[hops] = (within.getnnz(axis=1) - 1).tolist()
+            else:
+                self._reach[hops] = [len(self.reachable([position], hops)) for position in range(len(self.names))]
+        return self._reach[hops]
+
+    def scores(self, name: str) -> dict:
+        """
+        Ranking features of a node name (summed over nodes sharing the name)
+
+        Args:
+            name (str): Node name
+
+        Returns:
+            dict: degree, pagerank and two_hop_reach (all 0 for unknown names)
+        """
+        return {
+            "degree": self._summed(self.degree(), name),
+            "pagerank": self._summed(self.pagerank(), name),
+            "two_hop_reach": self._summed(self.reach_counts(2), name),
+        }
+
+    def _summed(self, values: list, name: str):
+        return sum(values[position] for position in self.positions.get(name, []))
+
+    def root_positions(self, name: str) -> List[int]:
+        """
+        Node positions that stand for a root entity such as a person
+
+        Besides nodes with the name, these are the nodes ingested for it (its
+        root pointers): a person-specific resume hangs off its FILE node and
+        the PERSON node only links to the skill index, so its subgraph is
+        what tells people apart. Nodes without relationships are left out
+        unless nothing else is found.
+
+        Args:
+            name (str): Root entity name
+
+        Returns:
+            list: Node positions
+        """
+        positions = self.positions.get(name, []) + self.roots.get(name, [])
+        degree = self.degree()
+        return [position for position in positions if degree[position]] or positions
+
+    def rank(self, names: Iterable[str]) -> List[str]:
+        """
+        Order names by PageRank, then degree; unknown names go last in input order
+
+        Args:
+            names (Iterable[str]): Node names
+
+        Returns:
+            list: The names, most central first
+        """
+        pagerank, degree = self.pagerank(), self.degree()
+        return sorted(dict.fromkeys(names),
+                      key=lambda name: (-self._summed(pagerank, name), -self._summed(degree, name)))
+
+    def neighbourhood(self, name: str, hops: int = 2) -> List[str]:
+        """
+        Names of the nodes within a number of hops of a node, for offline
+        multi-hop questions without a database round trip
+
+        Args:
+            name (str): Start node name
+            hops (int): Maximum path length
+
+        Returns:
+            list: Names reached, nearest first
+        """
+        reached = self.reachable(self.positions.get(name, []), hops)
+        return list(dict.fromkeys(self.names[p] for p in reached if self.names[p] is not None))
+
+
+def get_graph_analytics(neo4j_connection, check_seconds: float = GRAPH_ANALYTICS_CHECK_SECONDS) -> GraphAnalytics:
+    """
+    Return the cached analytics of a connection's graph, rebuilding them when
+    the graph version changed
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to read with
+        check_seconds (float): Reuse a snapshot without checking the version
+            for this long
+
+    Returns:
+        GraphAnalytics: Current snapshot
+    """
+    key = (getattr(neo4j_connection, "uri", None), getattr(neo4j_connection, "database", None))
+    with _cache_lock:
+        analytics = _cache.get(key)
+        if analytics is not None and time.monotonic() - analytics.checked_at < check_seconds:
+            return analytics
+        if analytics is not None and analytics.version == graph_version(neo4j_connection):
+            analytics.checked_at = time.monotonic()
+            return analytics
+        analytics = GraphAnalytics.from_graph(neo4j_connection)
+        _cache[key] = analytics
+        return analytics
+
+
+def invalidate_graph_analytics() -> None:
+    """
+    Drop every cached snapshot
+    """
+    with _cache_lock:
+        _cache.clear()
+
+
+def rerank(neo4j_connection, candidates: List[dict], key: str = "person", score: str = "relevance",
+           weight: float = GRAPH_RANK_WEIGHT) -> List[dict]:
+    """
+    Re-order retrieval candidates with graph centrality as an extra feature
+
+    Each candidate gains "pagerank" and "degree" fields, averaged over the
+    nodes of its subgraph (GraphAnalytics.root_positions) so a longer resume
+    does not count as a more central person, and is ordered by
+    score * (1 + weight * pagerank / highest pagerank among the candidates).
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to read with
+        candidates (list): Dicts with a node name under key and a score
+        key (str): Field holding the node name
+        score (str): Field holding the retrieval score
+        weight (float): Influence of centrality; 0 keeps the retrieval order
+
+    Returns:
+        list: The candidates, re-ordered
+    """
+    analytics = get_graph_analytics(neo4j_connection)
+    pagerank, degree = analytics.pagerank(), analytics.degree()
+    for candidate in candidates:
+        positions = analytics.root_positions(candidate[key])
+        size = max(len(positions), 1)
+        candidate["pagerank"] = sum(pagerank[position] for position in positions) / size
+        candidate["degree"] = sum(degree[position] for position in positions) / size
+    top = max((candidate["pagerank"] for candidate in candidates), default=0.0) or 1.0
+    return sorted(
+        candidates,
+        key=lambda candidate: -(candidate[score] or 0) * (1 + weight * candidate["pagerank"] / top),
+    )
+
+
+if __name__ == "__main__":
+    from graph_backend import create_connection
+
+    parser = argparse.ArgumentParser(description="Structural scores of the knowledge graph")
+    parser.add_argument("--top", type=int, default=20, help="Print the most central nodes")
+    parser.add_argument("--node", help="Print the scores and neighbourhood of one node")
+    parser.add_argument("--hops", type=int, default=2, help="Neighbourhood radius for --node")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    analytics = get_graph_analytics(create_connection())
+    pagerank = analytics.pagerank()
+    print(f"{len(analytics.names)} nodes, {len(analytics.indices) // 2} edges, "
+          f"{'scipy' if analytics.matrix is not None else 'pure Python'}, {time.perf_counter() - started:.2f}s")
+
+    if args.node:
+        print(args.node, analytics.scores(args.node))
+        print(f"Within {args.hops} hops:", ", ".join(analytics.neighbourhood(args.node, args.hops)))
+    else:
+        order = sorted(range(len(pagerank)), key=lambda position: -pagerank[position])
+        for position in order[:args.top]:
+            print(f"{pagerank[position]:.5f}  degree={analytics.degree()[position]:<4} "
+                  f"{'/'.join(analytics.labels[position])} {analytics.names[position]}")
@@ -0,0 +1,158 @@
+import os
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "neo4j" talks to the server through the pooled driver; "memory" runs the
+# same Cypher against an in-process graph (no server, for profiling and
+# offline runs).
+BACKENDS = ("neo4j", "memory")
+
+
+class BatchWriteError(RuntimeError):
+    def __init__(self, batches: int, failed: int, failed_rows: int):
+        """
+        Raised by write_batch once every batch was tried and some failed
+
+        Args:
+            batches (int): Transactions attempted
+            failed (int): Transactions that did not commit
+            failed_rows (int): Rows in the failed transactions
+        """
+        super().__init__(f"{failed} of {batches} write batches failed ({failed_rows} rows)")
+        self.batches = batches
+        self.failed = failed
+        self.failed_rows = failed_rows
+
+
+class IncompleteWriteError(RuntimeError):
+    """
+    Raised when some write transactions of one document did not commit
+    """
+
+
+class WriteCountingConnection:
+    def __init__(self, connection):
+        """
+        Connection wrapper that counts write transactions that did not commit
+
+        write_transaction and write_statements report a failure by returning
+        False; code that writes one document in many statements checks failed
+        at the end instead of checking every call. Everything else is passed
+        through.
+
+        Args:
+            connection: Connection from create_connection
+        """
+        self.connection = connection
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def write_transaction(self, *args, **kwargs) -> bool:
+        committed = self.connection.write_transaction(*args, **kwargs)
+        if not committed:
+            with self._lock:
+                self.failed += 1
+        return committed
+
+    def write_statements(self, *args, **kwargs) -> bool:
+        committed = self.connection.write_statements(*args, **kwargs)
+        if not committed:
+            with self._lock:
+                self.failed += 1
+        return committed
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+def get_backend() -> str:
+    """
+    Read the configured graph backend from GRAPH_BACKEND
+
+    Returns:
+        str: "neo4j" (default) or "memory"
+    """
+    backend = os.getenv("GRAPH_BACKEND", "neo4j").strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown GRAPH_BACKEND {backend!r}, expected one of {', '.join(BACKENDS)}")
+    return backend
+
+
+def create_connection(uri: Optional[str] = None, username: Optional[str] = None,
+                      password: Optional[str] = None, database: str = "neo4j",
+                      backend: Optional[str] = None):
+    """
+    Create a connection for the configured backend
+
+    Args:
+        uri (str): Neo4j URI (defaults to NEO4J_URI)
+        username (str): Neo4j username (defaults to NEO4J_USERNAME)
+        password (str): Neo4j password (defaults to NEO4J_PASSWORD)
+        database (str): Database name (default is "neo4j")
+        backend (str): Override GRAPH_BACKEND (optional)
+
+    Returns:
+        Neo4jConnection | InMemoryGraphConnection: Connection with the
+            query / write_transaction / write_batch / stream interface
+    """
+    uri = uri or os.getenv("NEO4J_URI")
+    username = username or os.getenv("NEO4J_USERNAME")
+    password = password or os.getenv("NEO4J_PASSWORD")
+
+    if (backend or get_backend()) == "memory":
+        from memory_graph import InMemoryGraphConnection
+        return InMemoryGraphConnection(uri, username, password, database)
+
+    from main import Neo4jConnection
+    return Neo4jConnection(uri, username, password, database)
+
+
+def create_async_connection(uri: Optional[str] = None, username: Optional[str] = None,
+                            password: Optional[str] = None, database: str = "neo4j",
+                            backend: Optional[str] = None):
+    """
+    Create an async connection for the configured backend
+
+    Args:
+        uri (str): Neo4j URI (defaults to NEO4J_URI)
+        username (str): Neo4j username (defaults to NEO4J_USERNAME)
+        password (str): Neo4j password (defaults to NEO4J_PASSWORD)
+        database (str): Database name (default is "neo4j")
+        backend (str): Override GRAPH_BACKEND (optional)
+
+    Returns:
+        AsyncNeo4jConnection | AsyncInMemoryGraphConnection: Async connection
+    """
+    uri = uri or os.getenv("NEO4J_URI")
+    username = username or os.getenv("NEO4J_USERNAME")
+    password = password or os.getenv("NEO4J_PASSWORD")
+
+    if (backend or get_backend()) == "memory":
+        from memory_graph import AsyncInMemoryGraphConnection
+        return AsyncInMemoryGraphConnection(uri, username, password, database)
+
+    from async_connection import AsyncNeo4jConnection
+    return AsyncNeo4jConnection(uri, username, password, database)
+
+
+def create_langchain_graph(connection=None, backend: Optional[str] = None):
+    """
+    Create the LangChain graph object GraphCypherQAChain queries
+
+    Args:
+        connection: Connection from create_connection (optional)
+        backend (str): Override GRAPH_BACKEND (optional)
+
+    Returns:
+        GraphStore: Neo4jGraph on the pooled driver, or InMemoryLangChainGraph
+    """
+    if (backend or get_backend()) == "memory":
+        from memory_langchain_graph import InMemoryLangChainGraph
+        return InMemoryLangChainGraph(connection or create_connection(backend="memory"))
+
+    from connection_manager import create_langchain_graph as create_neo4j_graph
+    return create_neo4j_graph(getattr(connection, "manager", None))
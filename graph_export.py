@@ -0,0 +1,275 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rows per UNWIND transaction when loading an export.
+GRAPH_IMPORT_BATCH_SIZE = int(os.getenv("GRAPH_IMPORT_BATCH_SIZE", "5000"))
+
+EXPORT_FORMAT = "knowledge-graph-jsonl"
+EXPORT_VERSION = 1
+
+# Temporary label and key that let relationships find the nodes created by
+# the same import; both are removed when the import finishes.
+_IMPORT_LABEL = "_Import"
+_IMPORT_KEY = "_import_id"
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _quoted(identifier: str) -> str:
+    return "`" + identifier.replace("`", "``") + "`"
+
+
+# Cypher functions that rebuild each temporal type from its ISO string.
+_TEMPORAL_FUNCTIONS = ("datetime", "localdatetime", "date", "time", "localtime", "duration")
+
+
+def _encode(value):
+    # json.dumps default: temporal values (neo4j.time or datetime types)
+    # become {"$<function>": iso string}, anything else its string.
+    kind = type(value).__name__.lower()
+    if kind in ("datetime", "time") and getattr(value, "tzinfo", None) is None:
+        kind = "local" + kind
+    if kind in _TEMPORAL_FUNCTIONS[:-1]:
+        return {"$" + kind: value.isoformat()}
+    if kind == "duration":
+        return {"$duration": value.iso_format()}
+    if kind == "timedelta":
+        return {"$duration": f"PT{value.total_seconds()}S"}
+    return str(value)
+
+
+def _temporal_function(value) -> Optional[str]:
+    if isinstance(value, dict) and len(value) == 1:
+        tag = next(iter(value))
+        if tag.startswith("$") and tag[1:] in _TEMPORAL_FUNCTIONS:
+            return tag[1:]
+    return None
+
+
+def _split_temporal(properties: dict) -> Tuple[dict, tuple, list]:
+    # Plain properties, the (key, function, is list) signature of the tagged
+    # temporal ones and their ISO strings in signature order.
+    plain, signature, values = {}, [], []
+    for key, value in properties.items():
+        items = value if isinstance(value, list) else [value]
+        function = _temporal_function(items[0]) if items else None
+        if function is None:
+            plain[key] = value
+            continue
+        signature.append((key, function, isinstance(value, list)))
+        isos = [next(iter(item.values())) for item in items]
+        values.append(isos if isinstance(value, list) else isos[0])
+    return plain, tuple(signature), values
+
+
+def _temporal_assignments(variable: str, signature: tuple) -> str:
+    assignments = []
+    for index, (key, function, is_list) in enumerate(signature):
+        value = f"row.temporal[{index}]"
+        value = f"[value IN {value} | {function}(value)]" if is_list else f"{function}({value})"
+        assignments.append(f", {variable}.{_quoted(key)} = {value}")
+    return "".join(assignments)
+
+
+def export_graph(neo4j_connection, path: str) -> dict:
+    """
+    Write every node and relationship of the graph to a line-delimited file
+
+    The first line is a header; then one ["n", id, labels, properties] line
+    per node and one ["r", source id, target id, type, properties] line per
+    relationship, with ids renumbered from 0. A ".gz" path is gzipped.
+    Temporal values are written as {"$datetime": iso string} (or $date,
+    $localdatetime, $time, $localtime, $duration) and restored with the
+    matching Cypher function on import.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to read from
+        path (str): Output file
+
+    Returns:
+        dict: nodes, relationships and seconds
+    """
+    started = time.perf_counter()
+    ids: Dict[str, int] = {}
+    relationships = 0
+    with _open(path, "w") as file:
+        header = {
+            "format": EXPORT_FORMAT,
+            "version": EXPORT_VERSION,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+        }
+        file.write(json.dumps(header) + "\n")
+
+        query = "MATCH (n) RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties"
+        for record in neo4j_connection.stream(query):
+            ids[record["id"]] = len(ids)
+            line = ["n", ids[record["id"]], sorted(record["labels"]), record["properties"]]
+            file.write(json.dumps(line, ensure_ascii=False, default=_encode, separators=(",", ":")) + "\n")
+
+        query = """
+        MATCH (a)-[r]->(b)
+        RETURN elementId(a) AS source, elementId(b) AS target, type(r) AS type, properties(r) AS properties
+        """
+        for record in neo4j_connection.stream(query):
+            line = ["r", ids[record["source"]], ids[record["target"]], record["type"], record["properties"]]
+            file.write(json.dumps(line, ensure_ascii=False, default=_encode, separators=(",", ":")) + "\n")
+            relationships += 1
+
+    result = {"nodes": len(ids), "relationships": relationships, "seconds": time.perf_counter() - started}
+    print(f"Exported {result['nodes']} nodes and {relationships} relationships to {path} "
+          f"in {result['seconds']:.2f}s")
+    return result
+
+
+def _node_query(key: Tuple[Tuple[str, ...], tuple]) -> str:
+    labels, signature = key
+    label_text = "".join(f":{_quoted(label)}" for label in labels)
+    return f"""
+    UNWIND $rows AS row
+    CREATE (n{label_text}:{_IMPORT_LABEL})
+    SET n += row.properties, n.{_IMPORT_KEY} = row.id{_temporal_assignments("n", signature)}
+    """
+
+
+def _relationship_query(key: Tuple[str, tuple]) -> str:
+    rel_type, signature = key
+    return f"""
+    UNWIND $rows AS row
+    MATCH (a:{_IMPORT_LABEL} {{ {_IMPORT_KEY}: row.source }})
+    MATCH (b:{_IMPORT_LABEL} {{ {_IMPORT_KEY}: row.target }})
+    CREATE (a)-[r:{_quoted(rel_type)}]->(b)
+    SET r += row.properties{_temporal_assignments("r", signature)}
+    """
+
+
+def import_graph(neo4j_connection, path: str, batch_size: int = GRAPH_IMPORT_BATCH_SIZE,
+                 clear: bool = False) -> dict:
+    """
+    Load an export_graph file with batched UNWIND writes
+
+    Nodes are created, not merged: import into an empty database (or pass
+    clear) to avoid duplicates.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        path (str): File written by export_graph
+        batch_size (int): Rows per transaction
+        clear (bool): Delete everything in the database first
+
+    Returns:
+        dict: nodes, relationships, transactions and seconds
+
+    Raises:
+        ValueError: If the file is not an export of this version
+        RuntimeError: If the temporary import label cannot be removed
+    """
+    from graph_schema import bootstrap_schema
+
+    started = time.perf_counter()
+    if clear:
+        neo4j_connection.write_transaction("MATCH (n) DETACH DELETE n")
+    neo4j_connection.write_transaction(
+        f"CREATE INDEX import_id IF NOT EXISTS FOR (n:{_IMPORT_LABEL}) ON (n.{_IMPORT_KEY})"
+    )
+
+    # Rows are grouped by label set (or type) and by which properties hold
+    # temporal values, as each group needs its own conversions.
+    nodes: Dict[tuple, List[dict]] = {}
+    edges: Dict[tuple, List[dict]] = {}
+    counts = {"nodes": 0, "relationships": 0, "transactions": 0}
+
+    def flush(pending: dict, query_for, kind: str) -> None:
+        for key, rows in pending.items():
+            if rows:
+                counts["transactions"] += neo4j_connection.write_batch(query_for(key), rows, batch_size)
+                counts[kind] += len(rows)
+        pending.clear()
+
+    with _open(path, "r") as file:
+        header = json.loads(file.readline())
+        if header.get("format") != EXPORT_FORMAT or header.get("version") != EXPORT_VERSION:
+            raise ValueError(f"{path} is not a version {EXPORT_VERSION} {EXPORT_FORMAT} export")
+
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry[0] == "n":
+                properties, signature, temporal = _split_temporal(entry[3])
+                key = (tuple(entry[2]), signature)
+                rows = nodes.setdefault(key, [])
+                rows.append({"id": entry[1], "properties": properties, "temporal": temporal})
+                if len(rows) >= batch_size:
+                    flush({key: rows}, _node_query, "nodes")
+                    nodes.pop(key)
+            else:
+                # Relationships follow all nodes, so every endpoint exists.
+                flush(nodes, _node_query, "nodes")
+                properties, signature, temporal = _split_temporal(entry[4])
+                key = (entry[3], signature)
+                rows = edges.setdefault(key, [])
+                rows.append({"source": entry[1], "target": entry[2], "properties": properties,
+                             "temporal": temporal})
+                if len(rows) >= batch_size:
+                    flush({key: rows}, _relationship_query, "relationships")
+                    edges.pop(key)
+        flush(nodes, _node_query, "nodes")
+        flush(edges, _relationship_query, "relationships")
+
+    remaining = f"MATCH (n:{_IMPORT_LABEL}) RETURN count(n) AS remaining"
+    cleanup = f"""
+    MATCH (n:{_IMPORT_LABEL})
+    WITH n LIMIT $batch_size
+    REMOVE n:{_IMPORT_LABEL}, n.{_IMPORT_KEY}
+    """
+    while True:
+        records = neo4j_connection.query(remaining)
+        if records is None:
+            raise RuntimeError(f"Could not count the nodes still labelled {_IMPORT_LABEL}")
+        if not records[0]["remaining"]:
+            break
+        if not neo4j_connection.write_transaction(cleanup, {"batch_size": batch_size}):
+            raise RuntimeError(f"Could not remove the {_IMPORT_LABEL} label from {records[0]['remaining']} "
+                               f"imported nodes")
+        counts["transactions"] += 1
+    neo4j_connection.write_transaction("DROP INDEX import_id IF EXISTS")
+    bootstrap_schema(neo4j_connection, force=True)
+
+    counts["seconds"] = time.perf_counter() - started
+    print(f"Imported {counts['nodes']} nodes and {counts['relationships']} relationships from {path} "
+          f"in {counts['transactions']} transactions, {counts['seconds']:.2f}s")
+    return counts
+
+
+if __name__ == "__main__":
+    from graph_backend import create_connection
+
+    parser = argparse.ArgumentParser(description="Export or seed the knowledge graph without re-running extraction")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Dump the graph to a .jsonl(.gz) file")
+    export_parser.add_argument("path", help="Output file; gzipped if it ends in .gz")
+    import_parser = commands.add_parser("import", help="Load a file written by export")
+    import_parser.add_argument("path", help="Export file")
+    import_parser.add_argument("--batch-size", type=int, default=GRAPH_IMPORT_BATCH_SIZE,
+                               help="Rows per UNWIND transaction")
+    import_parser.add_argument("--clear", action="store_true", help="Delete the existing graph first")
+    args = parser.parse_args()
+
+    connection = create_connection()
+    if args.command == "export":
+        export_graph(connection, args.path)
+    else:
+        import_graph(connection, args.path, args.batch_size, args.clear)
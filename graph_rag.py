@@ -5,13 +5,17 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from langchain.prompts import PromptTemplate
 from langchain_community.vectorstores import Neo4jVector
-from langchain_openai import ChatOpenAI
+from llm_cassette import get_chat_model
+from llm_accounting import accounted, call_site
 from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.graphs import Neo4jGraph
 from langchain_experimental.graph_transformers import LLMGraphTransformer
 from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
 from langchain_core.output_parsers import StrOutputParser
-from neo4j import GraphDatabase
+from graph_search import find_node_by_name
+from graph_backend import create_connection, create_langchain_graph
+from graph_schema import NAME_INDEXED_LABELS, UNIQUE_NAME_LABELS, bootstrap_schema
+from cypher_parameters import run_cypher
+from graph_analytics import GRAPH_RANK_NODES, get_graph_analytics
 import time
 
 load_dotenv()
@@ -34,104 +38,125 @@ def relationship_to_string(relationship):
     return f'(:{label1} {{name: "{name1}"}})-[:{rel_type}]->(:{label2} {{name: "{name2}"}})'
 
 def get_all_nodes_and_relationships(file_names_list):
-    with driver.session() as session:
-        nodes_list = []
-        relationships_list = []
-        node_properties = {}
+    nodes_list = []
+    relationships_list = []
+    node_properties = {}
+    
+    for file_name in file_names_list:
+        query = f"""MATCH (target:FILE {{ name: "{file_name}" }})
+                CALL apoc.path.subgraphAll(target, {{ maxLevel: 6 }}) YIELD nodes, relationships
+                RETURN nodes, relationships"""
+        print(f"Executing query for file: {file_name}")
+        result = neo4j_connection.stream(query)
         
-        for file_name in file_names_list:
-            query = f"""MATCH (target:FILE {{ name: "{file_name}" }})
-                    CALL apoc.path.subgraphAll(target, {{ maxLevel: 6 }}) YIELD nodes, relationships
-                    RETURN nodes, relationships"""
-            print(f"Executing query for file: {file_name}")
-            result = session.run(query)
-            
-            record_count = 0
-            for record in result:
-                record_count += 1
-                try:
-                    for node in record[0]:
-                        try:
-                            if "name" in node._properties:
-                                node_name = node._properties["name"]
-                                nodes_list.append(node_name)
-                                
-                                node_properties[node_name] = {
-                                    "labels": list(node.labels),
-                                    "properties": node._properties
-                                }
-                            else:
-                                print(f"Node without 'name' property found: {node._properties}")
-                                prop_str = str(next(iter(node._properties.values()))) if node._properties else "unnamed_node"
-                                nodes_list.append(prop_str)
-                                
-                                node_properties[prop_str] = {
-                                    "labels": list(node.labels),
-                                    "properties": node._properties
-                                }
-                        except Exception as e:
-                            print(f"Error accessing node properties: {e}")
-                    
-                    for rel in record[1]:
-                        try:
-                            rel_str = relationship_to_string(rel)
-                            relationships_list.append(rel_str)
-                        except Exception as e:
-                            print(f"Error converting relationship to string: {e}")
-                except Exception as e:
-                    print(f"Error processing record: {e}")
-            
-            if record_count == 0:
-                print(f"No records found for file: {file_name}")
+        record_count = 0
+        for record in result:
+            record_count += 1
+            try:
+                for node in record[0]:
+                    try:
+                        if "name" in node._properties:
+                            node_name = node._properties["name"]
+                            nodes_list.append(node_name)
+                            
+                            node_properties[node_name] = {
+                                "labels": list(node.labels),
+                                "properties": node._properties
+                            }
+                        else:
+                            print(f"Node without 'name' property found: {node._properties}")
+                            prop_str = str(next(iter(node._properties.values()))) if node._properties else "unnamed_node"
+                            nodes_list.append(prop_str)
+                            
+                            node_properties[prop_str] = {
+                                "labels": list(node.labels),
+                                "properties": node._properties
+                            }
+                    except Exception as e:
+                        print(f"Error accessing node properties: {e}")
                 
-                check_query = f"""MATCH (target:FILE {{ name: "{file_name}" }})
-                                RETURN target"""
-                check_result = session.run(check_query)
-                if not check_result.peek():
-                    print(f"File node with name '{file_name}' does not exist in database!")
-        
-        nodes_list = list(dict.fromkeys(nodes_list))
-        relationships_list = list(dict.fromkeys(relationships_list))
+                for rel in record[1]:
+                    try:
+                        rel_str = relationship_to_string(rel)
+                        relationships_list.append(rel_str)
+                    except Exception as e:
+                        print(f"Error converting relationship to string: {e}")
+            except Exception as e:
+                print(f"Error processing record: {e}")
         
-        print(f"Retrieved {len(nodes_list)} nodes and {len(relationships_list)} relationships")
-        return nodes_list, relationships_list, node_properties
+        if record_count == 0:
+            print(f"No records found for file: {file_name}")
+            
+            check_query = f"""MATCH (target:FILE {{ name: "{file_name}" }})
+                            RETURN target"""
+            if not neo4j_connection.query(check_query):
+                print(f"File node with name '{file_name}' does not exist in database!")
+    
+    nodes_list = list(dict.fromkeys(nodes_list))
+    relationships_list = list(dict.fromkeys(relationships_list))
+    
+    print(f"Retrieved {len(nodes_list)} nodes and {len(relationships_list)} relationships")
+    return nodes_list, relationships_list, node_properties
+
+# Exact-name lookup through the name index of each indexed label; an
+# unlabeled {name: ...} match would scan every node.
+_NODE_RELATIONSHIPS_QUERY = "\nUNION\n".join(
+    f"MATCH (n:{label} {{name: $node_name}})-[r]-(m) RETURN n, r, m"
+    for label in NAME_INDEXED_LABELS + UNIQUE_NAME_LABELS
+)
 
 def get_relationships_for_node(node_name):
-    query = """
-        MATCH (n {name: $node_name})-[r]-(m)
-        RETURN n, r, m
-    """
+    # Every node with exactly this name is matched (a skill can exist under
+    # several people); the full-text index only resolves names that differ in
+    # case or spacing when the exact match finds nothing.
+    records, relationships = _relationships_for_node(_NODE_RELATIONSHIPS_QUERY, {"node_name": node_name})
+    if not records:
+        hit = find_node_by_name(neo4j_connection, node_name)
+        if hit is not None:
+            records, relationships = _relationships_for_node(
+                """
+                    MATCH (n) WHERE elementId(n) = $node_id
+                    MATCH (n)-[r]-(m)
+                    RETURN n, r, m
+                """,
+                {"node_id": hit["id"]},
+            )
+    return records, relationships
+
+def _relationships_for_node(query, parameters):
     try:
-        with driver.session() as session:
-            result = session.run(query, node_name=node_name)
-            
-            records = []
-            relationships = []
-            for record in result:
-                records.append({
-                    "node": record["n"],
-                    "relationship": record["r"],
-                    "connected_node": record["m"]
-                })
-                relationships.append(record[1].type)
-            return records, relationships
+        records = []
+        relationships = []
+        for record in neo4j_connection.stream(query, parameters):
+            records.append({
+                "node": record["n"],
+                "relationship": record["r"],
+                "connected_node": record["m"]
+            })
+            relationships.append(record[1].type)
+        return records, relationships
     except Exception as e:
         print(f"Error connecting to Neo4j: {e}")
         print("Checking Neo4j connection...")
         try:
-            with driver.session() as test_session:
-                test_result = test_session.run("RETURN 1 AS test")
-                test_result.single()
-                print("Neo4j connection is working, but the specific query failed.")
+            if neo4j_connection.query("RETURN 1 AS test") is None:
+                raise ConnectionError("connectivity check returned no result")
+            print("Neo4j connection is working, but the specific query failed.")
         except Exception as conn_err:
             print(f"Neo4j connection test failed: {conn_err}")
             print("Please check that your Neo4j server is running and credentials are correct.")
         
         return [], []
     
+@accounted("graph_rag.extract_main_node_chain")
 def extract_main_node_chain(query, nodes, node_properties=None):
     
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
+    llm = get_chat_model(model="gpt-4o", temperature=0)
+    # Most central nodes first, so the prompt's 30-node window and the
+    # fallback match below prefer well-connected candidates (opt-in: the
+    # ranking snapshot loads the whole graph).
+    if GRAPH_RANK_NODES:
+        nodes = get_graph_analytics(neo4j_connection).rank(nodes)
     
     if node_properties:
         template = """You are a highly skilled assistant that specializes in extracting the main entity from a query.
@@ -176,8 +201,9 @@ def extract_main_node_chain(query, nodes, node_properties=None):
     
     return result
     
+@accounted("graph_rag.rephrase_query_chain")
 def rephrase_query_chain(query, main_node, connected_relationships, node_properties=None):
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
+    llm = get_chat_model(model="gpt-4o", temperature=0.2)
     
     template = """You are a knowledge graph query specialist that reformulates natural language questions into precise queries that can be executed against a graph database.
 
@@ -209,9 +235,10 @@ def rephrase_query_chain(query, main_node, connected_relationships, node_propert
     
     return chain.invoke({"main_node": main_node, "connected_relationships": connected_relationships, "query": query})
 
+@accounted("graph_rag.generate_optimized_cypher")
 def generate_optimized_cypher(query, schema, file_names_list):
     """Generate an optimized Cypher query based on the user query and schema"""
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.1)
+    llm = get_chat_model(model="gpt-4o", temperature=0.1)
     
     template = """
     You are a Neo4j Cypher expert. Generate the most efficient Cypher query to answer this question.
@@ -254,9 +281,10 @@ def generate_optimized_cypher(query, schema, file_names_list):
     
     return result
 
+@accounted("graph_rag.enrich_results_with_context")
 def enrich_results_with_context(results, node_properties):
     """Enrich query results with node context information"""
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.3)
+    llm = get_chat_model(model="gpt-4o", temperature=0.3)
     
     template = """
     You are an information synthesis expert. Enhance the following database query result with relevant context about the entities mentioned.
@@ -297,20 +325,13 @@ def enrich_results_with_context(results, node_properties):
     
     return enriched_result.content
 
-graph = Neo4jGraph(
-    url=os.getenv("NEO4J_URI"),
-    username=os.getenv("NEO4J_USERNAME"),
-    password=os.getenv("NEO4J_PASSWORD")
+neo4j_connection = create_connection(
+    os.getenv("NEO4J_URI"), os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD")
 )
+# Name lookups rely on the full-text index; creating it is a no-op once it exists.
+bootstrap_schema(neo4j_connection)
 
-driver = GraphDatabase.driver(
-    os.getenv("NEO4J_URI"),
-    auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
-)
-
-schema = graph.get_schema
-
-template = """
+CYPHER_GENERATION_TEMPLATE = """
 Task: Generate a Cypher statement to query the graph database.
 
 You will be given a rephrased query and a list of file names.
@@ -347,23 +368,7 @@ Rephrased Query: {query}
 Cypher Statement:
 """ 
 
-question_prompt = PromptTemplate(
-    template=template, 
-    input_variables=["schema", "query", "file_names_list"] 
-)
-
-llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
-
-qa = GraphCypherQAChain.from_llm(
-    llm=llm,
-    graph=graph,
-    cypher_prompt=question_prompt,
-    verbose=True,
-    allow_dangerous_requests=True,
-    return_intermediate_steps=True
-)
-
-file_names_list = [
+FILE_NAMES_LIST = [
     'Bob Smith 1.pdf',
     'Evan Patel 1.pdf',
     'Fatima_Kiyani.pdf',
@@ -374,14 +379,28 @@ file_names_list = [
     'Muhammad Faris Khan CV.pdf',
     'Raza Ali Poonja - Resume.pdf'
 ]
-list_of_all_nodes, list_of_all_relationships, node_properties = get_all_nodes_and_relationships(file_names_list)
 
-while True:
-    question = input("Enter a question: ")
-    
-    if question in ["/q", "/quit", "/exit", "/stop", "/end", "/close", "/bye", "/goodbye", "/byebye", "/goodbyebye", "/goodbyecya"]:
-        break
-    
+def build_qa_chain(graph):
+    """Build the GraphCypherQAChain used to answer rephrased questions"""
+    question_prompt = PromptTemplate(
+        template=CYPHER_GENERATION_TEMPLATE, 
+        input_variables=["schema", "query", "file_names_list"] 
+    )
+
+    llm = get_chat_model(model="gpt-4o", temperature=0.2)
+
+    return GraphCypherQAChain.from_llm(
+        llm=llm,
+        graph=graph,
+        cypher_prompt=question_prompt,
+        verbose=True,
+        allow_dangerous_requests=True,
+        return_intermediate_steps=True
+    )
+
+@accounted("graph_rag.answer_question", summary="question")
+def answer_question(question, qa, schema, file_names_list, list_of_all_nodes, node_properties, retries=3):
+    """Answer one question: main node -> neighbourhood -> rephrase -> Cypher QA -> enrich"""
     main_node = extract_main_node_chain(question, list_of_all_nodes, node_properties)
     print(f"Main entity identified: {main_node}")
     
@@ -395,13 +414,13 @@ while True:
     )
     print(f"Rephrased query: {rephrased_query.content}")
     
-    retries = 3
     for attempt in range(retries):
         try:
-            result = qa.invoke({
-                "query": rephrased_query.content, 
-                "file_names_list": file_names_list
-            })
+            with call_site("graph_rag.qa_chain"):
+                result = qa.invoke({
+                    "query": rephrased_query.content, 
+                    "file_names_list": file_names_list
+                })
             
             if not result["result"] or len(result["result"]) < 10:
                 custom_cypher = generate_optimized_cypher(
@@ -410,20 +429,38 @@ while True:
                     file_names_list
                 )
                 
-                with driver.session() as session:
-                    cypher_result = session.run(custom_cypher)
-                    result_data = [dict(record) for record in cypher_result]
-                    
-                    if result_data:
-                        result["result"] = str(result_data)
+                cypher_result = run_cypher(neo4j_connection, custom_cypher, write=False) or []
+                result_data = [dict(record.items()) for record in cypher_result]
+                
+                if result_data:
+                    result["result"] = str(result_data)
             
-            enriched_result = enrich_results_with_context(result["result"], node_properties)
-            print(enriched_result)
-            break
+            return enrich_results_with_context(result["result"], node_properties)
             
         except Exception as e:
             if attempt == retries - 1:
                 print(f"Failed after {retries} attempts. Error: {e}")
             else:
                 print(f"Attempt {attempt + 1} failed. Retrying...")
-                time.sleep(1)
\ No newline at end of file
+                time.sleep(1)
+    
+    return None
+
+if __name__ == "__main__":
+    graph = create_langchain_graph(neo4j_connection)
+    schema = graph.get_schema
+    qa = build_qa_chain(graph)
+    
+    list_of_all_nodes, list_of_all_relationships, node_properties = get_all_nodes_and_relationships(FILE_NAMES_LIST)
+    
+    while True:
+        question = input("Enter a question: ")
+        
+        if question in ["/q", "/quit", "/exit", "/stop", "/end", "/close", "/bye", "/goodbye", "/byebye", "/goodbyebye", "/goodbyecya"]:
+            break
+        
+        enriched_result = answer_question(
+            question, qa, schema, FILE_NAMES_LIST, list_of_all_nodes, node_properties
+        )
+        if enriched_result is not None:
+            print(enriched_result)
@@ -5,77 +5,56 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 from langchain.prompts import PromptTemplate
 from langchain_community.vectorstores import Neo4jVector
-from langchain_openai import ChatOpenAI
+from llm_cassette import get_chat_model
 from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.graphs import Neo4jGraph
 from langchain_experimental.graph_transformers import LLMGraphTransformer
 from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
 from langchain_core.output_parsers import StrOutputParser
-from neo4j import GraphDatabase
+from graph_search import iter_search_entities
+from skill_index import rank_people_for_skill
+from graph_analytics import GRAPH_RANK_NODES, rerank
+from graph_backend import create_connection
+from graph_schema import bootstrap_schema
 import time
 
 load_dotenv()
 
-graph = Neo4jGraph(
-    url=os.getenv("NEO4J_URI"),
-    username=os.getenv("NEO4J_USERNAME"),
-    password=os.getenv("NEO4J_PASSWORD")
-)
-
-driver = GraphDatabase.driver(
-    os.getenv("NEO4J_URI"),
-    auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
-)
-
 query = "Identify top three python engineers"
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
+llm = get_chat_model(model="gpt-4o", temperature=0)
 
 main_focus = "python"
+top_k = 3
 
-cql_query = """
-MATCH (n) 
-WHERE n.name =~ "(?i).*python.*" 
-RETURN n;
-"""
-all_python_related_nodes = []
-with driver.session() as session:
-    result = session.run(cql_query)
-    for record in result:
-        all_python_related_nodes.append(record)
-
-print(all_python_related_nodes)
-
-all_root_nodes = []
-for node in all_python_related_nodes:
-
-    node_name = node['n']._properties['name']
-    cql_query_roots = f"""
-    MATCH (n) 
-    WHERE n.name = "{node_name}"
-    MATCH (n)<-[*0..]-(root)
-    WHERE NOT ( ()-->(root) )
-    RETURN root
-    """
-
-    with driver.session() as session:
-        result = session.run(cql_query_roots)
-        for idx, record in enumerate(result):
-            if idx == 0:
-                all_root_nodes.append(record[0]._properties['name'])
-            else:
-                break
-
-print("\nAll root nodes for the Python-related nodes:")
-for node in all_root_nodes:
-    print(node)
-    
-root_node = input("Enter the root node: ")
-
-selected_all_python_related_nodes = []
-for idx, node in enumerate(all_python_related_nodes):
-    if all_root_nodes[idx] == root_node:
-        selected_all_python_related_nodes.append(node)
-
-print(selected_all_python_related_nodes)
-
+neo4j_connection = create_connection(
+    os.getenv("NEO4J_URI"), os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD")
+)
+# Skill and entity lookups rely on the schema's indexes; a no-op once they exist.
+bootstrap_schema(neo4j_connection)
+
+# Ranking reads the skill -> person index materialized at ingestion time, so
+# the answer comes from one indexed lookup with no root walk or user prompt.
+# With GRAPH_RANK_NODES a wider candidate set is re-ranked with graph
+# centrality as a feature (this loads the whole graph).
+if GRAPH_RANK_NODES:
+    top_people = rerank(neo4j_connection, rank_people_for_skill(neo4j_connection, main_focus, top_k=top_k * 3))[:top_k]
+else:
+    top_people = rank_people_for_skill(neo4j_connection, main_focus, top_k=top_k)
+
+print(f"\nTop {top_k} {main_focus} engineers:")
+for rank, person in enumerate(top_people, start=1):
+    centrality = f"pagerank: {person['pagerank']:.4f}, " if "pagerank" in person else ""
+    print(f"{rank}. {person['person']} (mentions: {person['mentions']}, "
+          f"relevance: {person['relevance']:.2f}, {centrality}"
+          f"skills: {', '.join(person['skills'])})")
+
+if not top_people:
+    # Graphs ingested before the skill index existed: list the candidates from
+    # the full-text index grouped by their root pointers instead.
+    all_python_related_nodes = list(iter_search_entities(neo4j_connection, main_focus))
+    for node in all_python_related_nodes:
+        if not node['root_names']:
+            print(f"No root pointer on '{node['name']}'; run graph_schema.backfill_root_pointers()")
+    print(f"\nNo skill index entries found. Roots with {main_focus}-related nodes:")
+    for root_name in dict.fromkeys(name for node in all_python_related_nodes for name in node['root_names']):
+        print(root_name)
@@ -0,0 +1,286 @@
+from typing import Iterable, Optional
+
+# Labels whose nodes are looked up by name during ingestion and querying.
+NAME_INDEXED_LABELS = ["Entity", "ITEM", "PERSON", "FILE"]
+# Labels whose names are unique; the constraint's backing index replaces the
+# plain name index these labels used to get.
+UNIQUE_NAME_LABELS = ["File"]
+
+# Lucene full-text index over entity names and resume item values.
+FULLTEXT_INDEX = "entity_name_fulltext"
+FULLTEXT_LABELS = ["Entity", "ITEM", "PERSON"]
+
+# Materialized skill -> person mapping maintained at ingestion time.
+SKILL_INDEX_LABEL = "SKILL_INDEX"
+SKILL_INDEX_REL = "HAS_SKILL_INDEX"
+SKILL_FULLTEXT_INDEX = "skill_name_fulltext"
+
+_bootstrapped = set()
+
+
+def bootstrap_schema(neo4j_connection, force: bool = False) -> None:
+    """
+    Create the indexes the ingestion and query code relies on
+
+    Runs once per connection target and process unless force is set. Every
+    statement uses IF NOT EXISTS, so re-running against an existing database
+    is harmless. Nodes that would break a uniqueness constraint (File nodes
+    uploaded twice before it existed) are merged first.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to run the DDL on
+        force (bool): Run even if this process already bootstrapped the target
+    """
+    key = (getattr(neo4j_connection, "uri", None), getattr(neo4j_connection, "database", None))
+    if key in _bootstrapped and not force:
+        return
+
+    for label in NAME_INDEXED_LABELS:
+        neo4j_connection.write_transaction(
+            f"CREATE INDEX {label.lower()}_name IF NOT EXISTS FOR (n:{label}) ON (n.name)"
+        )
+
+    for label in UNIQUE_NAME_LABELS:
+        _create_unique_name_constraint(neo4j_connection, label)
+
+    neo4j_connection.write_transaction(
+        f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} IF NOT EXISTS "
+        f"FOR (n:{'|'.join(FULLTEXT_LABELS)}) ON EACH [n.name]"
+    )
+
+    neo4j_connection.write_transaction(
+        f"CREATE CONSTRAINT skill_index_key IF NOT EXISTS "
+        f"FOR (s:{SKILL_INDEX_LABEL}) REQUIRE s.key IS UNIQUE"
+    )
+    neo4j_connection.write_transaction(
+        f"CREATE FULLTEXT INDEX {SKILL_FULLTEXT_INDEX} IF NOT EXISTS "
+        f"FOR (s:{SKILL_INDEX_LABEL}) ON EACH [s.name, s.alias_text]"
+    )
+
+    _bootstrapped.add(key)
+
+
+def merge_duplicate_names(neo4j_connection, label: str) -> int:
+    """
+    Collapse nodes of a label that share a name into one, before a
+    uniqueness constraint can be created
+
+    The first node of each name keeps its properties; the others'
+    relationships are moved onto it. Sections are kept once per section name
+    (the surviving node's own first), the rest are deleted. Each name is
+    merged in one transaction; a name whose transaction fails is left as it was.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        label (str): Node label
+
+    Returns:
+        int: Number of duplicate nodes removed
+    """
+    query = f"""
+    MATCH (n:{label}) WHERE n.name IS NOT NULL
+    WITH n.name AS name, collect(elementId(n)) AS ids
+    WHERE size(ids) > 1
+    RETURN name, ids
+    """
+    removed = 0
+    for record in neo4j_connection.query(query) or []:
+        keeper, duplicates = record["ids"][0], list(record["ids"][1:])
+        sections = neo4j_connection.query(
+            """
+            UNWIND $ids AS id
+            MATCH (f)-[:HAS_SECTION]->(s:Section) WHERE elementId(f) = id
+            RETURN id AS file, elementId(s) AS section, s.name AS name
+            """,
+            {"ids": [keeper] + duplicates},
+        ) or []
+        kept = {}
+        for section in sorted(sections, key=lambda row: row["file"] != keeper):
+            kept.setdefault(section["name"], section)
+        moved = [row["section"] for row in kept.values() if row["file"] != keeper]
+        dropped = [row["section"] for row in sections if kept[row["name"]] is not row]
+
+        statements = [
+            (
+                """
+                MATCH (k) WHERE elementId(k) = $keeper
+                UNWIND $ids AS id
+                MATCH (s) WHERE elementId(s) = id
+                MERGE (k)-[:HAS_SECTION]->(s)
+                """,
+                {"keeper": keeper, "ids": moved},
+            ),
+            ("UNWIND $ids AS id MATCH (s) WHERE elementId(s) = id DETACH DELETE s", {"ids": dropped}),
+        ]
+        for outgoing in (True, False):
+            pattern = "(d)-[r]->(m)" if outgoing else "(d)<-[r]-(m)"
+            types = neo4j_connection.query(
+                f"MATCH {pattern} WHERE elementId(d) IN $duplicates AND type(r) <> 'HAS_SECTION' "
+                f"RETURN DISTINCT type(r) AS type",
+                {"duplicates": duplicates},
+            ) or []
+            for row in types:
+                rel_type = "`" + row["type"].replace("`", "``") + "`"
+                merged = f"(k)-[n:{rel_type}]->(m)" if outgoing else f"(k)<-[n:{rel_type}]-(m)"
+                statements.append((
+                    f"""
+                    MATCH (k) WHERE elementId(k) = $keeper
+                    MATCH {pattern.replace("[r]", f"[r:{rel_type}]")} WHERE elementId(d) IN $duplicates AND m <> k
+                    MERGE {merged}
+                    SET n += properties(r)
+                    """,
+                    {"keeper": keeper, "duplicates": duplicates},
+                ))
+        statements.append(
+            ("UNWIND $ids AS id MATCH (d) WHERE elementId(d) = id DETACH DELETE d", {"ids": duplicates})
+        )
+        if not neo4j_connection.write_statements(statements):
+            print(f"Could not merge the duplicate {label} nodes named {record['name']!r}")
+            continue
+        removed += len(duplicates)
+        print(f"Merged {len(duplicates)} duplicate {label} nodes named {record['name']!r}")
+    return removed
+
+
+def _create_unique_name_constraint(neo4j_connection, label: str) -> None:
+    constraint_name = f"{label.lower()}_name_unique"
+    # Once the constraint exists there are no duplicates to merge, and the
+    # merge would scan the whole label on every bootstrap.
+    existing = neo4j_connection.query(
+        "SHOW CONSTRAINTS YIELD name WHERE name = $name RETURN name", {"name": constraint_name}
+    )
+    if existing:
+        return
+    merge_duplicate_names(neo4j_connection, label)
+
+    # The plain name index the label had before; found by schema because its
+    # name ("file_name") is shared with the FILE label's index.
+    records = neo4j_connection.query(
+        """
+        SHOW INDEXES YIELD name, labelsOrTypes, properties, owningConstraint
+        WHERE labelsOrTypes = [$label] AND properties = ['name'] AND owningConstraint IS NULL
+        RETURN name
+        """,
+        {"label": label},
+    ) or []
+    legacy = [record["name"] for record in records]
+
+    constraint = (f"CREATE CONSTRAINT {constraint_name} IF NOT EXISTS "
+                  f"FOR (n:{label}) REQUIRE n.name IS UNIQUE")
+    created = neo4j_connection.write_transaction(constraint)
+    if not created and legacy:
+        # Neo4j refuses a constraint over a schema a plain index already
+        # covers: swap them, and put the index back if the constraint fails.
+        for name in legacy:
+            neo4j_connection.write_transaction(f"DROP INDEX `{name}` IF EXISTS")
+        if not neo4j_connection.write_transaction(constraint):
+            neo4j_connection.write_transaction(
+                f"CREATE INDEX `{legacy[0]}` IF NOT EXISTS FOR (n:{label}) ON (n.name)"
+            )
+        return
+    if created:
+        for name in legacy:
+            neo4j_connection.write_transaction(f"DROP INDEX `{name}` IF EXISTS")
+
+
+def stamp_root_pointers(neo4j_connection, label: str, node_names: Iterable[str],
+                        root_name: str, file_name: str) -> None:
+    """
+    Record which root entity and file each node was ingested from
+
+    Nodes such as skills are shared between documents, so the pointers are
+    kept as de-duplicated lists in root_names and root_files.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        label (str): Label of the nodes to stamp
+        node_names (Iterable[str]): Names of the nodes to stamp
+        root_name (str): Name of the document's root entity
+        file_name (str): Name of the source file
+    """
+    names = [name for name in dict.fromkeys(node_names) if name]
+    if not names:
+        return
+
+    query = f"""
+    UNWIND $names AS name
+    MATCH (n:{label} {{ name: name }})
+    SET n.root_names = CASE
+            WHEN $root_name IN coalesce(n.root_names, []) THEN n.root_names
+            ELSE coalesce(n.root_names, []) + $root_name
+        END,
+        n.root_files = CASE
+            WHEN $file_name IN coalesce(n.root_files, []) THEN n.root_files
+            ELSE coalesce(n.root_files, []) + $file_name
+        END
+    """
+    neo4j_connection.write_transaction(
+        query, {"names": names, "root_name": root_name, "file_name": file_name}
+    )
+
+
+def lookup_roots(neo4j_connection, element_ids: list) -> dict:
+    """
+    Fetch the root pointers of many nodes in a single query
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to query with
+        element_ids (list): elementId() values of the candidate nodes
+
+    Returns:
+        dict: elementId -> {"name", "root_names", "root_files"}
+    """
+    if not element_ids:
+        return {}
+
+    query = """
+    UNWIND $ids AS id
+    MATCH (n) WHERE elementId(n) = id
+    RETURN id, n.name AS name,
+           coalesce(n.root_names, []) AS root_names,
+           coalesce(n.root_files, []) AS root_files
+    """
+    records = neo4j_connection.query(query, {"ids": list(element_ids)}) or []
+    return {
+        record["id"]: {
+            "name": record["name"],
+            "root_names": list(record["root_names"]),
+            "root_files": list(record["root_files"]),
+        }
+        for record in records
+    }
+
+
+def backfill_root_pointers(neo4j_connection, max_depth: int = 6,
+                           file_name: Optional[str] = None) -> None:
+    """
+    Stamp root pointers on a graph ingested before they were maintained
+
+    Walks outwards from each file's root entity (or from the file node itself
+    when the pipeline stored the root name on it) up to max_depth hops.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        max_depth (int): Maximum traversal depth from the root
+        file_name (str): Only backfill this file (optional)
+    """
+    query = f"""
+    MATCH (f)
+    WHERE (f:File OR f:FILE) AND ($file_name IS NULL OR f.name = $file_name)
+    OPTIONAL MATCH (root)-[:HAS_FILE]->(f)
+    WHERE NOT root:RESUME
+    WITH f, coalesce(root, f) AS start,
+         coalesce(root.name, f.root_entity_name, f.name) AS root_name
+    MATCH (start)-[*0..{int(max_depth)}]->(n)
+    WHERE n.name IS NOT NULL
+    WITH DISTINCT n, root_name, f.name AS file_name
+    SET n.root_names = CASE
+            WHEN root_name IN coalesce(n.root_names, []) THEN n.root_names
+            ELSE coalesce(n.root_names, []) + root_name
+        END,
+        n.root_files = CASE
+            WHEN file_name IN coalesce(n.root_files, []) THEN n.root_files
+            ELSE coalesce(n.root_files, []) + file_name
+        END
+    """
+    neo4j_connection.write_transaction(query, {"file_name": file_name})
@@ -0,0 +1,128 @@
+import re
+from typing import Optional
+
+from graph_schema import FULLTEXT_INDEX
+
+# Word characters only, so no Lucene operator can leak into the query and
+# terms line up with what the index's standard analyzer produced.
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+def build_lucene_query(text: str, prefix: bool = True, fuzzy: bool = False,
+                       match_all: bool = True) -> str:
+    """
+    Turn free text into a safe Lucene query string
+
+    Args:
+        text (str): User supplied search text, e.g. "python"
+        prefix (bool): Also match terms starting with each word ("pyth*")
+        fuzzy (bool): Allow one edit per term ("pyhton~1")
+        match_all (bool): Require every word (AND) instead of any word (OR)
+
+    Returns:
+        str: Lucene query, or "" when the text has no searchable terms
+    """
+    terms = []
+    for word in _TERM_PATTERN.findall(text.lower()):
+        if fuzzy:
+            terms.append(f"{word}~1")
+        elif prefix:
+            terms.append(f"({word} OR {word}*)")
+        else:
+            terms.append(word)
+
+    return f" {'AND' if match_all else 'OR'} ".join(terms)
+
+
+def search_entities(neo4j_connection, text: str, limit: int = 10, skip: int = 0,
+                    labels: Optional[list] = None, prefix: bool = True,
+                    fuzzy: bool = False, match_all: bool = True) -> list:
+    """
+    Search entity names and item values through the full-text index
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to query with
+        text (str): Free text to look for
+        limit (int): Page size
+        skip (int): Number of hits to skip (page offset)
+        labels (list): Only return nodes carrying one of these labels (optional)
+        prefix (bool): Also match terms starting with each word
+        fuzzy (bool): Allow one edit per term
+        match_all (bool): Require every word instead of any word
+
+    Returns:
+        list: Hits as dicts with id, name, labels, score, root_names and
+            root_files, best score first
+    """
+    lucene_query = build_lucene_query(text, prefix=prefix, fuzzy=fuzzy, match_all=match_all)
+    if not lucene_query:
+        return []
+
+    query = """
+    CALL db.index.fulltext.queryNodes($index, $lucene_query) YIELD node, score
+    WHERE $labels IS NULL OR any(label IN labels(node) WHERE label IN $labels)
+    RETURN elementId(node) AS id, node.name AS name, labels(node) AS labels, score,
+           coalesce(node.root_names, []) AS root_names,
+           coalesce(node.root_files, []) AS root_files
+    ORDER BY score DESC
+    SKIP $skip LIMIT $limit
+    """
+    parameters = {
+        "index": FULLTEXT_INDEX,
+        "lucene_query": lucene_query,
+        "labels": labels,
+        "skip": int(skip),
+        "limit": int(limit),
+    }
+    records = neo4j_connection.query(query, parameters) or []
+    return [
+        {
+            "id": record["id"],
+            "name": record["name"],
+            "labels": list(record["labels"]),
+            "score": record["score"],
+            "root_names": list(record["root_names"]),
+            "root_files": list(record["root_files"]),
+        }
+        for record in records
+    ]
+
+
+def iter_search_entities(neo4j_connection, text: str, page_size: int = 100, **kwargs):
+    """
+    Iterate over every full-text hit, one page at a time
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to query with
+        text (str): Free text to look for
+        page_size (int): Hits fetched per query
+        **kwargs: Extra arguments for search_entities
+
+    Yields:
+        dict: One hit at a time, best score first
+    """
+    skip = 0
+    while True:
+        page = search_entities(neo4j_connection, text, limit=page_size, skip=skip, **kwargs)
+        yield from page
+        if len(page) < page_size:
+            return
+        skip += page_size
+
+
+def find_node_by_name(neo4j_connection, name: str, labels: Optional[list] = None) -> Optional[dict]:
+    """
+    Resolve an exact node name through the full-text index
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to query with
+        name (str): Exact node name
+        labels (list): Only consider nodes carrying one of these labels (optional)
+
+    Returns:
+        dict: The matching hit, or None
+    """
+    for hit in search_entities(neo4j_connection, name, limit=25, labels=labels, prefix=False):
+        if hit["name"] == name:
+            return hit
+    return None
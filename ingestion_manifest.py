@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+INGESTION_MANIFEST_PATH = os.getenv("INGESTION_MANIFEST_PATH", "ingestion_manifest.sqlite3")
+
+# Document states in pipeline order. "writing" marks a document whose graph
+# write started but did not finish; it is written again from its stored
+# extraction on resume (the writes are MERGEs).
+STATUSES = ("pending", "parsed", "extracted", "writing", "written", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    pipeline TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    failed_stage TEXT,
+    error TEXT,
+    extraction TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (pipeline, content_hash)
+)
+"""
+
+
+def file_hash(path: str) -> str:
+    """
+    SHA-256 of a file's content, so a renamed file keeps its progress and an
+    edited one starts over
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    def __init__(self, path: str = INGESTION_MANIFEST_PATH, pipeline: str = "default"):
+        """
+        SQLite record of each document's progress through parse, extract and write
+
+        Extraction results are stored as soon as they arrive, so a restarted
+        job writes them without calling the LLM again. Safe to use from the
+        pipeline's worker threads.
+
+        Args:
+            path (str): SQLite database file
+            pipeline (str): Pipeline name; progress is tracked per pipeline
+        """
+        self.path = path
+        self.pipeline = pipeline
+        self._lock = threading.Lock()
+        self._hashes = {}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def content_hash(self, pdf_path: str) -> str:
+        try:
+            stat = os.stat(pdf_path)
+            key = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+            if key not in self._hashes:
+                self._hashes[key] = file_hash(pdf_path)
+            return self._hashes[key]
+        except OSError:
+            # A missing or unreadable file is tracked by its path, so its
+            # failure can still be recorded.
+            return f"path:{os.path.abspath(pdf_path)}"
+
+    def get(self, pdf_path: str) -> Optional[dict]:
+        """
+        Current manifest entry of a document
+
+        Args:
+            pdf_path (str): Document path
+
+        Returns:
+            dict: Row with status, failed_stage, error, extraction (decoded) and
+                attempts, or None for a document never seen
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM documents WHERE pipeline = ? AND content_hash = ?",
+                (self.pipeline, self.content_hash(pdf_path)),
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["extraction"] = json.loads(entry["extraction"]) if entry["extraction"] else None
+        return entry
+
+    def mark(self, pdf_path: str, status: str, error: Optional[str] = None,
+             extraction: Optional[dict] = None) -> None:
+        """
+        Move a document to a status ("failed" keeps the stage it failed in)
+
+        Args:
+            pdf_path (str): Document path
+            status (str): One of STATUSES, or the name of a failed stage with error set
+            error (str): Error message when a stage failed
+            extraction (dict): JSON-serializable extraction to store with the
+                status (the stored one is kept when None)
+        """
+        failed_stage = status if error else None
+        status = "failed" if error else status
+        if status not in STATUSES:
+            raise ValueError(f"Unknown manifest status {status!r}")
+        now = datetime.now(timezone.utc).isoformat()
+        data = json.dumps(extraction, ensure_ascii=False) if extraction is not None else None
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT INTO documents (pipeline, content_hash, path, status, failed_stage, error, extraction,
+                                       attempts, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (pipeline, content_hash) DO UPDATE SET
+                    path = excluded.path,
+                    status = excluded.status,
+                    failed_stage = excluded.failed_stage,
+                    error = excluded.error,
+                    extraction = coalesce(excluded.extraction, documents.extraction),
+                    attempts = documents.attempts + excluded.attempts,
+                    updated_at = excluded.updated_at
+                """,
+                (self.pipeline, self.content_hash(pdf_path), pdf_path, status, failed_stage, error, data,
+                 1 if status == "pending" else 0, now),
+            )
+
+    def save_extraction(self, pdf_path: str, extraction: dict) -> None:
+        """
+        Persist an extraction result and mark the document extracted, in one
+        statement so the status never points at a missing extraction
+
+        Args:
+            pdf_path (str): Document path
+            extraction (dict): JSON-serializable extraction
+        """
+        self.mark(pdf_path, "extracted", extraction=extraction)
+
+    def summary(self) -> dict:
+        """
+        Number of documents per status for this pipeline
+
+        Returns:
+            dict: {status: count}
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, count(*) AS documents FROM documents WHERE pipeline = ? GROUP BY status",
+                (self.pipeline,),
+            ).fetchall()
+        return {row["status"]: row["documents"] for row in rows}
@@ -0,0 +1,377 @@
+import argparse
+import asyncio
+import functools
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+from ingestion_manifest import INGESTION_MANIFEST_PATH, IngestionManifest
+from pdf_text import extract_text_from_pdf
+
+load_dotenv()
+
+# Stage concurrency: PDF parsing runs in a process pool, LLM extraction as
+# concurrent coroutines and graph writes in worker threads. Stages are joined
+# by bounded queues, so a slow stage makes the ones before it wait instead of
+# piling up parsed documents in memory.
+PIPELINE_PARSE_WORKERS = int(os.getenv("PIPELINE_PARSE_WORKERS", "0")) or (os.cpu_count() or 1)
+PIPELINE_LLM_CONCURRENCY = int(os.getenv("PIPELINE_LLM_CONCURRENCY", "4"))
+PIPELINE_WRITE_WORKERS = int(os.getenv("PIPELINE_WRITE_WORKERS", "2"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+
+# Pipelines whose module exposes aextract_document and write_document.
+STAGED_PIPELINES = ["extract_entity_relationship5"]
+
+
+class MeteredQueue:
+    def __init__(self, name: str, maxsize: int):
+        """
+        Bounded asyncio queue that tracks its depth over time
+
+        Args:
+            name (str): Queue name in the metrics
+            maxsize (int): Capacity; put() waits while the queue is full
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.queue = asyncio.Queue(maxsize)
+        self.max_depth = 0
+        self.blocked_put_seconds = 0.0
+        self._started = time.perf_counter()
+        self._last = self._started
+        self._depth = 0
+        self._depth_seconds = 0.0
+
+    def _sample(self) -> None:
+        now = time.perf_counter()
+        self._depth_seconds += self._depth * (now - self._last)
+        self._last = now
+        self._depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, self._depth)
+
+    async def put(self, item) -> None:
+        started = time.perf_counter()
+        await self.queue.put(item)
+        self.blocked_put_seconds += time.perf_counter() - started
+        self._sample()
+
+    async def get(self):
+        item = await self.queue.get()
+        self._sample()
+        return item
+
+    def metrics(self) -> dict:
+        """
+        Depth and backpressure metrics of the queue so far
+
+        Returns:
+            dict: maxsize, max_depth, mean_depth, fill (mean_depth / maxsize)
+                and blocked_put_seconds
+        """
+        self._sample()
+        elapsed = max(self._last - self._started, 1e-9)
+        mean_depth = self._depth_seconds / elapsed
+        return {
+            "maxsize": self.maxsize,
+            "max_depth": self.max_depth,
+            "mean_depth": mean_depth,
+            "fill": mean_depth / self.maxsize if self.maxsize else 0.0,
+            "blocked_put_seconds": self.blocked_put_seconds,
+        }
+
+
+class StageMetrics:
+    def __init__(self, name: str, workers: int):
+        """
+        Work counters of one pipeline stage
+
+        Args:
+            name (str): Stage name
+            workers (int): Concurrent workers of the stage
+        """
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def metrics(self, wall_seconds: float) -> dict:
+        """
+        Stage counters and utilization
+
+        Args:
+            wall_seconds (float): Pipeline wall-clock time
+
+        Returns:
+            dict: workers, processed, failed, busy_seconds and utilization
+                (busy time over the capacity of all workers)
+        """
+        capacity = wall_seconds * self.workers
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_seconds": self.busy_seconds,
+            "utilization": self.busy_seconds / capacity if capacity else 0.0,
+        }
+
+
+class IngestionPipeline:
+    def __init__(self, extract: Callable[[str], Awaitable], write: Callable[[str, object], object],
+                 parse: Callable[[str], str] = functools.partial(extract_text_from_pdf, workers=1),
+                 parse_workers: int = PIPELINE_PARSE_WORKERS,
+                 llm_concurrency: int = PIPELINE_LLM_CONCURRENCY,
+                 write_workers: int = PIPELINE_WRITE_WORKERS,
+                 queue_size: int = PIPELINE_QUEUE_SIZE,
+                 manifest: Optional[IngestionManifest] = None,
+                 dump: Callable[[object], dict] = None,
+                 load: Callable[[dict], object] = None):
+        """
+        Three-stage ingestion: parse PDFs -> extract with the LLM -> write the graph
+
+        With a manifest, documents already written are skipped and documents
+        with a stored extraction go straight to the write stage.
+
+        Args:
+            extract (Callable): Coroutine function taking the document text
+            write (Callable): Function taking (pdf_path, extraction), run in a thread
+            parse (Callable): Picklable function taking a PDF path, run in a process pool
+            parse_workers (int): Parsing processes
+            llm_concurrency (int): Extractions in flight
+            write_workers (int): Writer threads
+            queue_size (int): Capacity of each queue between stages
+            manifest (IngestionManifest): Progress record to resume from and update
+            dump (Callable): Turns an extraction into JSON-serializable data for the manifest
+            load (Callable): Rebuilds an extraction from its manifest data
+        """
+        self.extract = extract
+        self.write = write
+        self.parse = parse
+        self.parse_workers = max(1, parse_workers)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.write_workers = max(1, write_workers)
+        self.queue_size = max(1, queue_size)
+        self.manifest = manifest
+        self.dump = dump or (lambda extraction: extraction)
+        self.load = load or (lambda data: data)
+
+    async def run(self, pdf_paths: list) -> dict:
+        """
+        Ingest documents with all three stages running at once
+
+        A document that fails in a stage is recorded and skipped; the others
+        carry on.
+
+        Args:
+            pdf_paths (list): PDF files to ingest
+
+        Returns:
+            dict: wall_seconds, per-document outcomes (stage "skipped" for documents
+                the manifest shows as written), stage and queue metrics
+        """
+        loop = asyncio.get_running_loop()
+        parsed = MeteredQueue("parsed", self.queue_size)
+        extracted = MeteredQueue("extracted", self.queue_size)
+        stages = {
+            "parse": StageMetrics("parse", self.parse_workers),
+            "extract": StageMetrics("extract", self.llm_concurrency),
+            "write": StageMetrics("write", self.write_workers),
+        }
+        documents = {path: {"document": os.path.basename(path), "stage": None, "error": None}
+                     for path in pdf_paths}
+        pending_paths = iter(pdf_paths)
+        manifest = self.manifest
+
+        def failed(stage: str, path: str, error: Exception) -> None:
+            stages[stage].failed += 1
+            documents[path].update(stage=stage, error=f"{type(error).__name__}: {error}")
+            print(f"{stage} failed for {documents[path]['document']}: {error}")
+            if manifest:
+                try:
+                    manifest.mark(path, stage, documents[path]["error"])
+                except Exception as e:
+                    print(f"Could not record the failure of {documents[path]['document']}: {e}")
+
+        async def timed(stage: str, path: str, work: Awaitable):
+            started = time.perf_counter()
+            try:
+                result = await work
+                stages[stage].processed += 1
+                return result
+            except Exception as e:
+                failed(stage, path, e)
+                return None
+            finally:
+                stages[stage].busy_seconds += time.perf_counter() - started
+
+        async def resumed(path: str) -> bool:
+            entry = manifest.get(path) if manifest else None
+            if entry and entry["status"] == "written":
+                documents[path]["stage"] = "skipped"
+                return True
+            if entry and entry["extraction"] is not None:
+                print(f"Resuming {documents[path]['document']} from its stored extraction")
+                await extracted.put((path, self.load(entry["extraction"])))
+                return True
+            if manifest:
+                manifest.mark(path, "pending")
+            return False
+
+        # Manifest updates run inside timed(), so a failing update fails its
+        # document instead of the worker (which would leave the queues stuck).
+        async def parse_document(pool, path: str):
+            text = await loop.run_in_executor(pool, self.parse, path)
+            if manifest:
+                manifest.mark(path, "parsed")
+            return text
+
+        async def extract_document(path: str, text: str):
+            extraction = await self.extract(text)
+            if manifest:
+                manifest.save_extraction(path, self.dump(extraction))
+            return extraction
+
+        async def write_document(path: str, extraction) -> bool:
+            if manifest:
+                manifest.mark(path, "writing")
+            # write raises unless every statement committed; the failure
+            # keeps the stored extraction for the next run.
+            await asyncio.to_thread(self.write, path, extraction)
+            if manifest:
+                manifest.mark(path, "written")
+            return True
+
+        async def parse_worker(pool):
+            for path in pending_paths:
+                try:
+                    if await resumed(path):
+                        continue
+                except Exception as e:
+                    failed("parse", path, e)
+                    continue
+                text = await timed("parse", path, parse_document(pool, path))
+                if text is not None:
+                    await parsed.put((path, text))
+
+        async def extract_worker():
+            while (item := await parsed.get()) is not None:
+                path, text = item
+                extraction = await timed("extract", path, extract_document(path, text))
+                if extraction is not None:
+                    await extracted.put((path, extraction))
+
+        async def write_worker():
+            while (item := await extracted.get()) is not None:
+                path, extraction = item
+                await timed("write", path, write_document(path, extraction))
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            extractors = [asyncio.create_task(extract_worker()) for _ in range(self.llm_concurrency)]
+            writers = [asyncio.create_task(write_worker()) for _ in range(self.write_workers)]
+
+            await asyncio.gather(*(parse_worker(pool) for _ in range(self.parse_workers)))
+            for _ in extractors:
+                await parsed.put(None)
+            await asyncio.gather(*extractors)
+            for _ in writers:
+                await extracted.put(None)
+            await asyncio.gather(*writers)
+        wall_seconds = time.perf_counter() - started
+
+        return {
+            "documents": len(pdf_paths),
+            "failed": sum(1 for document in documents.values() if document["error"]),
+            "skipped": sum(1 for document in documents.values() if document["stage"] == "skipped"),
+            "wall_seconds": wall_seconds,
+            "stages": {name: stage.metrics(wall_seconds) for name, stage in stages.items()},
+            "queues": {queue.name: queue.metrics() for queue in (parsed, extracted)},
+            "per_document": list(documents.values()),
+        }
+
+
+def _dump_model(extraction) -> dict:
+    return extraction.model_dump() if hasattr(extraction, "model_dump") else extraction.dict()
+
+
+def ingest(pdf_paths: list, pipeline: str = "extract_entity_relationship5",
+           neo4j_connection=None, manifest_path: Optional[str] = INGESTION_MANIFEST_PATH,
+           **options) -> dict:
+    """
+    Run the staged pipeline of an extractor module over documents
+
+    Progress is recorded in the manifest, so running the same documents again
+    resumes where an interrupted run stopped.
+
+    Args:
+        pdf_paths (list): PDF files to ingest
+        pipeline (str): Module name from STAGED_PIPELINES
+        neo4j_connection: Connection the writers share (defaults to create_connection())
+        manifest_path (str): SQLite manifest file, or None to run without one
+        **options: IngestionPipeline concurrency / queue_size overrides
+
+    Returns:
+        dict: Run metrics, see IngestionPipeline.run
+    """
+    if pipeline not in STAGED_PIPELINES:
+        raise ValueError(f"Unknown staged pipeline {pipeline!r}, expected one of {', '.join(STAGED_PIPELINES)}")
+    module = importlib.import_module(pipeline)
+    if neo4j_connection is None:
+        from graph_backend import create_connection
+        neo4j_connection = create_connection()
+
+    def write(path: str, extraction) -> object:
+        return module.write_document(path, extraction, neo4j_connection)
+
+    schema = module.ContentSchema
+    manifest = IngestionManifest(manifest_path, pipeline) if manifest_path else None
+    try:
+        return asyncio.run(IngestionPipeline(
+            module.aextract_document, write, manifest=manifest, dump=_dump_model,
+            load=getattr(schema, "model_validate", None) or schema.parse_obj, **options,
+        ).run(pdf_paths))
+    finally:
+        if manifest:
+            manifest.close()
+
+
+def print_metrics(results: dict) -> None:
+    done = results["documents"] - results["failed"] - results["skipped"]
+    print(f"Ingested {done}/{results['documents']} documents in {results['wall_seconds']:.2f}s"
+          f" ({results['skipped']} already written)")
+    for name, stage in results["stages"].items():
+        print(f"  stage {name:<8} workers={stage['workers']:<3} processed={stage['processed']:<4} "
+              f"failed={stage['failed']:<3} busy={stage['busy_seconds']:.2f}s "
+              f"utilization={stage['utilization']:.0%}")
+    for name, queue in results["queues"].items():
+        print(f"  queue {name:<10} size={queue['maxsize']:<3} max_depth={queue['max_depth']:<3} "
+              f"mean_depth={queue['mean_depth']:.2f} blocked_put={queue['blocked_put_seconds']:.2f}s")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Ingest PDFs through the staged parse/extract/write pipeline")
+    parser.add_argument("pdf_paths", nargs="+", help="PDF files to ingest")
+    parser.add_argument("--pipeline", default=STAGED_PIPELINES[0], choices=STAGED_PIPELINES)
+    parser.add_argument("--parse-workers", type=int, default=PIPELINE_PARSE_WORKERS)
+    parser.add_argument("--llm-concurrency", type=int, default=PIPELINE_LLM_CONCURRENCY)
+    parser.add_argument("--write-workers", type=int, default=PIPELINE_WRITE_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE)
+    parser.add_argument("--manifest", default=INGESTION_MANIFEST_PATH,
+                        help="SQLite manifest used to resume interrupted runs")
+    parser.add_argument("--no-manifest", action="store_true", help="Ingest everything without tracking progress")
+    args = parser.parse_args(argv)
+
+    results = ingest(
+        args.pdf_paths, args.pipeline, manifest_path=None if args.no_manifest else args.manifest,
+        parse_workers=args.parse_workers, llm_concurrency=args.llm_concurrency,
+        write_workers=args.write_workers, queue_size=args.queue_size,
+    )
+    print_metrics(results)
+
+
+if __name__ == "__main__":
+    main()
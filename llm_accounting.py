@@ -0,0 +1,261 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+load_dotenv()
+
+# USD per million (prompt, completion) tokens. Versioned model names
+# ("gpt-4o-2024-08-06") are priced by their longest matching prefix; models
+# not listed here are counted but cost 0.
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+USAGE_SUMMARIES = os.getenv("LLM_USAGE_SUMMARIES", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Estimate the USD cost of one call from PRICES
+
+    Args:
+        model (str): Model name as reported by the provider
+        prompt_tokens (int): Prompt tokens
+        completion_tokens (int): Completion tokens
+
+    Returns:
+        float: Estimated cost in USD
+    """
+    matches = [name for name in PRICES if (model or "").startswith(name)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = PRICES[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class UsageLedger:
+    def __init__(self, label: str = ""):
+        """
+        Token, latency and cost records of the LLM calls made in a scope
+
+        Args:
+            label (str): Name shown in the summary ("document x.pdf", ...)
+        """
+        self.label = label
+        self.calls: List[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, call: dict) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def by_site(self) -> Dict[str, dict]:
+        """
+        Aggregate the recorded calls per call site
+
+        Returns:
+            dict: {site: {calls, errors, prompt_tokens, completion_tokens, seconds, cost}}
+        """
+        sites = {}
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            site = sites.setdefault(call["site"], {
+                "calls": 0, "errors": 0, "prompt_tokens": 0,
+                "completion_tokens": 0, "seconds": 0.0, "cost": 0.0,
+            })
+            site["calls"] += 1
+            site["errors"] += 1 if call["error"] else 0
+            site["prompt_tokens"] += call["prompt_tokens"]
+            site["completion_tokens"] += call["completion_tokens"]
+            site["seconds"] += call["seconds"]
+            site["cost"] += call["cost"]
+        return sites
+
+    def totals(self) -> dict:
+        """
+        Aggregate every recorded call
+
+        Returns:
+            dict: calls, errors, prompt_tokens, completion_tokens, seconds, cost
+        """
+        totals = {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0, "cost": 0.0}
+        for site in self.by_site().values():
+            for key in totals:
+                totals[key] += site[key]
+        return totals
+
+    def report(self) -> str:
+        """
+        Render the per-site summary, most expensive site first
+
+        Returns:
+            str: Multi-line summary
+        """
+        totals = self.totals()
+        lines = [
+            f"LLM usage for {self.label or 'run'}: {totals['calls']} calls, "
+            f"{totals['prompt_tokens']:,} prompt + {totals['completion_tokens']:,} completion tokens, "
+            f"{totals['seconds']:.2f}s, ${totals['cost']:.4f}"
+        ]
+        sites = sorted(self.by_site().items(), key=lambda item: (item[1]["cost"], item[1]["seconds"]), reverse=True)
+        for name, site in sites:
+            errors = f", {site['errors']} failed" if site["errors"] else ""
+            lines.append(
+                f"  {name:<40} {site['calls']:>3} calls{errors}  {site['prompt_tokens']:>8,} in  "
+                f"{site['completion_tokens']:>7,} out  {site['seconds']:>7.2f}s  ${site['cost']:.4f}"
+            )
+        return "\n".join(lines)
+
+
+# Process-wide ledger; usage_summary scopes add ledgers of their own on top.
+GLOBAL_LEDGER = UsageLedger("process")
+
+_call_site: ContextVar[str] = ContextVar("llm_call_site", default="unattributed")
+_ledgers: ContextVar[tuple] = ContextVar("llm_usage_ledgers", default=(GLOBAL_LEDGER,))
+
+
+def get_ledger() -> UsageLedger:
+    """
+    Return the innermost active ledger
+
+    Returns:
+        UsageLedger: Ledger of the current usage_summary scope, or GLOBAL_LEDGER
+    """
+    return _ledgers.get()[-1]
+
+
+@contextmanager
+def call_site(site: str):
+    """
+    Attribute the LLM calls made inside the block to site
+
+    Args:
+        site (str): Call site name, e.g. "graph_rag.rephrase_query_chain"
+    """
+    token = _call_site.set(site)
+    try:
+        yield
+    finally:
+        _call_site.reset(token)
+
+
+@contextmanager
+def usage_summary(label: str):
+    """
+    Collect the LLM calls made inside the block and print their summary
+
+    Args:
+        label (str): Summary title, e.g. "document resume.pdf"
+
+    Yields:
+        UsageLedger: Ledger of the block
+    """
+    ledger = UsageLedger(label)
+    token = _ledgers.set(_ledgers.get() + (ledger,))
+    try:
+        yield ledger
+    finally:
+        _ledgers.reset(token)
+        if USAGE_SUMMARIES and ledger.calls:
+            print(ledger.report())
+
+
+def accounted(site: str, summary: Optional[str] = None, label_arg: int = 0):
+    """
+    Decorator form of call_site, optionally wrapped in usage_summary
+
+    Args:
+        site (str): Call site name
+        summary (str): Summary kind ("document", "question"); no summary if None
+        label_arg (int): Positional argument appended to the summary title
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with call_site(site):
+                if summary is None:
+                    return function(*args, **kwargs)
+                label = f"{summary} {args[label_arg]}" if len(args) > label_arg else summary
+                with usage_summary(label):
+                    return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class AccountingCallbackHandler(BaseCallbackHandler):
+    """Records tokens, latency and cost of every call of the model it is attached to"""
+
+    def __init__(self, model: str = ""):
+        self.model = model
+        self._runs: Dict[Any, dict] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, prompt_text: str, kwargs: dict) -> None:
+        params = kwargs.get("invocation_params") or {}
+        with self._lock:
+            self._runs[run_id] = {
+                "site": _call_site.get(),
+                "ledgers": _ledgers.get(),
+                "model": params.get("model_name") or params.get("model") or self.model,
+                "prompt_text": prompt_text,
+                "started": time.perf_counter(),
+            }
+
+    def _finish(self, run_id, prompt_tokens: int, completion_tokens: int, model: Optional[str], error: bool) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model = model or run["model"]
+        call = {
+            "site": run["site"],
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "seconds": time.perf_counter() - run["started"],
+            "cost": estimate_cost(model, prompt_tokens, completion_tokens),
+            "error": error,
+        }
+        for ledger in run["ledgers"]:
+            ledger.record(call)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id, "".join(str(m.content) for batch in messages for m in batch), kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id, "".join(prompts), kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        output = response.llm_output or {}
+        usage = output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+
+        generations = [generation for batch in response.generations for generation in batch]
+        if prompt_tokens is None or completion_tokens is None:
+            metadata = [getattr(getattr(g, "message", None), "usage_metadata", None) or {} for g in generations]
+            if any(metadata):
+                prompt_tokens = sum(m.get("input_tokens", 0) for m in metadata)
+                completion_tokens = sum(m.get("output_tokens", 0) for m in metadata)
+        if prompt_tokens is None or completion_tokens is None:
+            from llm_cassette import count_tokens
+            with self._lock:
+                run = self._runs.get(run_id) or {}
+            model = run.get("model") or "gpt-4o"
+            prompt_tokens = count_tokens(run.get("prompt_text", ""), model)
+            completion_tokens = sum(count_tokens(g.text, model) for g in generations)
+
+        self._finish(run_id, prompt_tokens, completion_tokens, output.get("model_name"), error=False)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._finish(run_id, 0, 0, None, error=True)
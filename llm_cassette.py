@@ -0,0 +1,337 @@
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Optional, List, Dict
+
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from llm_accounting import AccountingCallbackHandler
+
+load_dotenv()
+
+# "off" calls OpenAI directly, "record" calls it only for prompts missing
+# from the cassette and stores the answer, "replay" never touches the network.
+MODES = ("off", "record", "replay")
+DEFAULT_CASSETTE_PATH = os.path.join("cassettes", "llm.json.gz")
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode for a prompt the cassette has no answer for"""
+
+
+_encodings: Dict[str, Any] = {}
+
+
+def _encoding(model: str):
+    # tiktoken downloads an encoding on first use; offline (or behind a proxy)
+    # that fails, so fall back to one already loaded or to estimating.
+    if model not in _encodings:
+        import tiktoken
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("cl100k_base")
+        except (OSError, ValueError) as e:
+            print(f"Could not load the tiktoken encoding for {model}: {e}; estimating token counts")
+            _encodings[model] = next((encoding for encoding in _encodings.values() if encoding), None)
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """
+    Count tokens with tiktoken, or estimate them when it is not installed or
+    its encoding cannot be downloaded
+
+    Args:
+        text (str): Prompt or completion text
+        model (str): Model whose encoding to use
+
+    Returns:
+        int: Token count
+    """
+    try:
+        encoding = _encoding(model)
+    except ImportError:
+        encoding = None
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+class LatencyModel:
+    def __init__(self, spec: str = "none", seed: int = 0):
+        """
+        Simulated response latency for replayed calls
+
+        Samples are derived from (seed, prompt key, call number), so a run
+        sees the same delays regardless of how calls interleave.
+
+        Args:
+            spec (str): "none", "fixed:S", "uniform:MIN,MAX", "normal:MEAN,STD",
+                "lognormal:MU,SIGMA" or "recorded[:SCALE]" (seconds)
+            seed (int): Seed for the latency samples
+        """
+        self.spec = spec
+        self.seed = seed
+        kind, _, arguments = (spec or "none").partition(":")
+        self.kind = kind.strip().lower()
+        self.arguments = [float(value) for value in arguments.split(",") if value.strip()]
+        expected = {"none": 0, "fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if self.kind == "recorded":
+            self.arguments = self.arguments or [1.0]
+        elif self.kind not in expected or len(self.arguments) != expected[self.kind]:
+            raise ValueError(f"Invalid latency spec {spec!r}")
+
+    def sample(self, key: str, call_index: int, recorded: Optional[float] = None) -> float:
+        """
+        Delay in seconds for one replayed call
+
+        Args:
+            key (str): Cassette key of the prompt
+            call_index (int): How many times this key was replayed before
+            recorded (float): Latency observed when the call was recorded
+
+        Returns:
+            float: Non-negative delay
+        """
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "recorded":
+            return max(0.0, (recorded or 0.0) * self.arguments[0])
+        rng = random.Random(f"{self.seed}:{key}:{call_index}")
+        if self.kind == "fixed":
+            return self.arguments[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.arguments)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.arguments))
+        return rng.lognormvariate(*self.arguments)
+
+
+class Cassette:
+    def __init__(self, path: str):
+        """
+        Gzipped JSON store of prompt -> response interactions
+
+        Args:
+            path (str): Cassette file, created on the first save
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.interactions: Dict[str, dict] = {}
+        self.replays: Dict[str, int] = {}
+        self.dirty = False
+        self.stats = {
+            "calls": 0, "hits": 0, "misses": 0, "recorded": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "simulated_latency_seconds": 0.0,
+        }
+        if os.path.exists(path):
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                self.interactions = json.load(file).get("interactions", {})
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock:
+            return self.interactions.get(key)
+
+    def put(self, key: str, entry: dict) -> None:
+        with self.lock:
+            self.interactions[key] = entry
+            self.stats["recorded"] += 1
+            self.dirty = True
+
+    def next_call_index(self, key: str) -> int:
+        with self.lock:
+            index = self.replays.get(key, 0)
+            self.replays[key] = index + 1
+            return index
+
+    def count(self, entry: dict, hit: bool, latency: float = 0.0) -> None:
+        with self.lock:
+            self.stats["calls"] += 1
+            self.stats["hits" if hit else "misses"] += 1
+            self.stats["prompt_tokens"] += entry.get("prompt_tokens", 0)
+            self.stats["completion_tokens"] += entry.get("completion_tokens", 0)
+            self.stats["simulated_latency_seconds"] += latency
+
+    def save(self) -> None:
+        """
+        Write the cassette if new interactions were recorded
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with gzip.open(temporary, "wt", encoding="utf-8") as file:
+                json.dump({"version": 1, "interactions": self.interactions}, file,
+                          separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+            os.replace(temporary, self.path)
+            self.dirty = False
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: Optional[str] = None) -> Cassette:
+    """
+    Return the process-wide cassette for a file (defaults to LLM_CASSETTE_PATH)
+    """
+    path = os.path.abspath(path or os.getenv("LLM_CASSETTE_PATH", DEFAULT_CASSETTE_PATH))
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+def save_cassettes() -> None:
+    with _cassettes_lock:
+        cassettes = list(_cassettes.values())
+    for cassette in cassettes:
+        cassette.save()
+
+
+atexit.register(save_cassettes)
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records and replays another chat model's answers"""
+
+    model_name: str = "gpt-4o"
+    temperature: float = 0.0
+    mode: str = "replay"
+    cassette: Any
+    latency: Any
+    inner: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name, "temperature": self.temperature, "mode": self.mode}
+
+    def cassette_key(self, messages, stop: Optional[List[str]] = None) -> str:
+        payload = json.dumps(
+            [self.model_name, self.temperature, stop or [], [(m.type, m.content) for m in messages]],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_from_response(self, messages, response, seconds: float) -> dict:
+        usage = getattr(response, "usage_metadata", None) or {}
+        prompt_text = "".join(str(m.content) for m in messages)
+        return {
+            "model": self.model_name,
+            "response": response.content,
+            "prompt_tokens": usage.get("input_tokens") or count_tokens(prompt_text, self.model_name),
+            "completion_tokens": usage.get("output_tokens") or count_tokens(response.content, self.model_name),
+            "latency": seconds,
+        }
+
+    def _lookup(self, key: str):
+        entry = self.cassette.get(key)
+        if entry is None and (self.mode == "replay" or self.inner is None):
+            raise CassetteMiss(
+                f"No cassette entry for prompt {key[:12]} in {self.cassette.path}; "
+                f"record it with LLM_CASSETTE_MODE=record"
+            )
+        return entry
+
+    @staticmethod
+    def _result(entry: dict) -> ChatResult:
+        message = AIMessage(content=entry["response"])
+        return ChatResult(generations=[ChatGeneration(message=message)],
+                          llm_output={"token_usage": {"prompt_tokens": entry["prompt_tokens"],
+                                                      "completion_tokens": entry["completion_tokens"]},
+                                      "model_name": entry["model"]})
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        key = self.cassette_key(messages, stop)
+        entry = self._lookup(key)
+        if entry is None:
+            started = time.perf_counter()
+            response = self.inner.invoke(messages, stop=stop, **kwargs)
+            entry = self._entry_from_response(messages, response, time.perf_counter() - started)
+            self.cassette.put(key, entry)
+            self.cassette.count(entry, hit=False)
+            return self._result(entry)
+
+        delay = self.latency.sample(key, self.cassette.next_call_index(key), entry.get("latency"))
+        if delay:
+            time.sleep(delay)
+        self.cassette.count(entry, hit=True, latency=delay)
+        return self._result(entry)
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None,
+                         **kwargs) -> ChatResult:
+        key = self.cassette_key(messages, stop)
+        entry = self._lookup(key)
+        if entry is None:
+            started = time.perf_counter()
+            response = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+            entry = self._entry_from_response(messages, response, time.perf_counter() - started)
+            self.cassette.put(key, entry)
+            self.cassette.count(entry, hit=False)
+            return self._result(entry)
+
+        delay = self.latency.sample(key, self.cassette.next_call_index(key), entry.get("latency"))
+        if delay:
+            await asyncio.sleep(delay)
+        self.cassette.count(entry, hit=True, latency=delay)
+        return self._result(entry)
+
+
+def get_chat_model(model: str = "gpt-4o", temperature: float = 0.0, **kwargs) -> BaseChatModel:
+    """
+    Create the chat model every chain in the project uses
+
+    LLM_CASSETTE_MODE selects off (plain ChatOpenAI), record or replay;
+    LLM_CASSETTE_PATH, LLM_CASSETTE_LATENCY and LLM_CASSETTE_SEED configure
+    the cassette file and the simulated latency used when replaying.
+
+    Args:
+        model (str): OpenAI model name
+        temperature (float): Sampling temperature
+        **kwargs: Extra ChatOpenAI arguments
+
+    Returns:
+        BaseChatModel: ChatOpenAI, or a CassetteChatModel around it, with an
+            AccountingCallbackHandler attached
+    """
+    mode = os.getenv("LLM_CASSETTE_MODE", "off").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CASSETTE_MODE {mode!r}, expected one of {', '.join(MODES)}")
+
+    # Token/cost accounting is attached to the outermost model only, so a
+    # recorded call is not counted twice.
+    callbacks = list(kwargs.pop("callbacks", None) or []) + [AccountingCallbackHandler(model)]
+
+    inner = None
+    if mode != "replay":
+        from langchain_openai import ChatOpenAI
+        if mode == "off":
+            return ChatOpenAI(model=model, temperature=temperature, callbacks=callbacks, **kwargs)
+        inner = ChatOpenAI(model=model, temperature=temperature, **kwargs)
+
+    return CassetteChatModel(
+        model_name=model,
+        temperature=temperature,
+        mode=mode,
+        cassette=get_cassette(),
+        latency=LatencyModel(os.getenv("LLM_CASSETTE_LATENCY", "none"),
+                             int(os.getenv("LLM_CASSETTE_SEED", "0"))),
+        inner=inner,
+        callbacks=callbacks,
+    )
@@ -1,12 +1,11 @@
-from neo4j import GraphDatabase
 from datetime import datetime
 from typing import Optional, Dict, Any
 
-from neo4j import GraphDatabase
-from langchain_openai import ChatOpenAI
+from llm_cassette import get_chat_model
+from llm_accounting import accounted, estimate_cost
 from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser, OutputFixingParser
-from langchain_core.exceptions import OutputParserException
+from langchain.output_parsers import PydanticOutputParser
+from output_repair import parse_llm_output
 from pydantic import BaseModel, Field
 
 from typing import Union
@@ -14,6 +13,30 @@ import os
 import PyPDF2
 from enum import Enum
 
+from connection_manager import get_connection_manager
+from graph_backend import BatchWriteError, create_connection
+from graph_schema import bootstrap_schema
+from section_segmenter import score_sections, segment
+
+# How resume sections are found: "hybrid" uses the heading segmenter and asks
+# the model only for sections it is unsure about, "llm" asks the model for
+# everything, "regex" never calls it (the path every other document class takes).
+RESUME_SECTION_PARSER = os.getenv("RESUME_SECTION_PARSER", "hybrid").strip().lower()
+RESUME_SECTIONS = ["header", "education", "experience", "skills"]
+RESUME_SECTION_EXAMPLES = {
+    "header": "John Doe",
+    "education": "University of California, Los Angeles",
+    "experience": "Software Engineer at Google",
+    "skills": "Python, Java, SQL",
+}
+# Sections scoring below this are sent to the model by the hybrid parser.
+SECTION_CONFIDENCE_THRESHOLD = float(os.getenv("SECTION_CONFIDENCE_THRESHOLD", "0.7"))
+# Models for section extraction, tried cheapest first.
+SECTION_LLM_MODELS = sorted(
+    (model.strip() for model in os.getenv("SECTION_LLM_MODELS", "gpt-4o-mini,gpt-4o").split(",") if model.strip()),
+    key=lambda model: estimate_cost(model, 1_000_000, 1_000_000),
+)
+
 class ResumeContentSchema(BaseModel):
     header: str = Field(default="", description="The header of the resume")
     education: str = Field(default="", description="The education of the resume")
@@ -22,11 +45,12 @@ class ResumeContentSchema(BaseModel):
 
 class DocumentClass(Enum):
     RESUME = "RESUME"
+    SCIENCE_ARTICLE = "SCIENCE_ARTICLE"
 
 class Neo4jConnection:
     def __init__(self, uri: str, username: str, password: str, database: str = "neo4j"):
         """
-        Initialize Neo4j connection
+        Initialize Neo4j connection on top of the process-wide pooled driver
         
         Args:
             uri (str): Neo4j URI (e.g., "bolt://localhost:7687")
@@ -38,23 +62,25 @@ class Neo4jConnection:
         self.username = username
         self.password = password
         self.database = database
-        self.driver = None
+        self.manager = get_connection_manager(uri, username, password, database)
         try:
-            self.driver = GraphDatabase.driver(
-                self.uri,
-                auth=(self.username, self.password)
-            )
-            print("Connection to Neo4j DB successful")
+            self.manager.ensure_connection()
         except Exception as e:
             print(f"Failed to connect to Neo4j DB: {e}")
+
+    @property
+    def driver(self):
+        """
+        Shared driver owned by the connection manager
+        """
+        return self.manager.driver
     
     def close(self):
         """
-        Close the Neo4j driver connection
+        Release this connection. The pooled driver stays open for other users
+        and is closed by close_all_connections() at interpreter exit.
         """
-        if self.driver is not None:
-            self.driver.close()
-            print("Neo4j connection closed")
+        self.manager = None
     
     def query(self, query: str, parameters: dict = None) -> Union[list, None]:
         """
@@ -67,18 +93,16 @@ class Neo4jConnection:
         Returns:
             list: Query results or None if error occurs
         """
-        assert self.driver is not None, "Driver not initialized!"
-        session = None
+        assert self.manager is not None, "Connection already closed!"
         response = None
         
         try:
-            session = self.driver.session(database=self.database)
-            response = list(session.run(query, parameters or {}))
+            response = self.manager.run_with_retry(
+                lambda session: list(session.run(query, parameters or {})),
+                database=self.database
+            )
         except Exception as e:
             print(f"Query failed: {e}")
-        finally:
-            if session is not None:
-                session.close()
         
         return response
 
@@ -89,20 +113,83 @@ class Neo4jConnection:
         Args:
             query (str): Cypher query for writing data
             parameters (dict): Query parameters (optional)
+            
+        Returns:
+            bool: Whether the transaction committed
+        """
+        return self.write_statements([(query, parameters)])
+
+    def write_statements(self, statements: list) -> bool:
+        """
+        Execute several write statements in one transaction
+        
+        Args:
+            statements (list): (query, parameters) pairs, run in order
+            
+        Returns:
+            bool: Whether the transaction committed
         """
-        assert self.driver is not None, "Driver not initialized!"
-        session = None
+        assert self.manager is not None, "Connection already closed!"
+
+        def work(tx):
+            for query, parameters in statements:
+                tx.run(query, parameters or {}).consume()
         
         try:
-            session = self.driver.session(database=self.database)
-            session.execute_write(
-                lambda tx: tx.run(query, parameters or {})
-            )
+            # execute_write retries transient errors (connection loss included) itself.
+            with self.manager.session(database=self.database) as session:
+                session.execute_write(work)
+            return True
         except Exception as e:
             print(f"Write transaction failed: {e}")
-        finally:
-            if session is not None:
-                session.close()
+            return False
+
+    def write_batch(self, query: str, rows: list, batch_size: int = 1000,
+                    parameters: dict = None) -> int:
+        """
+        Execute an UNWIND write once per batch of rows
+        
+        Args:
+            query (str): Cypher query reading its input from $rows
+            rows (list): Parameter maps, one per row
+            batch_size (int): Rows per transaction
+            parameters (dict): Extra parameters shared by every batch (optional)
+            
+        Returns:
+            int: Number of transactions executed
+            
+        Raises:
+            BatchWriteError: After all batches were tried, if any failed
+        """
+        batches = failed = failed_rows = 0
+        for start in range(0, len(rows), batch_size):
+            batch_parameters = dict(parameters or {})
+            batch_parameters["rows"] = rows[start:start + batch_size]
+            if not self.write_transaction(query, batch_parameters):
+                failed += 1
+                failed_rows += len(batch_parameters["rows"])
+            batches += 1
+        if failed:
+            raise BatchWriteError(batches, failed, failed_rows)
+        return batches
+
+    def stream(self, query: str, parameters: dict = None, fetch_size: int = 1000):
+        """
+        Stream the records of a read query without materializing them
+        
+        Args:
+            query (str): Cypher query
+            parameters (dict): Query parameters (optional)
+            fetch_size (int): Records pulled from the server per round trip
+            
+        Yields:
+            neo4j.Record: One record at a time
+        """
+        assert self.manager is not None, "Connection already closed!"
+        
+        with self.manager.session(database=self.database, fetch_size=fetch_size) as session:
+            for record in session.run(query, parameters or {}):
+                yield record
 
 
 class PDFDocumentReader:
@@ -140,8 +227,11 @@ class PDFDocumentReader:
                     'file_size': os.path.getsize(file_path)
                 }
                 
-                if self.document_class == DocumentClass.RESUME:
+                if self.document_class == DocumentClass.RESUME and RESUME_SECTION_PARSER == "llm":
                     return self._process_resume_using_llm(pdf_reader)
+                if self.document_class == DocumentClass.RESUME and RESUME_SECTION_PARSER == "hybrid":
+                    return self._process_resume_hybrid(pdf_reader)
+                return self._process_sections(pdf_reader)
                 
         except FileNotFoundError as e:
             print(f"Error: {e}")
@@ -153,48 +243,49 @@ class PDFDocumentReader:
             print(f"Error: An unexpected error occurred - {e}")
             return None
 
-    def _process_resume(self, pdf_reader: PyPDF2.PdfReader) -> dict:
+    def _read_text(self, pdf_reader: PyPDF2.PdfReader) -> str:
+        full_text = ''
+        for page in pdf_reader.pages:
+            text = page.extract_text()
+            full_text += text + '\n\n'
+        return full_text
+
+    def _process_sections(self, pdf_reader: PyPDF2.PdfReader) -> dict:
         """
-        Process PDF specifically as a resume
+        Split a PDF into the sections of its document class without the LLM
         
         Args:
             pdf_reader (PyPDF2.PdfReader): PDF reader object
             
         Returns:
-            dict: Processed resume data
+            dict: Processed document data
         """
-        resume_data = {
+        full_text = self._read_text(pdf_reader)
+        
+        sections = {}
+        if self.document_class == DocumentClass.RESUME:
+            sections = {'header': '', 'education': '', 'experience': '', 'skills': ''}
+        sections.update(segment(full_text, self.document_class.value))
+        
+        return {
             'metadata': self.metadata,
             'content': {
-                'full_text': '',
-                'sections': {
-                    'header': '',
-                    'education': '',
-                    'experience': '',
-                    'skills': ''
-                }
+                'full_text': full_text,
+                'sections': sections
             }
         }
+
+    def _process_resume(self, pdf_reader: PyPDF2.PdfReader) -> dict:
+        """
+        Process PDF specifically as a resume
         
-        full_text = ''
-        for page in pdf_reader.pages:
-            text = page.extract_text()
-            full_text += text + '\n\n'
-        
-        resume_data['content']['full_text'] = full_text
-        
-        text_lower = full_text.lower()
-        
-        if 'education' in text_lower:
-            resume_data['content']['sections']['education'] = self._extract_section(full_text, 'education')
-            
-        if 'experience' in text_lower:
-            resume_data['content']['sections']['experience'] = self._extract_section(full_text, 'experience')
+        Args:
+            pdf_reader (PyPDF2.PdfReader): PDF reader object
             
-        if 'skills' in text_lower:
-            resume_data['content']['sections']['skills'] = self._extract_section(full_text, 'skills')
-        
-        return resume_data
+        Returns:
+            dict: Processed resume data
+        """
+        return self._process_sections(pdf_reader)
     
     def _extract_section(self, text: str, section_name: str) -> str:
         """
@@ -205,94 +296,114 @@ class PDFDocumentReader:
             section_name (str): Name of the section to extract
             
         Returns:
-            str: Extracted section content
+            str: Body of the section without its heading line ('' if the
+                section was not found)
         """
-
-        text_lower = text.lower()
-        start_idx = text_lower.find(section_name.lower())
-        if start_idx == -1:
-            return ''
-            
-        next_section_idx = float('inf')
-        for section in ['education', 'experience', 'skills', 'references']:
-            if section == section_name:
-                continue
-            idx = text_lower.find(section, start_idx + len(section_name))
-            if idx != -1 and idx < next_section_idx:
-                next_section_idx = idx
-        
-        if next_section_idx == float('inf'):
-            return text[start_idx:].strip()
-        return text[start_idx:next_section_idx].strip()
+        return segment(text, self.document_class.value).get(section_name.lower(), '')
     
-    def _process_resume_using_llm(self, pdf_reader: PyPDF2.PdfReader) -> dict:
+    def _process_resume_hybrid(self, pdf_reader: PyPDF2.PdfReader) -> dict:
+        """
+        Process a resume with the heading segmenter, asking the LLM only for
+        the sections it could not find with confidence
         
-        resume_data = {
-            'metadata': self.metadata,
+        Args:
+            pdf_reader (PyPDF2.PdfReader): PDF reader object
+            
+        Returns:
+            dict: Processed resume data; metadata records the section
+                confidences and which sections went to the LLM
+        """
+        full_text = self._read_text(pdf_reader)
+        sections, scores = score_sections(full_text, DocumentClass.RESUME.value, tuple(RESUME_SECTIONS))
+        resume_sections = {name: sections.get(name, '') for name in RESUME_SECTIONS}
+        resume_sections.update(sections)
+        
+        uncertain = [name for name in RESUME_SECTIONS if scores[name] < SECTION_CONFIDENCE_THRESHOLD]
+        if uncertain:
+            # A section whose heading was found should not come back empty;
+            # one that was never found may simply not exist.
+            expected = [name for name in uncertain if scores[name] > 0]
+            extracted = self._extract_sections_using_llm(full_text, uncertain, expected)
+            resume_sections.update({name: value for name, value in extracted.items() if value})
+        print(f"Section confidence: {scores}; sent to LLM: {uncertain or 'none'}")
+        
+        metadata = dict(self.metadata, section_confidence=scores, llm_sections=uncertain)
+        return {
+            'metadata': metadata,
             'content': {
-                'full_text': '',
-                'sections': {
-                    'header': '',
-                    'education': '',
-                    'experience': '',
-                    'skills': ''
-                }
+                'full_text': full_text,
+                'sections': resume_sections
             }
         }
+
+    @accounted("main._extract_sections_using_llm")
+    def _extract_sections_using_llm(self, full_text: str, section_names: list,
+                                    expected: Optional[list] = None) -> dict:
+        """
+        Ask the LLM for some resume sections, moving to a larger model only
+        when a cheaper one leaves an expected section empty
         
-        full_text = ''
-        for page in pdf_reader.pages:
-            text = page.extract_text()
-            full_text += text + '\n\n'
-        
-        resume_data['content']['full_text'] = full_text
-        
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1)
+        Args:
+            full_text (str): Resume text
+            section_names (list): Keys of ResumeContentSchema to extract
+            expected (list): Sections known to exist in the text (optional)
+            
+        Returns:
+            dict: Section name -> extracted text
+        """
         parser = PydanticOutputParser(pydantic_object=ResumeContentSchema)
+        keys = "\n".join(f"        - {name}" for name in section_names)
+        example = ",\n".join(
+            f'            "{name}": "{RESUME_SECTION_EXAMPLES[name]}"' for name in section_names
+        )
+        template = f"""
+        You are a resume parser. You are given a resume and you need to extract the following sections:
+{keys}
         
-        template = """
-        You are a resume parser. You are given a resume and you need to extract the following information:
-        - Header
-        - Education
-        - Experience
-        - Skills
-        
-        You need to return a JSON object with the following keys:
-        - header
-        - education
-        - experience
-        - skills
+        You need to return a JSON object with exactly these keys.
         
         output format:
-        {{
-            "header": "John Doe",
-            "education": "University of California, Los Angeles",
-            "experience": "Software Engineer at Google",
-            "skills": "Python, Java, SQL"
-        }}
+        {{{{
+{example}
+        }}}}
         
         resume:
-        {text}
+        {{text}}
         """
-        
         prompt = PromptTemplate(template=template)
-        chain = prompt | llm
-        response = chain.invoke({"text": full_text})
-        
-        response_content = response.content if hasattr(response, 'content') else response
         
-        try:
-            parsed_response = parser.parse(response_content)
-        except OutputParserException:
-            new_parser = OutputFixingParser.from_llm(parser=parser, llm=llm)
-            parsed_response = new_parser.parse(response_content)
+        extracted = {}
+        missing = list(expected or [])
+        for model in SECTION_LLM_MODELS:
+            llm = get_chat_model(model=model, temperature=0.1)
+            response = (prompt | llm).invoke({"text": full_text})
+            response_content = response.content if hasattr(response, 'content') else response
+            parsed_response = parse_llm_output(parser, response_content, llm)
+            
+            for name in section_names:
+                value = getattr(parsed_response, name)
+                if value and not extracted.get(name):
+                    extracted[name] = value
+            missing = [name for name in missing if not extracted.get(name)]
+            if not missing:
+                break
+            print(f"{model} left {missing} empty, trying a larger model")
+        return extracted
+
+    @accounted("main._process_resume_using_llm")
+    def _process_resume_using_llm(self, pdf_reader: PyPDF2.PdfReader) -> dict:
         
-        resume_data['content']['sections']['header'] = parsed_response.header
-        resume_data['content']['sections']['education'] = parsed_response.education
-        resume_data['content']['sections']['experience'] = parsed_response.experience
-        resume_data['content']['sections']['skills'] = parsed_response.skills
+        full_text = self._read_text(pdf_reader)
+        sections = {name: '' for name in RESUME_SECTIONS}
+        sections.update(self._extract_sections_using_llm(full_text, RESUME_SECTIONS))
         
-        return resume_data
+        return {
+            'metadata': self.metadata,
+            'content': {
+                'full_text': full_text,
+                'sections': sections
+            }
+        }
 
 class DocumentProcessor:
     def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str, 
@@ -306,40 +417,62 @@ class DocumentProcessor:
             neo4j_password (str): Neo4j password
             document_class (DocumentClass): Type of document being processed
         """
-        self.document_class = DocumentClass.RESUME
-        self.neo4j_connection = Neo4jConnection(neo4j_uri, neo4j_user, neo4j_password)
+        self.document_class = DocumentClass(document_class)
+        self.neo4j_connection = create_connection(neo4j_uri, neo4j_user, neo4j_password)
+        bootstrap_schema(self.neo4j_connection)
         self.pdf_reader = PDFDocumentReader(self.document_class)
 
-    def create_document_hierarchy(self, filename: str) -> None:
+    def create_document_hierarchy(self, filename: str, sections: Optional[dict] = None) -> None:
         """
-        Create or match document class node and link file node to it
-        
+        Upsert the document class node, the file node and its sections in one transaction
+
+        Re-processing a file updates its nodes in place: the File is merged
+        on its name, sections are merged per file and section name, and
+        sections the file no longer has are removed.
+
         Args:
             filename (str): Name of the PDF file
+            sections (dict): Section name -> content (optional)
         """
 
         query = """
         MERGE (dc:DocumentClass {name: $class_name})
-        CREATE (f:File {
-            name: $filename,
-            created_at: datetime(),
-            file_type: 'PDF'
-        })
-        CREATE (f)-[:BELONGS_TO]->(dc)
-        RETURN dc, f
+        MERGE (f:File {name: $filename})
+        ON CREATE SET f.created_at = datetime(), f.file_type = 'PDF'
+        SET f.updated_at = datetime()
+        MERGE (f)-[:BELONGS_TO]->(dc)
         """
-        
+        if sections is not None:
+            query += """
+        WITH f
+        OPTIONAL MATCH (f)-[:HAS_SECTION]->(old:Section)
+        WHERE NOT old.name IN $section_names
+        DETACH DELETE old
+        WITH DISTINCT f
+        UNWIND $sections AS section
+        MERGE (f)-[:HAS_SECTION]->(s:Section {name: section.name})
+        ON CREATE SET s.created_at = datetime()
+        SET s.content = section.content
+        """
+
+        section_rows = [
+            {"name": section_name, "content": content}
+            for section_name, content in (sections or {}).items() if content
+        ]
         parameters = {
             "class_name": self.document_class.value,
-            "filename": filename
+            "filename": filename,
+            "sections": section_rows,
+            "section_names": [row["name"] for row in section_rows],
         }
         
         try:
             self.neo4j_connection.write_transaction(query, parameters)
-            print(f"Successfully created nodes for {filename}")
+            print(f"Successfully wrote nodes for {filename}")
         except Exception as e:
             print(f"Error creating document hierarchy: {e}")
 
+    @accounted("main.process_document", summary="document", label_arg=1)
     def process_document(self, file_path: str) -> None:
         """
         Process document and create graph structure
@@ -354,40 +487,20 @@ class DocumentProcessor:
 
         filename = os.path.basename(file_path)
         
-        self.create_document_hierarchy(filename)
-        
         if self.document_class == DocumentClass.RESUME:
             self.create_resume_metadata(filename, pdf_data)
+        else:
+            self.create_document_hierarchy(filename, pdf_data['content']['sections'])
 
     def create_resume_metadata(self, filename: str, pdf_data: dict) -> None:
         """
-        Create additional nodes for resume metadata
+        Upsert the file of a resume together with its section nodes
         
         Args:
             filename (str): Name of the PDF file
             pdf_data (dict): Extracted PDF data
         """
-        
-        query = """
-        MATCH (f:File {name: $filename})
-        
-        // Create section node and link to file
-        CREATE (s:Section {
-            name: $section_name,
-            content: $content,
-            created_at: datetime()
-        })
-        CREATE (f)-[:HAS_SECTION]->(s)
-        """
-        
-        for section_name, content in pdf_data['content']['sections'].items():
-            if content:
-                parameters = {
-                    "filename": filename,
-                    "section_name": section_name,
-                    "content": content
-                }
-                self.neo4j_connection.write_transaction(query, parameters)
+        self.create_document_hierarchy(filename, pdf_data['content']['sections'])
 
 if __name__ == "__main__":
 
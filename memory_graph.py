@@ -0,0 +1,2277 @@
+import functools
+import itertools
+import math
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Union, Optional, Dict, Any, List
+
+from graph_backend import BatchWriteError
+
+
+class CypherError(Exception):
+    """Raised for Cypher the in-memory backend cannot parse or execute"""
+
+
+# ---------------------------------------------------------------------------
+# Graph objects (mirror the parts of neo4j.graph.Node/Relationship/Path and
+# neo4j.Record that the pipelines read)
+# ---------------------------------------------------------------------------
+
+class _Entity:
+    def __init__(self, entity_id: int, properties: dict):
+        self.id = entity_id
+        self.element_id = f"mem:{entity_id}"
+        self._properties = properties
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def keys(self):
+        return self._properties.keys()
+
+    def values(self):
+        return self._properties.values()
+
+    def items(self):
+        return self._properties.items()
+
+
+class MemoryNode(_Entity):
+    def __init__(self, node_id: int, labels: set, properties: dict):
+        super().__init__(node_id, properties)
+        self.labels = labels
+
+    def __repr__(self):
+        return f"<MemoryNode element_id={self.element_id!r} labels={set(self.labels)!r} properties={self._properties!r}>"
+
+
+class MemoryRelationship(_Entity):
+    def __init__(self, rel_id: int, rel_type: str, start_node: MemoryNode, end_node: MemoryNode,
+                 properties: dict):
+        super().__init__(rel_id, properties)
+        self.type = rel_type
+        self.start_node = start_node
+        self.end_node = end_node
+
+    @property
+    def nodes(self):
+        return self.start_node, self.end_node
+
+    def other(self, node: MemoryNode) -> MemoryNode:
+        return self.end_node if node is self.start_node else self.start_node
+
+    def __repr__(self):
+        return (f"<MemoryRelationship element_id={self.element_id!r} type={self.type!r} "
+                f"nodes=({self.start_node.element_id}, {self.end_node.element_id}) "
+                f"properties={self._properties!r}>")
+
+
+class MemoryPath:
+    def __init__(self, nodes: list, relationships: list):
+        self.nodes = tuple(nodes)
+        self.relationships = tuple(relationships)
+
+    @property
+    def start_node(self):
+        return self.nodes[0]
+
+    @property
+    def end_node(self):
+        return self.nodes[-1]
+
+    def __len__(self):
+        return len(self.relationships)
+
+    def __repr__(self):
+        return f"<MemoryPath start={self.start_node!r} end={self.end_node!r} size={len(self)}>"
+
+
+class MemoryRecord:
+    def __init__(self, keys: list, values: list):
+        self._keys = list(keys)
+        self._values = list(values)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._values[key]
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, default=None):
+        if key in self._keys:
+            return self[key]
+        return default
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self._keys, self._values))
+
+    def data(self) -> dict:
+        return {key: _to_data(value) for key, value in zip(self._keys, self._values)}
+
+    def __repr__(self):
+        fields = " ".join(f"{key}={value!r}" for key, value in zip(self._keys, self._values))
+        return f"<MemoryRecord {fields}>"
+
+
+def _to_data(value):
+    if isinstance(value, _Entity):
+        return dict(value._properties)
+    if isinstance(value, MemoryPath):
+        return [_to_data(node) for node in value.nodes]
+    if isinstance(value, list):
+        return [_to_data(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_data(item) for key, item in value.items()}
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+class MemoryGraphStore:
+    def __init__(self):
+        """
+        Node and relationship storage with adjacency lists and property indexes
+
+        Every label is indexed on "name"; CREATE INDEX / CREATE CONSTRAINT add
+        further (label, property) indexes. Mutations are recorded in an undo
+        log while a transaction is open so a failed statement rolls back.
+        """
+        self.lock = threading.RLock()
+        self.nodes: Dict[int, MemoryNode] = {}
+        self.relationships: Dict[int, MemoryRelationship] = {}
+        self.fulltext_indexes: Dict[str, tuple] = {}
+        self._ids = itertools.count()
+        self._out: Dict[int, List[MemoryRelationship]] = {}
+        self._in: Dict[int, List[MemoryRelationship]] = {}
+        self._by_label: Dict[str, Dict[int, MemoryNode]] = {}
+        self._indexed = {"name"}
+        self._label_props = set()
+        self._prop_index: Dict[tuple, Dict[Any, Dict[int, MemoryNode]]] = {}
+        self._undo = None
+        self.round_trips = 0
+
+    # -- transactions --------------------------------------------------------
+
+    def begin(self):
+        self._undo = []
+
+    def commit(self):
+        self._undo = None
+
+    def rollback(self):
+        undo, self._undo = self._undo or [], None
+        for operation in reversed(undo):
+            operation()
+
+    def _log(self, operation):
+        if self._undo is not None:
+            self._undo.append(operation)
+
+    # -- indexes ---------------------------------------------------------------
+
+    def add_index(self, label: str, prop: str):
+        if prop in self._indexed or (label, prop) in self._label_props:
+            return
+        self._label_props.add((label, prop))
+        for node in self._by_label.get(label, {}).values():
+            self._index_value(node, label, prop, node._properties.get(prop))
+
+    def _is_indexed(self, label: str, prop: str) -> bool:
+        return prop in self._indexed or (label, prop) in self._label_props
+
+    def _index_value(self, node, label, prop, value):
+        if value is None:
+            return
+        bucket = self._prop_index.setdefault((label, prop), {}).setdefault(_hashable(value), {})
+        bucket[node.id] = node
+
+    def _unindex_value(self, node, label, prop, value):
+        if value is None:
+            return
+        bucket = self._prop_index.get((label, prop), {}).get(_hashable(value))
+        if bucket is not None:
+            bucket.pop(node.id, None)
+
+    def lookup(self, label: Optional[str], prop: str, value) -> Optional[list]:
+        """
+        Return nodes with label and prop == value, or None if not indexed
+        """
+        if value is None:
+            return []
+        key = _hashable(value)
+        if label is None:
+            if prop != "name":
+                return None
+            found = {}
+            for (index_label, index_prop), buckets in self._prop_index.items():
+                if index_prop == prop:
+                    found.update(buckets.get(key, {}))
+            return list(found.values())
+        if not self._is_indexed(label, prop):
+            return None
+        return list(self._prop_index.get((label, prop), {}).get(key, {}).values())
+
+    def nodes_with_label(self, label: str) -> list:
+        return list(self._by_label.get(label, {}).values())
+
+    # -- mutations -------------------------------------------------------------
+
+    def create_node(self, labels, properties: dict) -> MemoryNode:
+        node = MemoryNode(next(self._ids), set(), {})
+        self.nodes[node.id] = node
+        self._out[node.id] = []
+        self._in[node.id] = []
+        self._log(lambda: self._drop_node(node))
+        for label in labels:
+            self.add_label(node, label)
+        for key, value in properties.items():
+            self.set_property(node, key, value)
+        return node
+
+    def _drop_node(self, node):
+        for label in list(node.labels):
+            for prop, value in node._properties.items():
+                if self._is_indexed(label, prop):
+                    self._unindex_value(node, label, prop, value)
+            self._by_label.get(label, {}).pop(node.id, None)
+        self.nodes.pop(node.id, None)
+        self._out.pop(node.id, None)
+        self._in.pop(node.id, None)
+
+    def _restore_node(self, node):
+        self.nodes[node.id] = node
+        self._out.setdefault(node.id, [])
+        self._in.setdefault(node.id, [])
+        for label in node.labels:
+            self._by_label.setdefault(label, {})[node.id] = node
+            for prop, value in node._properties.items():
+                if self._is_indexed(label, prop):
+                    self._index_value(node, label, prop, value)
+
+    def delete_node(self, node: MemoryNode, detach: bool = False):
+        if node.id not in self.nodes:
+            return
+        attached = self._out[node.id] + self._in[node.id]
+        if attached and not detach:
+            raise CypherError(f"Cannot delete node {node.element_id}, it still has relationships")
+        for rel in list(attached):
+            self.delete_relationship(rel)
+        self._drop_node(node)
+        self._log(lambda: self._restore_node(node))
+
+    def add_label(self, node: MemoryNode, label: str):
+        if label in node.labels:
+            return
+        node.labels.add(label)
+        self._by_label.setdefault(label, {})[node.id] = node
+        for prop, value in node._properties.items():
+            if self._is_indexed(label, prop):
+                self._index_value(node, label, prop, value)
+        self._log(lambda: self.remove_label(node, label))
+
+    def remove_label(self, node: MemoryNode, label: str):
+        if label not in node.labels:
+            return
+        for prop, value in node._properties.items():
+            if self._is_indexed(label, prop):
+                self._unindex_value(node, label, prop, value)
+        node.labels.discard(label)
+        self._by_label.get(label, {}).pop(node.id, None)
+        self._log(lambda: self.add_label(node, label))
+
+    def set_property(self, entity: _Entity, key: str, value):
+        existed = key in entity._properties
+        old = entity._properties.get(key)
+        if isinstance(entity, MemoryNode):
+            for label in entity.labels:
+                if self._is_indexed(label, key):
+                    self._unindex_value(entity, label, key, old)
+                    self._index_value(entity, label, key, value)
+        if value is None:
+            entity._properties.pop(key, None)
+        else:
+            entity._properties[key] = value
+        self._log(lambda: self.set_property(entity, key, old) if existed
+                  else self.set_property(entity, key, None))
+
+    def create_relationship(self, rel_type: str, start: MemoryNode, end: MemoryNode,
+                            properties: dict) -> MemoryRelationship:
+        rel = MemoryRelationship(next(self._ids), rel_type, start, end, {})
+        self.relationships[rel.id] = rel
+        self._out[start.id].append(rel)
+        self._in[end.id].append(rel)
+        self._log(lambda: self._drop_relationship(rel))
+        for key, value in properties.items():
+            self.set_property(rel, key, value)
+        return rel
+
+    def _drop_relationship(self, rel):
+        self.relationships.pop(rel.id, None)
+        if rel in self._out.get(rel.start_node.id, []):
+            self._out[rel.start_node.id].remove(rel)
+        if rel in self._in.get(rel.end_node.id, []):
+            self._in[rel.end_node.id].remove(rel)
+
+    def _restore_relationship(self, rel):
+        self.relationships[rel.id] = rel
+        self._out[rel.start_node.id].append(rel)
+        self._in[rel.end_node.id].append(rel)
+
+    def delete_relationship(self, rel: MemoryRelationship):
+        if rel.id not in self.relationships:
+            return
+        self._drop_relationship(rel)
+        self._log(lambda: self._restore_relationship(rel))
+
+    def relationships_of(self, node: MemoryNode, direction: str) -> list:
+        if direction == "out":
+            return list(self._out.get(node.id, ()))
+        if direction == "in":
+            return list(self._in.get(node.id, ()))
+        return list(self._out.get(node.id, ())) + [
+            rel for rel in self._in.get(node.id, ()) if rel.start_node is not rel.end_node
+        ]
+
+
+def _hashable(value):
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Tokenizer
+# ---------------------------------------------------------------------------
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+|//[^\n]*)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<ident>`[^`]+`|[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<number>\d+\.\d+(?:[eE][-+]?\d+)?|\d+)
+  | (?P<param>\$[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op><>|<=|>=|=~|->|<-|\.\.|\+=|[-+*/%^=<>(){}\[\],.:|;])
+""", re.VERBOSE)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "'", '"': '"'}
+
+
+class _Token:
+    __slots__ = ("kind", "value", "start", "end")
+
+    def __init__(self, kind, value, start, end):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+
+    def is_keyword(self, *words):
+        return self.kind == "ident" and self.value.upper() in words
+
+    def __repr__(self):
+        return f"{self.kind}:{self.value}"
+
+
+def _tokenize(text: str) -> list:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise CypherError(f"Unexpected character {text[position]!r} at position {position}")
+        kind = match.lastgroup
+        raw = match.group(kind)
+        if kind == "string":
+            value = re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), raw[1:-1])
+            tokens.append(_Token("string", value, match.start(), match.end()))
+        elif kind == "ident":
+            if raw.startswith("`"):
+                tokens.append(_Token("ident", raw[1:-1], match.start(), match.end()))
+            else:
+                tokens.append(_Token("ident", raw, match.start(), match.end()))
+        elif kind == "number":
+            value = float(raw) if ("." in raw or "e" in raw.lower()) else int(raw)
+            tokens.append(_Token("number", value, match.start(), match.end()))
+        elif kind == "param":
+            tokens.append(_Token("param", raw[1:], match.start(), match.end()))
+        elif kind == "op":
+            tokens.append(_Token("op", raw, match.start(), match.end()))
+        position = match.end()
+    tokens.append(_Token("eof", None, len(text), len(text)))
+    return tokens
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+_AGGREGATES = {"count", "sum", "avg", "min", "max", "collect"}
+_CLAUSE_KEYWORDS = {
+    "MATCH", "OPTIONAL", "MERGE", "CREATE", "SET", "REMOVE", "DELETE", "DETACH", "UNWIND",
+    "WITH", "RETURN", "CALL", "WHERE", "ORDER", "SKIP", "LIMIT", "ON", "UNION", "YIELD",
+}
+
+
+class _NodePattern:
+    def __init__(self, var, labels, props):
+        self.var = var
+        self.labels = labels
+        self.props = props
+
+
+class _RelPattern:
+    def __init__(self, var, types, props, direction, min_hops, max_hops, var_length):
+        self.var = var
+        self.types = types
+        self.props = props
+        self.direction = direction
+        self.min_hops = min_hops
+        self.max_hops = max_hops
+        self.var_length = var_length
+
+
+class _PatternPart:
+    def __init__(self, path_var, nodes, rels):
+        self.path_var = path_var
+        self.nodes = nodes
+        self.rels = rels
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self._anonymous = itertools.count()
+
+    # -- token helpers -------------------------------------------------------
+
+    @property
+    def token(self):
+        return self.tokens[self.position]
+
+    def peek(self, offset=1):
+        return self.tokens[min(self.position + offset, len(self.tokens) - 1)]
+
+    def advance(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def at_op(self, *ops):
+        return self.token.kind == "op" and self.token.value in ops
+
+    def at_keyword(self, *words):
+        return self.token.is_keyword(*words)
+
+    def accept_op(self, op):
+        if self.at_op(op):
+            return self.advance()
+        return None
+
+    def accept_keyword(self, *words):
+        if self.at_keyword(*words):
+            return self.advance()
+        return None
+
+    def expect_op(self, op):
+        if not self.at_op(op):
+            raise CypherError(f"Expected {op!r} but found {self.token.value!r} at position {self.token.start}")
+        return self.advance()
+
+    def expect_keyword(self, word):
+        if not self.at_keyword(word):
+            raise CypherError(f"Expected {word} but found {self.token.value!r} at position {self.token.start}")
+        return self.advance()
+
+    def expect_ident(self):
+        if self.token.kind != "ident":
+            raise CypherError(f"Expected a name but found {self.token.value!r} at position {self.token.start}")
+        return self.advance().value
+
+    def anonymous(self):
+        return f"  anon_{next(self._anonymous)}"
+
+    # -- statements ------------------------------------------------------------
+
+    def parse(self) -> list:
+        clauses, parts, union_all = [], [], None
+        while self.token.kind != "eof":
+            if self.accept_op(";"):
+                continue
+            if self.accept_keyword("UNION"):
+                keep_all = bool(self.accept_keyword("ALL"))
+                if union_all is not None and keep_all != union_all:
+                    raise CypherError("Invalid combination of UNION and UNION ALL")
+                union_all = keep_all
+                parts.append(clauses)
+                clauses = []
+                continue
+            clauses.append(self.parse_clause())
+        if parts:
+            return [("union", parts + [clauses], union_all)]
+        return clauses
+
+    def parse_clause(self):
+        if self.accept_keyword("OPTIONAL"):
+            self.expect_keyword("MATCH")
+            return self.parse_match(optional=True)
+        if self.accept_keyword("MATCH"):
+            return self.parse_match(optional=False)
+        if self.accept_keyword("MERGE"):
+            return self.parse_merge()
+        if self.accept_keyword("CREATE"):
+            return ("create", self.parse_patterns())
+        if self.accept_keyword("SET"):
+            return ("set", self.parse_set_items())
+        if self.accept_keyword("REMOVE"):
+            return ("remove", self.parse_remove_items())
+        if self.accept_keyword("DETACH"):
+            self.expect_keyword("DELETE")
+            return ("delete", self.parse_expression_list(), True)
+        if self.accept_keyword("DELETE"):
+            return ("delete", self.parse_expression_list(), False)
+        if self.accept_keyword("UNWIND"):
+            expression = self.parse_expression()
+            self.expect_keyword("AS")
+            return ("unwind", expression, self.expect_ident())
+        if self.accept_keyword("WITH"):
+            return self.parse_projection("with")
+        if self.accept_keyword("RETURN"):
+            return self.parse_projection("return")
+        if self.accept_keyword("CALL"):
+            return self.parse_call()
+        raise CypherError(f"Unsupported clause {self.token.value!r} at position {self.token.start}")
+
+    def parse_match(self, optional: bool):
+        patterns = self.parse_patterns()
+        where = self.parse_expression() if self.accept_keyword("WHERE") else None
+        return ("match", patterns, where, optional)
+
+    def parse_merge(self):
+        pattern = self.parse_pattern_part()
+        on_create, on_match = [], []
+        while self.at_keyword("ON"):
+            self.advance()
+            if self.accept_keyword("CREATE"):
+                self.expect_keyword("SET")
+                on_create.extend(self.parse_set_items())
+            else:
+                self.expect_keyword("MATCH")
+                self.expect_keyword("SET")
+                on_match.extend(self.parse_set_items())
+        return ("merge", pattern, on_create, on_match)
+
+    def parse_call(self):
+        name = [self.expect_ident()]
+        while self.accept_op("."):
+            name.append(self.expect_ident())
+        arguments = []
+        self.expect_op("(")
+        if not self.at_op(")"):
+            arguments = self.parse_expression_list()
+        self.expect_op(")")
+        yields = None
+        where = None
+        if self.accept_keyword("YIELD"):
+            yields = []
+            while True:
+                field = self.expect_ident()
+                alias = self.expect_ident() if self.accept_keyword("AS") else field
+                yields.append((field, alias))
+                if not self.accept_op(","):
+                    break
+            if self.accept_keyword("WHERE"):
+                where = self.parse_expression()
+        return ("call", ".".join(name).lower(), arguments, yields, where)
+
+    def parse_projection(self, kind: str):
+        distinct = bool(self.accept_keyword("DISTINCT"))
+        items = []
+        star = False
+        while True:
+            if self.accept_op("*"):
+                star = True
+            else:
+                start = self.token.start
+                expression = self.parse_expression()
+                text = self.text[start:self.tokens[self.position - 1].end]
+                alias = self.expect_ident() if self.accept_keyword("AS") else text.strip()
+                items.append((expression, alias))
+            if not self.accept_op(","):
+                break
+        order = []
+        skip = limit = where = None
+        if self.accept_keyword("ORDER"):
+            self.expect_keyword("BY")
+            while True:
+                expression = self.parse_expression()
+                descending = False
+                if self.accept_keyword("DESC", "DESCENDING"):
+                    descending = True
+                else:
+                    self.accept_keyword("ASC", "ASCENDING")
+                order.append((expression, descending))
+                if not self.accept_op(","):
+                    break
+        if self.accept_keyword("SKIP"):
+            skip = self.parse_expression()
+        if self.accept_keyword("LIMIT"):
+            limit = self.parse_expression()
+        if kind == "with" and self.accept_keyword("WHERE"):
+            where = self.parse_expression()
+        return (kind, distinct, star, items, order, skip, limit, where)
+
+    def parse_set_items(self) -> list:
+        items = []
+        while True:
+            variable = self.expect_ident()
+            if self.at_op(":"):
+                labels = []
+                while self.accept_op(":"):
+                    labels.append(self.expect_ident())
+                items.append(("labels", variable, labels))
+            elif self.accept_op("+="):
+                items.append(("merge_map", variable, self.parse_expression()))
+            elif self.accept_op("="):
+                items.append(("replace_map", variable, self.parse_expression()))
+            else:
+                target = ("var", variable)
+                self.expect_op(".")
+                key = self.expect_ident()
+                while self.accept_op("."):
+                    target = ("prop", target, key)
+                    key = self.expect_ident()
+                self.expect_op("=")
+                items.append(("prop", target, key, self.parse_expression()))
+            if not self.accept_op(","):
+                return items
+
+    def parse_remove_items(self) -> list:
+        items = []
+        while True:
+            variable = self.expect_ident()
+            if self.at_op(":"):
+                labels = []
+                while self.accept_op(":"):
+                    labels.append(self.expect_ident())
+                items.append(("labels", variable, labels))
+            else:
+                self.expect_op(".")
+                items.append(("prop", variable, self.expect_ident()))
+            if not self.accept_op(","):
+                return items
+
+    def parse_expression_list(self) -> list:
+        expressions = [self.parse_expression()]
+        while self.accept_op(","):
+            expressions.append(self.parse_expression())
+        return expressions
+
+    # -- patterns --------------------------------------------------------------
+
+    def parse_patterns(self) -> list:
+        patterns = [self.parse_pattern_part()]
+        while self.accept_op(","):
+            patterns.append(self.parse_pattern_part())
+        return patterns
+
+    def parse_pattern_part(self) -> _PatternPart:
+        path_var = None
+        if self.token.kind == "ident" and self.peek().kind == "op" and self.peek().value == "=":
+            path_var = self.advance().value
+            self.advance()
+        nodes = [self.parse_node_pattern()]
+        rels = []
+        while self.at_op("-", "<-"):
+            rels.append(self.parse_rel_pattern())
+            nodes.append(self.parse_node_pattern())
+        return _PatternPart(path_var, nodes, rels)
+
+    def parse_label_groups(self) -> list:
+        groups = []
+        while self.accept_op(":"):
+            group = {self.expect_ident()}
+            while self.accept_op("|"):
+                self.accept_op(":")
+                group.add(self.expect_ident())
+            groups.append(group)
+        return groups
+
+    def parse_node_pattern(self) -> _NodePattern:
+        self.expect_op("(")
+        var = self.advance().value if self.token.kind == "ident" else self.anonymous()
+        labels = self.parse_label_groups()
+        props = self.parse_map_literal() if self.at_op("{") else None
+        if props is None and self.token.kind == "param":
+            props = ("param", self.advance().value)
+        self.expect_op(")")
+        return _NodePattern(var, labels, props)
+
+    def parse_rel_pattern(self) -> _RelPattern:
+        left = bool(self.accept_op("<-"))
+        if not left:
+            self.expect_op("-")
+        var, types, props = self.anonymous(), [], None
+        min_hops, max_hops, var_length = 1, 1, False
+        if self.accept_op("["):
+            if self.token.kind == "ident":
+                var = self.advance().value
+            if self.accept_op(":"):
+                types.append(self.expect_ident())
+                while self.accept_op("|"):
+                    self.accept_op(":")
+                    types.append(self.expect_ident())
+            if self.accept_op("*"):
+                var_length = True
+                min_hops, max_hops = 1, None
+                if self.token.kind == "number":
+                    min_hops = max_hops = self.advance().value
+                if self.accept_op(".."):
+                    max_hops = self.advance().value if self.token.kind == "number" else None
+                elif self.token.kind != "number" and min_hops == max_hops == 1 and not var_length:
+                    pass
+            if self.at_op("{"):
+                props = self.parse_map_literal()
+            self.expect_op("]")
+        right = False
+        if self.accept_op("->"):
+            right = True
+        else:
+            self.expect_op("-")
+        if left and right:
+            raise CypherError("Relationship pattern cannot point both ways")
+        direction = "in" if left else "out" if right else "both"
+        return _RelPattern(var, types, props, direction, min_hops, max_hops, var_length)
+
+    # -- expressions -----------------------------------------------------------
+
+    def parse_expression(self):
+        return self.parse_or()
+
+    def parse_or(self):
+        left = self.parse_xor()
+        while self.accept_keyword("OR"):
+            left = ("or", left, self.parse_xor())
+        return left
+
+    def parse_xor(self):
+        left = self.parse_and()
+        while self.accept_keyword("XOR"):
+            left = ("xor", left, self.parse_and())
+        return left
+
+    def parse_and(self):
+        left = self.parse_not()
+        while self.accept_keyword("AND"):
+            left = ("and", left, self.parse_not())
+        return left
+
+    def parse_not(self):
+        if self.accept_keyword("NOT"):
+            return ("not", self.parse_not())
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        left = self.parse_additive()
+        while True:
+            if self.at_op("=", "<>", "<", ">", "<=", ">=", "=~"):
+                op = self.advance().value
+                left = ("cmp", op, left, self.parse_additive())
+            elif self.accept_keyword("IN"):
+                left = ("in", left, self.parse_additive())
+            elif self.at_keyword("STARTS") and self.peek().is_keyword("WITH"):
+                self.advance()
+                self.advance()
+                left = ("starts", left, self.parse_additive())
+            elif self.at_keyword("ENDS") and self.peek().is_keyword("WITH"):
+                self.advance()
+                self.advance()
+                left = ("ends", left, self.parse_additive())
+            elif self.accept_keyword("CONTAINS"):
+                left = ("contains", left, self.parse_additive())
+            elif self.accept_keyword("IS"):
+                negate = bool(self.accept_keyword("NOT"))
+                self.expect_keyword("NULL")
+                left = ("isnull", left, negate)
+            else:
+                return left
+
+    def parse_additive(self):
+        left = self.parse_multiplicative()
+        while self.at_op("+", "-"):
+            op = self.advance().value
+            left = ("arith", op, left, self.parse_multiplicative())
+        return left
+
+    def parse_multiplicative(self):
+        left = self.parse_power()
+        while self.at_op("*", "/", "%"):
+            op = self.advance().value
+            left = ("arith", op, left, self.parse_power())
+        return left
+
+    def parse_power(self):
+        left = self.parse_unary()
+        while self.accept_op("^"):
+            left = ("arith", "^", left, self.parse_unary())
+        return left
+
+    def parse_unary(self):
+        if self.accept_op("-"):
+            return ("neg", self.parse_unary())
+        if self.accept_op("+"):
+            return self.parse_unary()
+        return self.parse_postfix()
+
+    def parse_postfix(self):
+        expression = self.parse_atom()
+        while True:
+            if self.at_op(".") and self.peek().kind == "ident":
+                self.advance()
+                expression = ("prop", expression, self.advance().value)
+            elif self.accept_op("["):
+                if self.accept_op(".."):
+                    end = self.parse_expression()
+                    self.expect_op("]")
+                    expression = ("slice", expression, None, end)
+                    continue
+                index = self.parse_expression()
+                if self.accept_op(".."):
+                    end = None if self.at_op("]") else self.parse_expression()
+                    self.expect_op("]")
+                    expression = ("slice", expression, index, end)
+                else:
+                    self.expect_op("]")
+                    expression = ("index", expression, index)
+            elif self.at_op(":") and expression[0] == "var":
+                expression = ("has_labels", expression, self.parse_label_groups())
+            else:
+                return expression
+
+    def parse_map_literal(self):
+        self.expect_op("{")
+        entries = []
+        if not self.at_op("}"):
+            while True:
+                key = self.advance()
+                if key.kind not in ("ident", "string"):
+                    raise CypherError(f"Invalid map key {key.value!r}")
+                self.expect_op(":")
+                entries.append((key.value, self.parse_expression()))
+                if not self.accept_op(","):
+                    break
+        self.expect_op("}")
+        return ("map", entries)
+
+    def parse_atom(self):
+        token = self.token
+        if token.kind == "string" or token.kind == "number":
+            self.advance()
+            return ("lit", token.value)
+        if token.kind == "param":
+            self.advance()
+            return ("param", token.value)
+        if self.at_op("("):
+            self.advance()
+            expression = self.parse_expression()
+            self.expect_op(")")
+            return expression
+        if self.at_op("["):
+            return self.parse_list()
+        if self.at_op("{"):
+            return self.parse_map_literal()
+        if token.kind != "ident":
+            raise CypherError(f"Unexpected {token.value!r} at position {token.start}")
+
+        word = token.value.upper()
+        if word == "TRUE":
+            self.advance()
+            return ("lit", True)
+        if word == "FALSE":
+            self.advance()
+            return ("lit", False)
+        if word == "NULL":
+            self.advance()
+            return ("lit", None)
+        if word == "CASE":
+            return self.parse_case()
+
+        name_parts = [self.advance().value]
+        while (self.at_op(".") and self.peek().kind == "ident"
+               and self.peek(2).kind == "op" and self.peek(2).value in (".", "(")
+               and self._dotted_call_ahead()):
+            self.advance()
+            name_parts.append(self.advance().value)
+        if not self.at_op("("):
+            return ("var", name_parts[0])
+
+        name = ".".join(name_parts).lower()
+        self.advance()
+        if name in ("any", "all", "none", "single") and self.token.kind == "ident" and self.peek().is_keyword("IN"):
+            variable = self.advance().value
+            self.advance()
+            source = self.parse_expression()
+            where = self.parse_expression() if self.accept_keyword("WHERE") else ("lit", True)
+            self.expect_op(")")
+            return ("quantifier", name, variable, source, where)
+        if name == "reduce":
+            accumulator = self.expect_ident()
+            self.expect_op("=")
+            initial = self.parse_expression()
+            self.expect_op(",")
+            variable = self.expect_ident()
+            self.expect_keyword("IN")
+            source = self.parse_expression()
+            self.expect_op("|")
+            expression = self.parse_expression()
+            self.expect_op(")")
+            return ("reduce", accumulator, initial, variable, source, expression)
+        if name == "count" and self.at_op("*"):
+            self.advance()
+            self.expect_op(")")
+            return ("count_star",)
+        distinct = bool(self.accept_keyword("DISTINCT"))
+        arguments = []
+        if not self.at_op(")"):
+            arguments = self.parse_expression_list()
+        self.expect_op(")")
+        return ("call", name, arguments, distinct)
+
+    def _dotted_call_ahead(self) -> bool:
+        offset = 1
+        while True:
+            if not (self.peek(offset).kind == "op" and self.peek(offset).value == "."):
+                return False
+            if self.peek(offset + 1).kind != "ident":
+                return False
+            following = self.peek(offset + 2)
+            if following.kind == "op" and following.value == "(":
+                return True
+            offset += 2
+
+    def parse_list(self):
+        self.expect_op("[")
+        if self.token.kind == "ident" and self.peek().is_keyword("IN"):
+            variable = self.advance().value
+            self.advance()
+            source = self.parse_expression()
+            where = self.parse_expression() if self.accept_keyword("WHERE") else None
+            projection = self.parse_expression() if self.accept_op("|") else None
+            self.expect_op("]")
+            return ("comprehension", variable, source, where, projection)
+        items = []
+        if not self.at_op("]"):
+            items = self.parse_expression_list()
+        self.expect_op("]")
+        return ("list", items)
+
+    def parse_case(self):
+        self.expect_keyword("CASE")
+        subject = None
+        if not self.at_keyword("WHEN"):
+            subject = self.parse_expression()
+        branches = []
+        while self.accept_keyword("WHEN"):
+            condition = self.parse_expression()
+            self.expect_keyword("THEN")
+            branches.append((condition, self.parse_expression()))
+        default = self.parse_expression() if self.accept_keyword("ELSE") else ("lit", None)
+        self.expect_keyword("END")
+        return ("case", subject, branches, default)
+
+
+# ---------------------------------------------------------------------------
+# Expression evaluation
+# ---------------------------------------------------------------------------
+
+def _contains_aggregate(expression) -> bool:
+    if not isinstance(expression, tuple):
+        return False
+    if expression[0] == "count_star":
+        return True
+    if expression[0] == "call" and expression[1] in _AGGREGATES:
+        return True
+    for part in expression[1:]:
+        if isinstance(part, tuple) and _contains_aggregate(part):
+            return True
+        if isinstance(part, list):
+            for item in part:
+                if isinstance(item, tuple) and _contains_aggregate(item):
+                    return True
+    return False
+
+
+def _truthy(value) -> bool:
+    return value is True
+
+
+def _compare(op, left, right):
+    if left is None or right is None:
+        return None
+    if op == "=":
+        return _equals(left, right)
+    if op == "<>":
+        equal = _equals(left, right)
+        return None if equal is None else not equal
+    if op == "=~":
+        return re.fullmatch(right, str(left)) is not None
+    try:
+        if op == "<":
+            return left < right
+        if op == ">":
+            return left > right
+        if op == "<=":
+            return left <= right
+        if op == ">=":
+            return left >= right
+    except TypeError:
+        return None
+    raise CypherError(f"Unknown comparison {op}")
+
+
+def _equals(left, right):
+    if isinstance(left, bool) != isinstance(right, bool):
+        return False
+    return left == right
+
+
+def _arith(op, left, right):
+    if left is None or right is None:
+        return None
+    if op == "+":
+        if isinstance(left, list):
+            return left + (right if isinstance(right, list) else [right])
+        if isinstance(right, list):
+            return [left] + right
+        if isinstance(left, str) or isinstance(right, str):
+            return f"{left}{right}"
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if op == "/":
+        if isinstance(left, int) and isinstance(right, int):
+            return int(left / right)
+        return left / right
+    if op == "%":
+        return math.fmod(left, right) if isinstance(left, float) or isinstance(right, float) else left % right
+    if op == "^":
+        return float(left) ** float(right)
+    raise CypherError(f"Unknown operator {op}")
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _size(value):
+    if value is None:
+        return None
+    return len(value)
+
+
+def _to_integer(value):
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _substring(value, start, length=None):
+    if value is None:
+        return None
+    return value[start:] if length is None else value[start:start + length]
+
+
+_FUNCTIONS = {
+    "coalesce": lambda *values: next((value for value in values if value is not None), None),
+    "tolower": lambda value: None if value is None else str(value).lower(),
+    "toupper": lambda value: None if value is None else str(value).upper(),
+    "trim": lambda value: None if value is None else str(value).strip(),
+    "ltrim": lambda value: None if value is None else str(value).lstrip(),
+    "rtrim": lambda value: None if value is None else str(value).rstrip(),
+    "tostring": lambda value: None if value is None else (str(value).lower() if isinstance(value, bool) else str(value)),
+    "tointeger": _to_integer,
+    "tofloat": _to_float,
+    "size": _size,
+    "length": lambda value: None if value is None else len(value),
+    "labels": lambda node: None if node is None else sorted(node.labels),
+    "type": lambda rel: None if rel is None else rel.type,
+    "elementid": lambda entity: None if entity is None else entity.element_id,
+    "id": lambda entity: None if entity is None else entity.id,
+    "keys": lambda value: None if value is None else list(value.keys()),
+    "properties": lambda value: None if value is None else dict(value.items()),
+    "exists": lambda value: value is not None,
+    "datetime": lambda value=None: _now() if value is None else datetime.fromisoformat(str(value)),
+    "timestamp": lambda: int(_now().timestamp() * 1000),
+    "randomuuid": lambda: str(uuid.uuid4()),
+    "head": lambda values: values[0] if values else None,
+    "last": lambda values: values[-1] if values else None,
+    "tail": lambda values: None if values is None else values[1:],
+    "range": lambda start, end, step=1: list(range(start, end + (1 if step > 0 else -1), step)),
+    "nodes": lambda path: None if path is None else list(path.nodes),
+    "relationships": lambda path: None if path is None else list(path.relationships),
+    "startnode": lambda rel: None if rel is None else rel.start_node,
+    "endnode": lambda rel: None if rel is None else rel.end_node,
+    "split": lambda value, separator: None if value is None else value.split(separator),
+    "replace": lambda value, search, replacement: None if value is None else value.replace(search, replacement),
+    "substring": _substring,
+    "left": lambda value, length: None if value is None else value[:length],
+    "right": lambda value, length: None if value is None else value[-length:] if length else "",
+    "abs": lambda value: None if value is None else abs(value),
+    "round": lambda value, digits=0: None if value is None else float(round(value, digits)),
+    "floor": lambda value: None if value is None else float(math.floor(value)),
+    "ceil": lambda value: None if value is None else float(math.ceil(value)),
+    "sqrt": lambda value: None if value is None else math.sqrt(value),
+    "log": lambda value: None if value is None else math.log(value),
+    "isempty": lambda value: None if value is None else len(value) == 0,
+    "reverse": lambda value: None if value is None else value[::-1],
+}
+
+
+class _Evaluator:
+    def __init__(self, parameters: dict):
+        self.parameters = parameters
+
+    def evaluate(self, expression, env: dict, group: Optional[list] = None):
+        kind = expression[0]
+        if kind == "lit":
+            return expression[1]
+        if kind == "param":
+            if expression[1] not in self.parameters:
+                raise CypherError(f"Expected parameter: ${expression[1]}")
+            return self.parameters[expression[1]]
+        if kind == "var":
+            if expression[1] not in env:
+                raise CypherError(f"Variable `{expression[1]}` not defined")
+            return env[expression[1]]
+        if kind == "prop":
+            target = self.evaluate(expression[1], env, group)
+            if target is None:
+                return None
+            if isinstance(target, dict):
+                return target.get(expression[2])
+            if isinstance(target, (_Entity, MemoryRecord)):
+                return target.get(expression[2])
+            if isinstance(target, datetime):
+                return getattr(target, expression[2], None)
+            raise CypherError(f"Cannot read property {expression[2]!r} of {type(target).__name__}")
+        if kind == "index":
+            target = self.evaluate(expression[1], env, group)
+            index = self.evaluate(expression[2], env, group)
+            if target is None or index is None:
+                return None
+            if isinstance(target, (dict, _Entity)):
+                return target.get(index)
+            try:
+                return target[index]
+            except IndexError:
+                return None
+        if kind == "slice":
+            target = self.evaluate(expression[1], env, group)
+            start = self.evaluate(expression[2], env, group) if expression[2] is not None else None
+            end = self.evaluate(expression[3], env, group) if expression[3] is not None else None
+            return None if target is None else target[start:end]
+        if kind == "list":
+            return [self.evaluate(item, env, group) for item in expression[1]]
+        if kind == "map":
+            return {key: self.evaluate(value, env, group) for key, value in expression[1]}
+        if kind == "and":
+            left = self.evaluate(expression[1], env, group)
+            if left is False:
+                return False
+            right = self.evaluate(expression[2], env, group)
+            if right is False:
+                return False
+            return None if left is None or right is None else True
+        if kind == "or":
+            left = self.evaluate(expression[1], env, group)
+            if left is True:
+                return True
+            right = self.evaluate(expression[2], env, group)
+            if right is True:
+                return True
+            return None if left is None or right is None else False
+        if kind == "xor":
+            left = self.evaluate(expression[1], env, group)
+            right = self.evaluate(expression[2], env, group)
+            return None if left is None or right is None else left != right
+        if kind == "not":
+            value = self.evaluate(expression[1], env, group)
+            return None if value is None else not value
+        if kind == "cmp":
+            return _compare(expression[1], self.evaluate(expression[2], env, group),
+                            self.evaluate(expression[3], env, group))
+        if kind == "in":
+            value = self.evaluate(expression[1], env, group)
+            values = self.evaluate(expression[2], env, group)
+            if values is None:
+                return None
+            if any(_equals(value, item) for item in values if item is not None):
+                return True
+            return None if value is None or None in values else False
+        if kind in ("starts", "ends", "contains"):
+            left = self.evaluate(expression[1], env, group)
+            right = self.evaluate(expression[2], env, group)
+            if not isinstance(left, str) or not isinstance(right, str):
+                return None
+            if kind == "starts":
+                return left.startswith(right)
+            if kind == "ends":
+                return left.endswith(right)
+            return right in left
+        if kind == "isnull":
+            value = self.evaluate(expression[1], env, group)
+            return (value is not None) if expression[2] else (value is None)
+        if kind == "arith":
+            return _arith(expression[1], self.evaluate(expression[2], env, group),
+                          self.evaluate(expression[3], env, group))
+        if kind == "neg":
+            value = self.evaluate(expression[1], env, group)
+            return None if value is None else -value
+        if kind == "has_labels":
+            node = self.evaluate(expression[1], env, group)
+            if node is None:
+                return None
+            return all(node.labels & labels for labels in expression[2])
+        if kind == "case":
+            subject = self.evaluate(expression[1], env, group) if expression[1] is not None else None
+            for condition, result in expression[2]:
+                if expression[1] is not None:
+                    matched = _equals(subject, self.evaluate(condition, env, group))
+                else:
+                    matched = _truthy(self.evaluate(condition, env, group))
+                if matched:
+                    return self.evaluate(result, env, group)
+            return self.evaluate(expression[3], env, group)
+        if kind == "comprehension":
+            _, variable, source, where, projection = expression
+            values = self.evaluate(source, env, group)
+            if values is None:
+                return None
+            result = []
+            for item in values:
+                scope = dict(env)
+                scope[variable] = item
+                if where is not None and not _truthy(self.evaluate(where, scope, group)):
+                    continue
+                result.append(self.evaluate(projection, scope, group) if projection is not None else item)
+            return result
+        if kind == "quantifier":
+            _, name, variable, source, where = expression
+            values = self.evaluate(source, env, group)
+            if values is None:
+                return None
+            matches = 0
+            for item in values:
+                scope = dict(env)
+                scope[variable] = item
+                if _truthy(self.evaluate(where, scope, group)):
+                    matches += 1
+            if name == "any":
+                return matches > 0
+            if name == "all":
+                return matches == len(values)
+            if name == "none":
+                return matches == 0
+            return matches == 1
+        if kind == "reduce":
+            _, accumulator, initial, variable, source, body = expression
+            value = self.evaluate(initial, env, group)
+            items = self.evaluate(source, env, group)
+            if items is None:
+                return None
+            for item in items:
+                scope = dict(env)
+                scope[accumulator] = value
+                scope[variable] = item
+                value = self.evaluate(body, scope, group)
+            return value
+        if kind == "count_star":
+            if group is None:
+                raise CypherError("count(*) used outside of an aggregation")
+            return len(group)
+        if kind == "call":
+            return self.call(expression, env, group)
+        raise CypherError(f"Unsupported expression {kind}")
+
+    def call(self, expression, env, group):
+        _, name, arguments, distinct = expression
+        if name in _AGGREGATES:
+            if group is None:
+                raise CypherError(f"{name}() used outside of an aggregation")
+            values = [self.evaluate(arguments[0], row) for row in group]
+            values = [value for value in values if value is not None]
+            if distinct:
+                seen, unique = set(), []
+                for value in values:
+                    key = _hashable_key(value)
+                    if key not in seen:
+                        seen.add(key)
+                        unique.append(value)
+                values = unique
+            if name == "count":
+                return len(values)
+            if name == "collect":
+                return values
+            if name == "sum":
+                return sum(values) if values else 0
+            if name == "avg":
+                return sum(values) / len(values) if values else None
+            if name == "min":
+                return min(values) if values else None
+            if name == "max":
+                return max(values) if values else None
+        function = _FUNCTIONS.get(name)
+        if function is None:
+            raise CypherError(f"Unknown function '{name}'")
+        return function(*[self.evaluate(argument, env, group) for argument in arguments])
+
+
+def _hashable_key(value):
+    if isinstance(value, (_Entity, MemoryPath)):
+        return ("entity", id(value))
+    if isinstance(value, list):
+        return tuple(_hashable_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _hashable_key(item)) for key, item in value.items()))
+    if isinstance(value, datetime):
+        return ("datetime", value.isoformat())
+    return value
+
+
+_TYPE_ORDER = (dict, _Entity, MemoryPath, list, str, bool, (int, float))
+
+
+def _sort_key(value):
+    if value is None:
+        return (len(_TYPE_ORDER) + 1, 0)
+    if isinstance(value, datetime):
+        return (len(_TYPE_ORDER), value.timestamp())
+    for rank, types in enumerate(_TYPE_ORDER):
+        if isinstance(value, types):
+            if isinstance(value, (_Entity, MemoryPath, dict)):
+                return (rank, id(value))
+            if isinstance(value, list):
+                return (rank, tuple(_sort_key(item) for item in value))
+            return (rank, value)
+    return (len(_TYPE_ORDER), str(value))
+
+
+# ---------------------------------------------------------------------------
+# Full-text scoring (covers the Lucene syntax graph_search builds)
+# ---------------------------------------------------------------------------
+
+_WORD = re.compile(r"\w+")
+
+
+def _edit_distance_at_most_one(left: str, right: str) -> bool:
+    if left == right:
+        return True
+    if abs(len(left) - len(right)) > 1:
+        return False
+    if len(left) == len(right):
+        return sum(a != b for a, b in zip(left, right)) == 1
+    if len(left) > len(right):
+        left, right = right, left
+    for position in range(len(right)):
+        if right[:position] + right[position + 1:] == left:
+            return True
+    return False
+
+
+def _fulltext_score(lucene_query: str, words: list) -> float:
+    tokens = re.findall(r"\(|\)|AND|OR|NOT|[^\s()]+", lucene_query)
+    position = 0
+
+    def parse_or():
+        nonlocal position
+        score = parse_and()
+        while position < len(tokens) and tokens[position] == "OR":
+            position += 1
+            other = parse_and()
+            score = (score or 0.0) + (other or 0.0) if (score or other) else 0.0
+        return score
+
+    def parse_and():
+        nonlocal position
+        score = parse_term()
+        while position < len(tokens) and tokens[position] not in ("OR", ")"):
+            if tokens[position] == "AND":
+                position += 1
+            other = parse_term()
+            score = score + other if score and other else 0.0
+        return score
+
+    def parse_term():
+        nonlocal position
+        token = tokens[position]
+        position += 1
+        if token == "NOT":
+            return 0.0 if parse_term() else 1.0
+        if token == "(":
+            score = parse_or()
+            position += 1
+            return score
+        term = token.lower()
+        if term.endswith("*"):
+            prefix = term[:-1]
+            return 0.5 * sum(1 for word in words if word.startswith(prefix))
+        if "~" in term:
+            term = term.split("~")[0]
+            return 0.8 * sum(1 for word in words if _edit_distance_at_most_one(word, term))
+        return float(sum(1 for word in words if word == term))
+
+    if not tokens:
+        return 0.0
+    score = parse_or()
+    return score / math.sqrt(max(len(words), 1))
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+class _Executor:
+    def __init__(self, store: MemoryGraphStore, parameters: dict):
+        self.store = store
+        self.evaluator = _Evaluator(parameters)
+
+    def run(self, clauses: list):
+        if clauses and clauses[0][0] == "union":
+            return self.run_union(clauses[0])
+        rows = [{}]
+        columns = None
+        for clause in clauses:
+            kind = clause[0]
+            if kind == "return":
+                columns, rows = self.project(clause, rows)
+            else:
+                rows = getattr(self, f"clause_{kind}")(clause, rows)
+        if columns is None:
+            return [], []
+        return columns, rows
+
+    def run_union(self, clause):
+        _, parts, union_all = clause
+        columns, rows, seen = None, [], set()
+        for part in parts:
+            part_columns, part_rows = self.run(part)
+            if columns is None:
+                columns = part_columns
+            elif list(part_columns) != list(columns):
+                raise CypherError("All sub queries in a UNION must return the same column names")
+            for row in part_rows:
+                if not union_all:
+                    key = tuple(_hashable_key(row.get(column)) for column in columns)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                rows.append(row)
+        return columns or [], rows
+
+    # -- reading ---------------------------------------------------------------
+
+    def clause_match(self, clause, rows):
+        _, patterns, where, optional = clause
+        result = []
+        for env in rows:
+            matches = [
+                match for match in self.match_patterns(patterns, env)
+                if where is None or _truthy(self.evaluator.evaluate(where, match))
+            ]
+            if matches:
+                result.extend(matches)
+            elif optional:
+                env = dict(env)
+                for variable in self.pattern_variables(patterns):
+                    env.setdefault(variable, None)
+                result.append(env)
+        return result
+
+    @staticmethod
+    def pattern_variables(patterns):
+        variables = []
+        for part in patterns:
+            if part.path_var:
+                variables.append(part.path_var)
+            variables.extend(node.var for node in part.nodes)
+            variables.extend(rel.var for rel in part.rels)
+        return variables
+
+    def match_patterns(self, patterns, env, index=0, used=frozenset()):
+        if index == len(patterns):
+            yield env
+            return
+        for match, used_rels in self.match_part(patterns[index], env, used):
+            yield from self.match_patterns(patterns, match, index + 1, used_rels)
+
+    def node_matches(self, pattern: _NodePattern, node: MemoryNode, env) -> bool:
+        if node is None:
+            return False
+        for group in pattern.labels:
+            if not node.labels & group:
+                return False
+        if pattern.props is not None:
+            expected = self.evaluator.evaluate(pattern.props, env)
+            for key, value in (expected or {}).items():
+                if value is None or not _equals(node._properties.get(key), value):
+                    return False
+        return True
+
+    def rel_matches(self, pattern: _RelPattern, rel: MemoryRelationship, env) -> bool:
+        if pattern.types and rel.type not in pattern.types:
+            return False
+        if pattern.props is not None:
+            expected = self.evaluator.evaluate(pattern.props, env)
+            for key, value in (expected or {}).items():
+                if value is None or not _equals(rel._properties.get(key), value):
+                    return False
+        return True
+
+    def candidates(self, pattern: _NodePattern, env) -> list:
+        bound = env.get(pattern.var)
+        if pattern.var in env:
+            return [bound] if bound is not None and self.node_matches(pattern, bound, env) else []
+
+        expected = {}
+        if pattern.props is not None:
+            expected = self.evaluator.evaluate(pattern.props, env) or {}
+        labels = [next(iter(group)) for group in pattern.labels if len(group) == 1]
+        for key, value in expected.items():
+            for label in labels or [None]:
+                found = self.store.lookup(label, key, value)
+                if found is not None:
+                    return [node for node in found if self.node_matches(pattern, node, env)]
+        if pattern.labels:
+            group = min(pattern.labels, key=lambda group: sum(
+                len(self.store._by_label.get(label, {})) for label in group))
+            nodes = {}
+            for label in group:
+                nodes.update(self.store._by_label.get(label, {}))
+            pool = nodes.values()
+        else:
+            pool = self.store.nodes.values()
+        return [node for node in list(pool) if self.node_matches(pattern, node, env)]
+
+    def _selectivity(self, pattern: _NodePattern, env) -> int:
+        if pattern.var in env:
+            return 0
+        if pattern.props is not None:
+            return 1
+        if pattern.labels:
+            return 2
+        return 3
+
+    def match_part(self, part: _PatternPart, env, used):
+        nodes, rels = part.nodes, part.rels
+        reverse = rels and self._selectivity(nodes[-1], env) < self._selectivity(nodes[0], env)
+        if reverse:
+            nodes = list(reversed(nodes))
+            flipped = {"in": "out", "out": "in", "both": "both"}
+            rels = [
+                _RelPattern(rel.var, rel.types, rel.props, flipped[rel.direction],
+                            rel.min_hops, rel.max_hops, rel.var_length)
+                for rel in reversed(rels)
+            ]
+
+        for start in self.candidates(nodes[0], env):
+            scope = dict(env)
+            scope[nodes[0].var] = start
+            yield from self.extend(part, nodes, rels, 0, start, scope, used, [start], [], reverse)
+
+    def extend(self, part, nodes, rels, index, current, env, used, path_nodes, path_rels, reverse):
+        if index == len(rels):
+            if part.path_var:
+                if reverse:
+                    path = MemoryPath(list(reversed(path_nodes)), list(reversed(path_rels)))
+                else:
+                    path = MemoryPath(path_nodes, path_rels)
+                env = dict(env)
+                env[part.path_var] = path
+            yield env, used
+            return
+
+        rel_pattern, node_pattern = rels[index], nodes[index + 1]
+        if not rel_pattern.var_length:
+            if rel_pattern.var in env and env[rel_pattern.var] is not None:
+                options = [env[rel_pattern.var]]
+            else:
+                options = self.store.relationships_of(current, rel_pattern.direction)
+            for rel in options:
+                if rel.id in used or not self.rel_matches(rel_pattern, rel, env):
+                    continue
+                if rel_pattern.direction == "out" and rel.start_node is not current:
+                    continue
+                if rel_pattern.direction == "in" and rel.end_node is not current:
+                    continue
+                other = rel.other(current)
+                if not self.node_matches(node_pattern, other, env):
+                    continue
+                if node_pattern.var in env and env[node_pattern.var] is not other:
+                    continue
+                scope = dict(env)
+                scope[rel_pattern.var] = rel
+                scope[node_pattern.var] = other
+                yield from self.extend(part, nodes, rels, index + 1, other, scope, used | {rel.id},
+                                       path_nodes + [other], path_rels + [rel], reverse)
+            return
+
+        max_hops = rel_pattern.max_hops if rel_pattern.max_hops is not None else 32
+        for end, hops in self.expand(current, rel_pattern, env, used, max_hops):
+            if len(hops) < rel_pattern.min_hops:
+                continue
+            if not self.node_matches(node_pattern, end, env):
+                continue
+            if node_pattern.var in env and env[node_pattern.var] is not end:
+                continue
+            scope = dict(env)
+            scope[rel_pattern.var] = list(reversed(hops)) if reverse else list(hops)
+            scope[node_pattern.var] = end
+            hop_nodes = []
+            node = current
+            for rel in hops:
+                node = rel.other(node)
+                hop_nodes.append(node)
+            yield from self.extend(part, nodes, rels, index + 1, end, scope,
+                                   used | {rel.id for rel in hops},
+                                   path_nodes + hop_nodes, path_rels + list(hops), reverse)
+
+    def expand(self, start, rel_pattern, env, used, max_hops):
+        stack = [(start, ())]
+        while stack:
+            node, hops = stack.pop()
+            yield node, hops
+            if len(hops) >= max_hops:
+                continue
+            taken = {rel.id for rel in hops}
+            for rel in self.store.relationships_of(node, rel_pattern.direction):
+                if rel.id in taken or rel.id in used or not self.rel_matches(rel_pattern, rel, env):
+                    continue
+                if rel_pattern.direction == "out" and rel.start_node is not node:
+                    continue
+                if rel_pattern.direction == "in" and rel.end_node is not node:
+                    continue
+                stack.append((rel.other(node), hops + (rel,)))
+
+    def clause_unwind(self, clause, rows):
+        _, expression, variable = clause
+        result = []
+        for env in rows:
+            values = self.evaluator.evaluate(expression, env)
+            if values is None:
+                continue
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            for value in values:
+                scope = dict(env)
+                scope[variable] = value
+                result.append(scope)
+        return result
+
+    def clause_with(self, clause, rows):
+        _, rows = self.project(clause, rows)
+        where = clause[7]
+        if where is not None:
+            rows = [env for env in rows if _truthy(self.evaluator.evaluate(where, env))]
+        return rows
+
+    def project(self, clause, rows):
+        _, distinct, star, items, order, skip, limit, _where = clause
+        columns = []
+        if star:
+            visible = []
+            for env in rows[:1]:
+                visible = [key for key in env if not key.startswith("  ")]
+            columns.extend(visible)
+        columns.extend(alias for _, alias in items)
+
+        aggregating = any(_contains_aggregate(expression) for expression, _ in items)
+        projected = []
+        if aggregating:
+            keys = [(expression, alias) for expression, alias in items if not _contains_aggregate(expression)]
+            groups = {}
+            for env in rows:
+                values = [self.evaluator.evaluate(expression, env) for expression, _ in keys]
+                group_key = tuple(_hashable_key(value) for value in values)
+                if group_key not in groups:
+                    groups[group_key] = (values, [])
+                groups[group_key][1].append(env)
+            if not groups and not keys:
+                groups[()] = ([], [])
+            for values, group in groups.values():
+                base = group[0] if group else {}
+                row = {}
+                if star:
+                    row.update({key: base.get(key) for key in columns[:len(columns) - len(items)]})
+                key_values = iter(values)
+                for expression, alias in items:
+                    if _contains_aggregate(expression):
+                        row[alias] = self.evaluator.evaluate(expression, base, group)
+                    else:
+                        row[alias] = next(key_values)
+                projected.append((row, row))
+        else:
+            for env in rows:
+                row = {key: env[key] for key in columns[:len(columns) - len(items)]} if star else {}
+                for expression, alias in items:
+                    row[alias] = self.evaluator.evaluate(expression, env)
+                scope = dict(env)
+                scope.update(row)
+                projected.append((row, scope))
+
+        if distinct:
+            seen, unique = set(), []
+            for row, scope in projected:
+                key = tuple(_hashable_key(row[column]) for column in columns)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append((row, scope))
+            projected = unique
+
+        if order:
+            def compare(left, right):
+                for expression, descending in order:
+                    a = _sort_key(self.evaluator.evaluate(expression, left[1]))
+                    b = _sort_key(self.evaluator.evaluate(expression, right[1]))
+                    if a != b:
+                        if descending:
+                            # Cypher puts nulls first when sorting descending.
+                            return -1 if a > b else 1
+                        return -1 if a < b else 1
+                return 0
+            projected.sort(key=functools.cmp_to_key(compare))
+
+        result = [row for row, _ in projected]
+        if skip is not None:
+            result = result[int(self.evaluator.evaluate(skip, {})):]
+        if limit is not None:
+            result = result[:int(self.evaluator.evaluate(limit, {}))]
+        return columns, result
+
+    # -- writing ---------------------------------------------------------------
+
+    def create_pattern(self, part: _PatternPart, env):
+        env = dict(env)
+        created_nodes = []
+        for pattern in part.nodes:
+            if pattern.var in env and env[pattern.var] is not None:
+                created_nodes.append(env[pattern.var])
+                continue
+            props = self.evaluator.evaluate(pattern.props, env) if pattern.props is not None else {}
+            labels = [label for group in pattern.labels for label in sorted(group)]
+            node = self.store.create_node(labels, {k: v for k, v in (props or {}).items() if v is not None})
+            env[pattern.var] = node
+            created_nodes.append(node)
+        rels = []
+        for index, pattern in enumerate(part.rels):
+            if len(pattern.types) != 1 or pattern.var_length:
+                raise CypherError("Relationships must have exactly one type and a fixed length to be created")
+            props = self.evaluator.evaluate(pattern.props, env) if pattern.props is not None else {}
+            start, end = created_nodes[index], created_nodes[index + 1]
+            if pattern.direction == "in":
+                start, end = end, start
+            rel = self.store.create_relationship(
+                pattern.types[0], start, end, {k: v for k, v in (props or {}).items() if v is not None}
+            )
+            env[pattern.var] = rel
+            rels.append(rel)
+        if part.path_var:
+            env[part.path_var] = MemoryPath(created_nodes, rels)
+        return env
+
+    def clause_create(self, clause, rows):
+        result = []
+        for env in rows:
+            for part in clause[1]:
+                env = self.create_pattern(part, env)
+            result.append(env)
+        return result
+
+    def clause_merge(self, clause, rows):
+        _, part, on_create, on_match = clause
+        result = []
+        for env in rows:
+            matches = [match for match, _ in self.match_part(part, env, frozenset())]
+            if matches:
+                for match in matches:
+                    self.apply_set_items(on_match, match)
+                    result.append(match)
+            else:
+                for pattern in part.nodes:
+                    if pattern.props is not None and pattern.var not in env:
+                        expected = self.evaluator.evaluate(pattern.props, env) or {}
+                        if any(value is None for value in expected.values()):
+                            raise CypherError(
+                                f"Cannot merge node using null property value for {pattern.var.strip()}"
+                            )
+                created = self.create_pattern(part, env)
+                self.apply_set_items(on_create, created)
+                result.append(created)
+        return result
+
+    def clause_set(self, clause, rows):
+        for env in rows:
+            self.apply_set_items(clause[1], env)
+        return rows
+
+    def apply_set_items(self, items, env):
+        for item in items:
+            kind = item[0]
+            if kind == "prop":
+                _, target_expression, key, value_expression = item
+                target = self.evaluator.evaluate(target_expression, env)
+                value = self.evaluator.evaluate(value_expression, env)
+                if target is None:
+                    continue
+                if not isinstance(target, _Entity):
+                    raise CypherError("SET target must be a node or relationship")
+                self.store.set_property(target, key, value)
+            elif kind == "labels":
+                node = env.get(item[1])
+                if node is not None:
+                    for label in item[2]:
+                        self.store.add_label(node, label)
+            else:
+                target = env.get(item[1])
+                if target is None:
+                    continue
+                values = self.evaluator.evaluate(item[2], env) or {}
+                if isinstance(values, _Entity):
+                    values = dict(values._properties)
+                if kind == "replace_map":
+                    for key in list(target._properties):
+                        if key not in values:
+                            self.store.set_property(target, key, None)
+                for key, value in values.items():
+                    self.store.set_property(target, key, value)
+
+    def clause_remove(self, clause, rows):
+        for env in rows:
+            for item in clause[1]:
+                target = env.get(item[1])
+                if target is None:
+                    continue
+                if item[0] == "labels":
+                    for label in item[2]:
+                        self.store.remove_label(target, label)
+                else:
+                    self.store.set_property(target, item[2], None)
+        return rows
+
+    def clause_delete(self, clause, rows):
+        _, expressions, detach = clause
+        for env in rows:
+            for expression in expressions:
+                value = self.evaluator.evaluate(expression, env)
+                for entity in (value if isinstance(value, list) else [value]):
+                    if isinstance(entity, MemoryRelationship):
+                        self.store.delete_relationship(entity)
+                    elif isinstance(entity, MemoryNode):
+                        self.store.delete_node(entity, detach=detach)
+                    elif isinstance(entity, MemoryPath):
+                        for rel in entity.relationships:
+                            self.store.delete_relationship(rel)
+                        for node in entity.nodes:
+                            self.store.delete_node(node, detach=detach)
+        return rows
+
+    # -- procedures --------------------------------------------------------------
+
+    def clause_call(self, clause, rows):
+        _, name, arguments, yields, where = clause
+        procedure = _PROCEDURES.get(name)
+        if procedure is None:
+            raise CypherError(f"There is no procedure with the name `{name}` registered")
+        result = []
+        for env in rows:
+            values = [self.evaluator.evaluate(argument, env) for argument in arguments]
+            for output in procedure(self.store, *values):
+                scope = dict(env)
+                if yields is None:
+                    scope.update(output)
+                else:
+                    for field, alias in yields:
+                        if field not in output:
+                            raise CypherError(f"Unknown procedure output: `{field}`")
+                        scope[alias] = output[field]
+                if where is None or _truthy(self.evaluator.evaluate(where, scope)):
+                    result.append(scope)
+        return result
+
+
+def _procedure_fulltext_query_nodes(store, index_name, lucene_query, options=None):
+    if index_name not in store.fulltext_indexes:
+        raise CypherError(f"There is no such fulltext schema index: {index_name}")
+    labels, properties = store.fulltext_indexes[index_name]
+    nodes = {}
+    for label in labels:
+        nodes.update(store._by_label.get(label, {}))
+    hits = []
+    for node in nodes.values():
+        words = []
+        for prop in properties:
+            value = node._properties.get(prop)
+            if isinstance(value, str):
+                words.extend(_WORD.findall(value.lower()))
+        if not words:
+            continue
+        score = _fulltext_score(lucene_query, words)
+        if score > 0:
+            hits.append((score, node))
+    hits.sort(key=lambda hit: (-hit[0], hit[1].id))
+    options = options or {}
+    skip = int(options.get("skip", 0))
+    limit = options.get("limit")
+    hits = hits[skip:skip + int(limit)] if limit is not None else hits[skip:]
+    return [{"node": node, "score": score} for score, node in hits]
+
+
+def _procedure_subgraph_all(store, start, config=None):
+    config = config or {}
+    max_level = config.get("maxLevel", -1)
+    starts = start if isinstance(start, list) else [start]
+    seen = {node.id: node for node in starts if node is not None}
+    frontier = list(seen.values())
+    level = 0
+    while frontier and (max_level < 0 or level < max_level):
+        following = []
+        for node in frontier:
+            for rel in store.relationships_of(node, "both"):
+                other = rel.other(node)
+                if other.id not in seen:
+                    seen[other.id] = other
+                    following.append(other)
+        frontier = following
+        level += 1
+    rels = {}
+    for node in seen.values():
+        for rel in store.relationships_of(node, "out"):
+            if rel.end_node.id in seen:
+                rels[rel.id] = rel
+    return [{"nodes": list(seen.values()), "relationships": list(rels.values())}]
+
+
+def _procedure_relationship_types(store):
+    return [{"relationshipType": rel_type}
+            for rel_type in sorted({rel.type for rel in store.relationships.values()})]
+
+
+def _procedure_labels(store):
+    return [{"label": label} for label in sorted(label for label, nodes in store._by_label.items() if nodes)]
+
+
+_PROCEDURES = {
+    "db.index.fulltext.querynodes": _procedure_fulltext_query_nodes,
+    "apoc.path.subgraphall": _procedure_subgraph_all,
+    "db.relationshiptypes": _procedure_relationship_types,
+    "db.labels": _procedure_labels,
+}
+
+
+# ---------------------------------------------------------------------------
+# Schema statements
+# ---------------------------------------------------------------------------
+
+_FULLTEXT_DDL = re.compile(
+    r"^\s*CREATE\s+FULLTEXT\s+INDEX\s+`?(\w+)`?\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"FOR\s+\(\s*(\w+)\s*:\s*([\w|`]+)\s*\)\s+ON\s+EACH\s+\[([^\]]*)\]",
+    re.IGNORECASE | re.DOTALL,
+)
+_INDEX_DDL = re.compile(
+    r"^\s*CREATE\s+(?:\w+\s+)?(?:INDEX|CONSTRAINT)\b.*?\bFOR\s+\(\s*(\w+)\s*:\s*`?(\w+)`?\s*\)"
+    r"\s+(?:ON|REQUIRE)\s+\(?\s*\w+\.`?(\w+)`?",
+    re.IGNORECASE | re.DOTALL,
+)
+# Other schema statements are accepted; SHOW lists nothing, as every index
+# here is an ordinary lookup index.
+_OTHER_DDL = re.compile(
+    r"^\s*(?:(?:CREATE|DROP)\s+(?:\w+\s+)?(?:INDEX|CONSTRAINT)|SHOW\s+(?:\w+\s+)?(?:INDEXES|CONSTRAINTS))\b",
+    re.IGNORECASE,
+)
+
+
+def _run_schema_statement(store: MemoryGraphStore, query: str) -> bool:
+    match = _FULLTEXT_DDL.match(query)
+    if match:
+        labels = [label.strip("`") for label in match.group(3).split("|")]
+        properties = [prop.strip().split(".", 1)[-1].strip("`") for prop in match.group(4).split(",")]
+        store.fulltext_indexes.setdefault(match.group(1), (labels, properties))
+        return True
+    match = _INDEX_DDL.match(query)
+    if match:
+        store.add_index(match.group(2), match.group(3))
+        return True
+    return bool(_OTHER_DDL.match(query))
+
+
+# ---------------------------------------------------------------------------
+# Connection
+# ---------------------------------------------------------------------------
+
+_stores: Dict[tuple, MemoryGraphStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_store(uri: Optional[str] = None, database: str = "neo4j") -> MemoryGraphStore:
+    """
+    Return the process-wide in-memory graph for a (uri, database) pair
+
+    Args:
+        uri (str): Connection URI the graph stands in for (optional)
+        database (str): Database name
+
+    Returns:
+        MemoryGraphStore: Shared store, created empty on first use
+    """
+    with _stores_lock:
+        key = (uri, database)
+        if key not in _stores:
+            _stores[key] = MemoryGraphStore()
+        return _stores[key]
+
+
+def reset_memory_stores() -> None:
+    """
+    Drop every in-memory graph (e.g. between benchmark runs)
+    """
+    with _stores_lock:
+        _stores.clear()
+
+
+class InMemoryGraphConnection:
+    _plan_cache: Dict[str, list] = {}
+
+    def __init__(self, uri: str = None, username: str = None, password: str = None,
+                 database: str = "neo4j"):
+        """
+        In-process stand-in for Neo4jConnection
+
+        Implements the Cypher subset the pipelines emit (MATCH/MERGE/CREATE by
+        name, UNWIND batches, SET/REMOVE/DELETE, WITH/RETURN with aggregation,
+        bounded variable-length expansion, apoc.path.subgraphAll and full-text
+        queryNodes) against a store shared by every connection to the same uri.
+
+        Args:
+            uri (str): Connection URI the graph stands in for (optional)
+            username (str): Ignored, accepted for interface compatibility
+            password (str): Ignored, accepted for interface compatibility
+            database (str): Database name (default is "neo4j")
+        """
+        self.uri = uri
+        self.username = username
+        self.password = password
+        self.database = database
+        self.store = get_memory_store(uri, database)
+        self.round_trips = 0
+
+    def close(self):
+        """
+        Release this connection. The shared in-memory graph is kept.
+        """
+        pass
+
+    def _parse(self, query: str) -> list:
+        clauses = self._plan_cache.get(query)
+        if clauses is None:
+            clauses = _Parser(query).parse()
+            self._plan_cache[query] = clauses
+        return clauses
+
+    def _execute(self, query: str, parameters: dict = None) -> list:
+        return self._execute_all([(query, parameters)])[0]
+
+    def _execute_all(self, statements: list) -> list:
+        self.round_trips += 1
+        results = []
+        with self.store.lock:
+            self.store.round_trips += 1
+            self.store.begin()
+            try:
+                for query, parameters in statements:
+                    if _run_schema_statement(self.store, query):
+                        results.append([])
+                        continue
+                    columns, rows = _Executor(self.store, parameters or {}).run(self._parse(query))
+                    results.append([MemoryRecord(columns, [row.get(column) for column in columns])
+                                    for row in rows])
+            except Exception:
+                self.store.rollback()
+                raise
+            self.store.commit()
+        return results
+
+    def query(self, query: str, parameters: dict = None) -> Union[list, None]:
+        """
+        Execute a Cypher query
+
+        Args:
+            query (str): Cypher query
+            parameters (dict): Query parameters (optional)
+
+        Returns:
+            list: Query results or None if error occurs
+        """
+        try:
+            return self._execute(query, parameters)
+        except Exception as e:
+            print(f"Query failed: {e}")
+            return None
+
+    def write_transaction(self, query: str, parameters: dict = None):
+        """
+        Execute a write transaction
+
+        Args:
+            query (str): Cypher query for writing data
+            parameters (dict): Query parameters (optional)
+
+        Returns:
+            bool: Whether the transaction committed
+        """
+        return self.write_statements([(query, parameters)])
+
+    def write_statements(self, statements: list) -> bool:
+        """
+        Execute several write statements in one transaction
+
+        Args:
+            statements (list): (query, parameters) pairs, run in order
+
+        Returns:
+            bool: Whether the transaction committed
+        """
+        try:
+            self._execute_all(statements)
+            return True
+        except Exception as e:
+            print(f"Write transaction failed: {e}")
+            return False
+
+    def write_batch(self, query: str, rows: list, batch_size: int = 1000,
+                    parameters: dict = None) -> int:
+        """
+        Execute an UNWIND write once per batch of rows
+
+        Args:
+            query (str): Cypher query reading its input from $rows
+            rows (list): Parameter maps, one per row
+            batch_size (int): Rows per transaction
+            parameters (dict): Extra parameters shared by every batch (optional)
+
+        Returns:
+            int: Number of transactions executed
+
+        Raises:
+            BatchWriteError: After all batches were tried, if any failed
+        """
+        batches = failed = failed_rows = 0
+        for start in range(0, len(rows), batch_size):
+            batch_parameters = dict(parameters or {})
+            batch_parameters["rows"] = rows[start:start + batch_size]
+            if not self.write_transaction(query, batch_parameters):
+                failed += 1
+                failed_rows += len(batch_parameters["rows"])
+            batches += 1
+        if failed:
+            raise BatchWriteError(batches, failed, failed_rows)
+        return batches
+
+    def stream(self, query: str, parameters: dict = None, fetch_size: int = 1000):
+        """
+        Stream the records of a read query
+
+        Args:
+            query (str): Cypher query
+            parameters (dict): Query parameters (optional)
+            fetch_size (int): Accepted for interface compatibility
+
+        Yields:
+            MemoryRecord: One record at a time
+        """
+        yield from self._execute(query, parameters)
+
+
+class AsyncInMemoryGraphConnection:
+    def __init__(self, uri: str = None, username: str = None, password: str = None,
+                 database: str = "neo4j"):
+        """
+        Async counterpart of InMemoryGraphConnection (same surface as
+        AsyncNeo4jConnection); statements run inline on the event loop.
+
+        Args:
+            uri (str): Connection URI the graph stands in for (optional)
+            username (str): Ignored, accepted for interface compatibility
+            password (str): Ignored, accepted for interface compatibility
+            database (str): Database name (default is "neo4j")
+        """
+        self.uri = uri
+        self.database = database
+        self.connection = InMemoryGraphConnection(uri, username, password, database)
+
+    @property
+    def round_trips(self):
+        return self.connection.round_trips
+
+    async def close(self):
+        pass
+
+    async def query(self, query: str, parameters: dict = None) -> Union[list, None]:
+        return self.connection.query(query, parameters)
+
+    async def write_transaction(self, query: str, parameters: dict = None):
+        return self.connection.write_transaction(query, parameters)
+
+    async def write_batch(self, query: str, rows: list, batch_size: int = 1000,
+                          parameters: dict = None, concurrency: int = 4) -> int:
+        return self.connection.write_batch(query, rows, batch_size, parameters)
+
+    async def stream(self, query: str, parameters: dict = None, fetch_size: int = 1000):
+        for record in self.connection.stream(query, parameters, fetch_size):
+            yield record
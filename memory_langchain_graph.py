@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from langchain_community.graphs.graph_store import GraphStore
+
+from memory_graph import InMemoryGraphConnection
+
+_TYPE_NAMES = [
+    (bool, "BOOLEAN"),
+    (int, "INTEGER"),
+    (float, "FLOAT"),
+    (str, "STRING"),
+    (list, "LIST"),
+    (datetime, "DATE_TIME"),
+]
+
+
+def _type_name(value) -> str:
+    for python_type, name in _TYPE_NAMES:
+        if isinstance(value, python_type):
+            return name
+    return type(value).__name__.upper()
+
+
+class InMemoryLangChainGraph(GraphStore):
+    def __init__(self, connection: InMemoryGraphConnection):
+        """
+        LangChain GraphStore over the in-memory backend, standing in for
+        Neo4jGraph so GraphCypherQAChain runs without a server
+
+        Args:
+            connection (InMemoryGraphConnection): Connection to query through
+        """
+        self.connection = connection
+        self.schema = ""
+        self.structured_schema: Dict[str, Any] = {}
+        self.refresh_schema()
+
+    @property
+    def get_schema(self) -> str:
+        return self.schema
+
+    @property
+    def get_structured_schema(self) -> Dict[str, Any]:
+        return self.structured_schema
+
+    def query(self, query: str, params: dict = {}) -> List[Dict[str, Any]]:
+        """
+        Run Cypher and return records as dicts (errors propagate, as in Neo4jGraph)
+
+        Args:
+            query (str): Cypher query
+            params (dict): Query parameters
+
+        Returns:
+            list: One dict per record
+        """
+        return [record.data() for record in self.connection._execute(query, params)]
+
+    def refresh_schema(self) -> None:
+        """
+        Rebuild the schema description from the labels, relationship types
+        and property types currently in the graph
+        """
+        store = self.connection.store
+        with store.lock:
+            node_props: Dict[str, Dict[str, str]] = {}
+            for node in store.nodes.values():
+                for label in node.labels:
+                    props = node_props.setdefault(label, {})
+                    for key, value in node.items():
+                        props.setdefault(key, _type_name(value))
+
+            rel_props: Dict[str, Dict[str, str]] = {}
+            patterns = set()
+            for rel in store.relationships.values():
+                props = rel_props.setdefault(rel.type, {})
+                for key, value in rel.items():
+                    props.setdefault(key, _type_name(value))
+                for start in rel.start_node.labels:
+                    for end in rel.end_node.labels:
+                        patterns.add((start, rel.type, end))
+
+        self.structured_schema = {
+            "node_props": {
+                label: [{"property": key, "type": kind} for key, kind in sorted(props.items())]
+                for label, props in sorted(node_props.items())
+            },
+            "rel_props": {
+                rel_type: [{"property": key, "type": kind} for key, kind in sorted(props.items())]
+                for rel_type, props in sorted(rel_props.items()) if props
+            },
+            "relationships": [
+                {"start": start, "type": rel_type, "end": end}
+                for start, rel_type, end in sorted(patterns)
+            ],
+            "metadata": {"constraint": [], "index": []},
+        }
+
+        def describe(properties: dict) -> str:
+            return "{" + ", ".join(f"{item['property']}: {item['type']}" for item in properties) + "}"
+
+        self.schema = "\n".join([
+            "Node properties are the following:",
+            ",".join(f"{label} {describe(props)}"
+                     for label, props in self.structured_schema["node_props"].items()),
+            "Relationship properties are the following:",
+            ",".join(f"{rel_type} {describe(props)}"
+                     for rel_type, props in self.structured_schema["rel_props"].items()),
+            "The relationships are the following:",
+            ",".join(f"(:{rel['start']})-[:{rel['type']}]->(:{rel['end']})"
+                     for rel in self.structured_schema["relationships"]),
+        ])
+
+    def add_graph_documents(self, graph_documents: list, include_source: bool = False) -> None:
+        """
+        Merge LLMGraphTransformer output into the graph, keyed by node id
+
+        Args:
+            graph_documents (list): GraphDocument objects
+            include_source (bool): Link each node to a Document node for its source
+        """
+        for document in graph_documents:
+            for node in document.nodes:
+                self.connection._execute(
+                    f"MERGE (n:`{node.type}` {{ id: $id }}) SET n += $properties",
+                    {"id": node.id, "properties": dict(node.properties or {})},
+                )
+                if include_source:
+                    self.connection._execute(
+                        f"MERGE (d:Document {{ text: $text }}) "
+                        f"WITH d MATCH (n:`{node.type}` {{ id: $id }}) MERGE (d)-[:MENTIONS]->(n)",
+                        {"text": document.source.page_content, "id": node.id},
+                    )
+            for rel in document.relationships:
+                self.connection._execute(
+                    f"MATCH (a:`{rel.source.type}` {{ id: $source }}), (b:`{rel.target.type}` {{ id: $target }}) "
+                    f"MERGE (a)-[r:`{rel.type}`]->(b) SET r += $properties",
+                    {"source": rel.source.id, "target": rel.target.id,
+                     "properties": dict(rel.properties or {})},
+                )
+        self.refresh_schema()
@@ -0,0 +1,202 @@
+import ast
+import json
+import re
+import threading
+from collections import Counter
+
+from langchain.output_parsers import OutputFixingParser
+from langchain_core.exceptions import OutputParserException
+
+# How LLM outputs were parsed: "direct" (valid as returned), "repaired"
+# (fixed locally), "llm_fixed" (needed OutputFixingParser) or "failed".
+PARSE_PATHS = ("direct", "repaired", "llm_fixed", "failed")
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+_FENCE_PATTERN = re.compile(r"```[A-Za-z]*\s*(.*?)(?:```|$)", re.DOTALL)
+_LITERAL_PATTERN = re.compile(r"(True|False|None)\b")
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_DANGLING_KEY_PATTERN = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+
+def _count(path: str) -> None:
+    with _stats_lock:
+        _stats[path] += 1
+
+
+def repair_stats() -> dict:
+    """
+    How often each parse path has been taken in this process
+
+    Returns:
+        dict: Count per entry of PARSE_PATHS
+    """
+    with _stats_lock:
+        return {path: _stats[path] for path in PARSE_PATHS}
+
+
+def reset_repair_stats() -> None:
+    """
+    Zero the parse path counters
+    """
+    with _stats_lock:
+        _stats.clear()
+
+
+def _closes_string(text: str, index: int) -> bool:
+    rest = text[index + 1:].lstrip()
+    return not rest or rest[0] in ",:]}"
+
+
+def _strip_trailing_comma(out: list) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def repair_json_text(text: str) -> str:
+    """
+    Turn almost-JSON model output into JSON
+
+    Handles code fences, prose around the object, single-quoted strings,
+    Python literals, trailing commas and output cut off mid-way (the partial
+    last element is dropped and open brackets are closed).
+
+    Args:
+        text (str): Raw model output
+
+    Returns:
+        str: Repaired JSON text (may still be invalid for badly broken input)
+    """
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return text.strip()
+    text = text[min(starts):]
+
+    out = []
+    stack = []
+    quote = None
+    string_start = 0
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if quote:
+            if char == "\\":
+                escaped = text[index + 1:index + 2]
+                out.append("'" if escaped == "'" else char + escaped)
+                index += 2
+                continue
+            if char == quote and (quote == '"' or _closes_string(text, index)):
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+            index += 1
+            continue
+
+        if char in "'\"":
+            quote = char
+            string_start = len(out)
+            out.append('"')
+        elif char in "{[":
+            stack.append(char)
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+        else:
+            literal = _LITERAL_PATTERN.match(text, index)
+            if literal and not (out and (out[-1].isalnum() or out[-1] == "_")):
+                out.append(_LITERALS[literal.group(1)])
+                index = literal.end()
+                continue
+            out.append(char)
+        index += 1
+
+    if quote:
+        del out[string_start:]
+    repaired = "".join(out).rstrip()
+    if stack:
+        if stack[-1] == "{":
+            repaired = _DANGLING_KEY_PATTERN.sub(r"\1", repaired)
+        repaired = repaired.rstrip().rstrip(",").rstrip()
+        repaired += "".join("}" if bracket == "{" else "]" for bracket in reversed(stack))
+    return repaired
+
+
+def load_lenient_json(text: str):
+    """
+    Parse model output as JSON, a Python literal, or repaired JSON
+
+    Args:
+        text (str): Raw model output
+
+    Returns:
+        Any: Parsed value
+
+    Raises:
+        ValueError: If no strategy produces a value
+    """
+    fenced = _FENCE_PATTERN.search(text)
+    body = (fenced.group(1) if fenced else text).strip()
+    try:
+        return json.loads(body)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(body)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+    return json.loads(repair_json_text(text))
+
+
+def parse_llm_output(parser, text: str, llm):
+    """
+    Parse model output with a Pydantic parser, repairing it locally first
+
+    OutputFixingParser, which costs another LLM round trip, is used only when
+    local repair does not yield a valid object.
+
+    Args:
+        parser (PydanticOutputParser): Parser for the expected schema
+        text (str): Raw model output
+        llm: Chat model for the last-resort OutputFixingParser
+
+    Returns:
+        BaseModel: Parsed object
+    """
+    try:
+        parsed = parser.parse(text)
+        _count("direct")
+        return parsed
+    except OutputParserException:
+        pass
+
+    try:
+        parsed = parser.parse(json.dumps(load_lenient_json(text)))
+        _count("repaired")
+        return parsed
+    except (ValueError, TypeError, OutputParserException):
+        pass
+
+    print("Local JSON repair failed, asking the LLM to fix the output")
+    try:
+        parsed = OutputFixingParser.from_llm(parser=parser, llm=llm).parse(text)
+    except Exception:
+        _count("failed")
+        raise
+    _count("llm_fixed")
+    return parsed
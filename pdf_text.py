@@ -0,0 +1,134 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import PyPDF2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Documents shorter than this are parsed inline. The pool is started once and
+# kept warm, so after the first document a split only costs the per-worker
+# reopen of the file; 1-3 page resumes are not worth it, the 5-8 page papers
+# and datasheets in docs/ are.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "4"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or (os.cpu_count() or 1)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None or _executor._max_workers < workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        return _executor
+
+
+def shutdown_pdf_workers() -> None:
+    """
+    Stop the shared extraction process pool
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+atexit.register(shutdown_pdf_workers)
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int) -> list:
+    """
+    Extract the text of pages [start, stop) with a reader of its own
+
+    Args:
+        pdf_path (str): Path to the PDF
+        start (int): First page index
+        stop (int): Page index to stop before
+
+    Returns:
+        list: One text string per page
+    """
+    with open(pdf_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[index].extract_text() for index in range(start, stop)]
+
+
+def page_ranges(page_count: int, parts: int) -> list:
+    """
+    Split page indexes into at most parts contiguous, near-equal ranges
+
+    Args:
+        page_count (int): Number of pages
+        parts (int): Number of ranges wanted
+
+    Returns:
+        list: (start, stop) tuples in page order
+    """
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for part in range(parts):
+        stop = start + size + (1 if part < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def extract_pages_from_pdf(pdf_path: str, workers: Optional[int] = None,
+                           min_pages: Optional[int] = None) -> list:
+    """
+    Extract the text of every page, splitting long documents across processes
+
+    Each worker opens the file itself and parses a contiguous page range;
+    the ranges are reassembled in page order, so the result is identical to
+    a sequential pass.
+
+    Args:
+        pdf_path (str): Path to the PDF
+        workers (int): Processes to use (defaults to PDF_WORKERS)
+        min_pages (int): Page count from which to parallelize
+            (defaults to PDF_PARALLEL_MIN_PAGES)
+
+    Returns:
+        list: One text string per page, in page order
+    """
+    workers = workers or PDF_WORKERS
+    min_pages = PDF_PARALLEL_MIN_PAGES if min_pages is None else min_pages
+
+    with open(pdf_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        page_count = len(reader.pages)
+        if workers <= 1 or page_count < max(min_pages, 2):
+            return [page.extract_text() for page in reader.pages]
+
+    executor = _get_executor(workers)
+    futures = [
+        executor.submit(extract_page_range, pdf_path, start, stop)
+        for start, stop in page_ranges(page_count, workers)
+    ]
+    return [text for future in futures for text in future.result()]
+
+
+def extract_text_from_pdf(pdf_path: str, workers: Optional[int] = None,
+                          min_pages: Optional[int] = None) -> str:
+    """
+    Extract the full text of a PDF (see extract_pages_from_pdf)
+
+    Args:
+        pdf_path (str): Path to the PDF
+        workers (int): Processes to use (defaults to PDF_WORKERS)
+        min_pages (int): Page count from which to parallelize
+
+    Returns:
+        str: Full document text
+    """
+    return "".join(extract_pages_from_pdf(pdf_path, workers, min_pages))
@@ -0,0 +1,304 @@
+import difflib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RELATIONSHIP_REGISTRY_PATH = os.getenv("RELATIONSHIP_REGISTRY_PATH", "relationship_registry.json")
+# Most-used types offered to the model in the extraction prompt.
+RELATIONSHIP_VOCABULARY_LIMIT = int(os.getenv("RELATIONSHIP_VOCABULARY_LIMIT", "60"))
+# Types whose stemmed keys are at least this similar count as the same type.
+SYNONYM_SIMILARITY = float(os.getenv("RELATIONSHIP_SYNONYM_SIMILARITY", "0.92"))
+
+# Synonyms the extraction prompts already spell out; learned aliases are
+# added to the registry file next to them.
+SEED_SYNONYMS = {
+    "HAS_CONTRIBUTED": "HAS_AUTHORED",
+    "HAS_RESULTS": "HAS_FINDINGS",
+    "HAS_METHODOLOGY": "HAS_METHOD",
+    "CONTAINS_COMPONENT": "HAS_COMPONENT",
+    "HAS_SPECS": "HAS_SPECIFICATION",
+}
+# Types that mean another type read from its other end: (a)-[:AUTHORED_BY]->(b)
+# is written as (b)-[:HAS_AUTHORED]->(a).
+SEED_INVERSES = {
+    "AUTHORED_BY": "HAS_AUTHORED",
+}
+
+# Words that do not change what a relationship means ("HAS_SKILL" ~ "SKILL").
+# Prepositions stay in the key: they carry the direction, and dropping them
+# would fold CITED_BY into CITES or PART_OF into HAS_PART.
+_FILLER_WORDS = {"HAS", "HAVE", "IS", "WAS", "ARE", "THE", "A", "AN"}
+_DIRECTION_WORDS = {"BY", "OF", "TO", "FROM", "FOR", "IN", "ON", "AT", "WITH"}
+_SUFFIXES = ("INGS", "ING", "IES", "ED", "ES", "S")
+_CYPHER_TYPE_PATTERN = re.compile(r"(\[\s*\w*\s*:\s*)(`?)([A-Za-z_][A-Za-z0-9_]*)\2")
+_CYPHER_RELATIONSHIP_PATTERN = re.compile(
+    r"(<?-\s*)(\[\s*\w*\s*:\s*)(`?)([A-Za-z_][A-Za-z0-9_]*)\3([^\]]*\]\s*)(->|-)"
+)
+
+
+def clean_type(name: str) -> str:
+    """
+    Upper-case a relationship type and reduce it to [A-Z0-9_]
+
+    Args:
+        name (str): Relationship type as generated
+
+    Returns:
+        str: Cleaned type, e.g. "has skills" -> "HAS_SKILLS"
+    """
+    return re.sub(r"[^A-Z0-9]+", "_", name.upper()).strip("_")
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def type_key(name: str) -> str:
+    """
+    Key under which near-duplicate relationship types coincide
+
+    Args:
+        name (str): Relationship type
+
+    Returns:
+        str: Stemmed content words, e.g. "HAS_SKILLS" and "SKILL" -> "SKILL",
+            "AUTHORED_BY" -> "AUTHOR_BY"
+    """
+    words = [word for word in clean_type(name).split("_") if word]
+    content = [word for word in words if word not in _FILLER_WORDS] or words
+    return "_".join(_stem(word) for word in content)
+
+
+def _same_direction(key: str, other: str) -> bool:
+    return _DIRECTION_WORDS.intersection(key.split("_")) == _DIRECTION_WORDS.intersection(other.split("_"))
+
+
+class RelationshipRegistry:
+    def __init__(self, path: str = RELATIONSHIP_REGISTRY_PATH):
+        """
+        Distinct relationship types with usage counts, a synonym map and a
+        map of inverse types, persisted as JSON
+
+        Args:
+            path (str): Registry file
+        """
+        self.path = path
+        self.types: Dict[str, int] = {}
+        self.synonyms: Dict[str, str] = dict(SEED_SYNONYMS)
+        self.inverses: Dict[str, str] = dict(SEED_INVERSES)
+        self._lock = threading.RLock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.types.update(data.get("types", {}))
+            # Aliases learned before prepositions were part of the key may
+            # join inverse types (CITED_BY -> CITES); those are forgotten.
+            self.synonyms.update({
+                alias: canonical for alias, canonical in data.get("synonyms", {}).items()
+                if alias in SEED_SYNONYMS or _same_direction(type_key(alias), type_key(canonical))
+            })
+            self.inverses.update(data.get("inverses", {}))
+
+    def resolve(self, name: str) -> Tuple[str, bool]:
+        """
+        Map a generated type onto the registered type it duplicates
+
+        Known aliases resolve through the synonym and inverse maps; otherwise
+        the most used registered type with the same or a near-identical key
+        (and the same prepositions) wins and the alias is learned. Unmatched
+        types are returned cleaned.
+
+        Args:
+            name (str): Relationship type as generated
+
+        Returns:
+            tuple: (canonical relationship type, whether the canonical type
+                points the other way)
+        """
+        cleaned = clean_type(name)
+        reversed_ = False
+        if not cleaned:
+            return cleaned, reversed_
+        with self._lock:
+            seen = set()
+            while cleaned not in seen and (cleaned in self.synonyms or cleaned in self.inverses):
+                seen.add(cleaned)
+                if cleaned in self.synonyms:
+                    cleaned = self.synonyms[cleaned]
+                else:
+                    cleaned, reversed_ = self.inverses[cleaned], not reversed_
+            if cleaned in self.types:
+                return cleaned, reversed_
+
+            key = type_key(cleaned)
+            candidates = [
+                registered for registered in self.types
+                if type_key(registered) == key
+                or (_same_direction(type_key(registered), key)
+                    and difflib.SequenceMatcher(None, type_key(registered), key).ratio() >= SYNONYM_SIMILARITY)
+            ]
+            if not candidates:
+                return cleaned, reversed_
+            canonical = max(candidates, key=lambda registered: self.types[registered])
+            self.synonyms[cleaned] = canonical
+            return canonical, reversed_
+
+    def normalize(self, name: str) -> str:
+        """
+        Canonical type of a generated type (see resolve)
+
+        Args:
+            name (str): Relationship type as generated
+
+        Returns:
+            str: Canonical relationship type
+        """
+        return self.resolve(name)[0]
+
+    def normalize_all(self, names: List[str]) -> List[str]:
+        """
+        Normalize a list of types, dropping duplicates and keeping order
+
+        Args:
+            names (list): Relationship types as generated
+
+        Returns:
+            list: Canonical relationship types
+        """
+        return list(dict.fromkeys(filter(None, (self.normalize(name) for name in names))))
+
+    def rewrite_cypher(self, query: str) -> str:
+        """
+        Replace every relationship type in a Cypher query with its canonical type
+
+        A type recorded as the inverse of its canonical type also has its
+        arrow turned around, so the edge keeps its meaning.
+
+        Args:
+            query (str): Generated Cypher query
+
+        Returns:
+            str: Query with canonical relationship types
+        """
+        def replace(match):
+            left, opening, quote, name, rest, right = match.groups()
+            canonical, reversed_ = self.resolve(name)
+            if reversed_:
+                if "|" in rest:
+                    # One arrow cannot serve alternatives of both directions.
+                    return match.group()
+                if left.startswith("<") and right == "-":
+                    left, right = left[1:], "->"
+                elif not left.startswith("<") and right == "->":
+                    left, right = "<" + left, "-"
+            return f"{left}{opening}{quote}{canonical}{quote}{rest}{right}"
+
+        return _CYPHER_RELATIONSHIP_PATTERN.sub(replace, query)
+
+    def register(self, names: List[str]) -> None:
+        """
+        Count one use of each type (repeat a type to count it more often)
+
+        Args:
+            names (list): Relationship types, normalized or not
+        """
+        with self._lock:
+            for name in names:
+                canonical = self.normalize(name)
+                if canonical:
+                    self.types[canonical] = self.types.get(canonical, 0) + 1
+
+    def register_cypher(self, queries: List[str]) -> None:
+        """
+        Count the relationship types the given Cypher queries create
+
+        Args:
+            queries (list): Executed Cypher queries
+        """
+        self.register([match.group(3) for query in queries for match in _CYPHER_TYPE_PATTERN.finditer(query)])
+
+    def sync_from_graph(self, connection) -> None:
+        """
+        Load type counts from the graph, e.g. for a registry file that does not exist yet
+
+        Args:
+            connection: Connection from graph_backend.create_connection
+        """
+        query = "MATCH ()-[r]->() RETURN type(r) AS type, count(r) AS uses"
+        records = connection.query(query) or []
+        with self._lock:
+            for record in records:
+                self.types[record["type"]] = max(self.types.get(record["type"], 0), record["uses"])
+
+    def vocabulary(self, limit: Optional[int] = RELATIONSHIP_VOCABULARY_LIMIT) -> List[str]:
+        """
+        Registered types, most used first
+
+        Args:
+            limit (int): Maximum number of types (None for all)
+
+        Returns:
+            list: Relationship types
+        """
+        with self._lock:
+            ranked = sorted(self.types, key=lambda name: (-self.types[name], name))
+        return ranked[:limit] if limit else ranked
+
+    def format_vocabulary(self, limit: Optional[int] = RELATIONSHIP_VOCABULARY_LIMIT) -> str:
+        """
+        Render the vocabulary for the extraction prompt
+
+        Args:
+            limit (int): Maximum number of types (None for all)
+
+        Returns:
+            str: Comma separated types, most used first ("none" when empty)
+        """
+        return ", ".join(self.vocabulary(limit)) or "none"
+
+    def save(self) -> None:
+        """
+        Write the registry atomically
+        """
+        with self._lock:
+            data = {
+                "types": dict(sorted(self.types.items())),
+                "synonyms": dict(sorted(self.synonyms.items())),
+                "inverses": dict(sorted(self.inverses.items())),
+            }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, delete=False, suffix=".tmp") as file:
+            json.dump(data, file, indent=2)
+        os.replace(file.name, self.path)
+
+
+_registries: Dict[str, RelationshipRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_relationship_registry(path: Optional[str] = None) -> RelationshipRegistry:
+    """
+    Return the shared registry for a file, loading it on first use
+
+    Args:
+        path (str): Registry file (defaults to RELATIONSHIP_REGISTRY_PATH)
+
+    Returns:
+        RelationshipRegistry: Registry
+    """
+    path = os.path.abspath(path or RELATIONSHIP_REGISTRY_PATH)
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = RelationshipRegistry(path)
+        return _registries[path]
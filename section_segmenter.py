@@ -0,0 +1,208 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Heading spellings per document class, keyed by the section name they map to.
+# A heading only counts on a line of its own (optionally numbered or bulleted,
+# optionally ending in a colon with nothing after it) written in capitals or
+# title case, so the same words in body text or in a "Tools: Git, Docker"
+# line do not split sections.
+SECTION_HEADINGS = {
+    "RESUME": {
+        "summary": ["summary", "professional summary", "profile", "professional profile", "about me",
+                    "objective", "career objective", "career summary"],
+        "education": ["education", "academic background", "academic qualifications", "qualifications",
+                      "education and training", "academics"],
+        "experience": ["experience", "work experience", "professional experience", "employment",
+                       "employment history", "work history", "career history", "relevant experience"],
+        "skills": ["skills", "technical skills", "core skills", "key skills", "core competencies",
+                   "competencies", "skills and tools", "skills & tools", "technologies", "tools"],
+        "projects": ["projects", "personal projects", "key projects", "academic projects"],
+        "certifications": ["certifications", "certificates", "licenses and certifications",
+                           "licenses & certifications", "courses", "training"],
+        "publications": ["publications", "research", "papers"],
+        "awards": ["awards", "honors", "honours", "achievements", "awards and honors"],
+        "languages": ["languages"],
+        "interests": ["interests", "hobbies", "hobbies and interests"],
+        "references": ["references", "referees"],
+    },
+    "SCIENCE_ARTICLE": {
+        "abstract": ["abstract", "summary"],
+        "introduction": ["introduction"],
+        "background": ["background", "related work", "literature review", "prior work"],
+        "methods": ["methods", "method", "methodology", "materials and methods", "approach",
+                    "proposed method", "experimental setup", "experiments", "experiment"],
+        "results": ["results", "findings", "evaluation", "results and discussion"],
+        "discussion": ["discussion", "analysis"],
+        "conclusion": ["conclusion", "conclusions", "conclusion and future work", "future work"],
+        "acknowledgements": ["acknowledgements", "acknowledgments", "acknowledgement", "acknowledgment"],
+        "references": ["references", "bibliography"],
+        "appendix": ["appendix", "appendices", "supplementary material"],
+    },
+    "TECHNICAL_DOCUMENT": {
+        "overview": ["overview", "introduction", "description", "general description", "scope"],
+        "specifications": ["specifications", "specification", "technical specifications",
+                           "technical data", "parameters", "ratings"],
+        "components": ["components", "architecture", "design", "system design", "parts list"],
+        "installation": ["installation", "setup", "getting started", "requirements", "prerequisites"],
+        "usage": ["usage", "operation", "instructions", "procedure", "calculations"],
+        "configuration": ["configuration", "settings"],
+        "maintenance": ["maintenance", "troubleshooting", "safety"],
+        "conclusion": ["conclusion", "conclusions", "summary"],
+        "references": ["references", "bibliography"],
+    },
+}
+
+# Section holding the text before the first heading (name, contact, title).
+LEAD_SECTION = "header"
+# A lead section longer than this has probably swallowed headings the
+# patterns missed.
+LEAD_MAX_CHARS = 800
+# Shortest plausible body per section; a shorter one is more likely a heading
+# word matched in a list than a real section.
+MIN_SECTION_CHARS = {"header": 15, "skills": 15, "languages": 5, "interests": 5}
+DEFAULT_MIN_SECTION_CHARS = 40
+# A section holding more than this share of the document has probably
+# swallowed headings the patterns missed (experience alone commonly holds
+# three quarters of a resume).
+DOMINANT_SHARE = 0.85
+# A body this many times smaller than the next section's, and shorter than
+# SMALL_SECTION_FACTOR times its minimum, has probably lost its text to it
+# (a sub-heading mistaken for the next section).
+NEIGHBOUR_RATIO = 20
+SMALL_SECTION_FACTOR = 2
+# Spellings that also title blocks inside a section, e.g. "Projects" under
+# each job; while that section is open they only start a new one in capitals.
+NESTED_HEADINGS = {
+    "experience": {"projects", "research", "tools", "training", "courses", "technologies", "papers"},
+}
+# Words a title-case heading may leave in lower case.
+_MINOR_WORDS = {"and", "&", "of", "the", "for", "in"}
+
+
+@lru_cache(maxsize=None)
+def _heading_pattern(doc_class: str) -> re.Pattern:
+    if doc_class not in SECTION_HEADINGS:
+        raise ValueError("Invalid document class provided.")
+    alternatives = []
+    for index, (section, spellings) in enumerate(SECTION_HEADINGS[doc_class].items()):
+        words = sorted(spellings, key=len, reverse=True)
+        names = "|".join(r"\s+".join(re.escape(word) for word in spelling.split()) for spelling in words)
+        alternatives.append(f"(?P<s{index}>{names})")
+    # Anchored on the newline before a heading so the scan skips ahead to
+    # line breaks instead of trying the pattern at every character.
+    return re.compile(
+        r"\n[ \t]*(?:[#*•▪\-]+[ \t]*)?(?:(?:\d+(?:\.\d+)*|[IVX]+)\.?[ \t]+)?"
+        rf"(?:{'|'.join(alternatives)})"
+        r"[ \t]*:?[ \t]*$",
+        re.IGNORECASE | re.MULTILINE,
+    )
+
+
+def _heading_like(heading: str) -> bool:
+    words = heading.split()
+    return heading.isupper() or all(word[0].isupper() or word.lower() in _MINOR_WORDS for word in words)
+
+
+def find_sections(text: str, doc_class: str) -> List[Tuple[str, int, int]]:
+    """
+    Locate the sections of a document in one scan over its text
+
+    Args:
+        text (str): Full document text
+        doc_class (str): Key of SECTION_HEADINGS, e.g. "RESUME"
+
+    Returns:
+        list: (section, start, end) spans of the section bodies in document
+            order, headings excluded; text before the first heading is the
+            LEAD_SECTION span
+    """
+    sections = list(SECTION_HEADINGS[doc_class]) if doc_class in SECTION_HEADINGS else []
+    spans = []
+    section, start = LEAD_SECTION, 0
+    for match in _heading_pattern(doc_class).finditer("\n" + text):
+        heading = match.group(match.lastgroup)
+        if not _heading_like(heading):
+            continue
+        if " ".join(heading.lower().split()) in NESTED_HEADINGS.get(section, ()) and not heading.isupper():
+            continue
+        spans.append((section, start, match.start()))
+        section, start = sections[int(match.lastgroup[1:])], match.end() - 1
+    spans.append((section, start, len(text)))
+    return [span for span in spans if text[span[1]:span[2]].strip()]
+
+
+def segment(text: str, doc_class: str) -> Dict[str, str]:
+    """
+    Split a document into its sections
+
+    Repeated headings (e.g. a second "Projects" block) are joined under one
+    section name.
+
+    Args:
+        text (str): Full document text
+        doc_class (str): Key of SECTION_HEADINGS, e.g. "RESUME"
+
+    Returns:
+        dict: Section name -> section text, in document order
+    """
+    sections: Dict[str, str] = {}
+    for section, start, end in find_sections(text, doc_class):
+        body = text[start:end].strip()
+        sections[section] = f"{sections[section]}\n\n{body}" if section in sections else body
+    return sections
+
+
+def score_sections(text: str, doc_class: str, required: Tuple[str, ...] = ()) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """
+    Segment a document and rate how much each section can be trusted
+
+    A section found under a single heading with a plausible amount of text
+    scores 1.0 and short bodies or repeated headings score a little lower.
+    Splits that look wrong score below 0.7: a section holding nearly the
+    whole document (DOMINANT_SHARE) or a small one followed by a section many
+    times its size (NEIGHBOUR_RATIO). Required sections that were not found
+    score 0.0.
+
+    Args:
+        text (str): Full document text
+        doc_class (str): Key of SECTION_HEADINGS, e.g. "RESUME"
+        required (tuple): Sections to score even when they were not found
+
+    Returns:
+        tuple: (section name -> text, section name -> confidence in [0, 1])
+    """
+    spans = find_sections(text, doc_class)
+    headings = Counter(section for section, _, _ in spans)
+    sections = segment(text, doc_class)
+    total = max(len(text.strip()), 1)
+
+    dwarfed = set()
+    for (section, start, end), (following, next_start, next_end) in zip(spans, spans[1:]):
+        size = len(text[start:end].strip())
+        minimum = MIN_SECTION_CHARS.get(section, DEFAULT_MIN_SECTION_CHARS)
+        if section != LEAD_SECTION and following != section and size < SMALL_SECTION_FACTOR * minimum \
+                and len(text[next_start:next_end].strip()) >= NEIGHBOUR_RATIO * max(size, 1):
+            dwarfed.add(section)
+
+    scores = {}
+    for section in dict.fromkeys([*sections, *required]):
+        body = sections.get(section, "")
+        if not body:
+            scores[section] = 0.0
+            continue
+        if section == LEAD_SECTION:
+            score = 0.9 if len(body) <= LEAD_MAX_CHARS else 0.4
+        else:
+            score = 0.5
+            if len(body) >= MIN_SECTION_CHARS.get(section, DEFAULT_MIN_SECTION_CHARS):
+                score += 0.3
+            if headings[section] == 1:
+                score += 0.2
+        if len(body) / total > DOMINANT_SHARE:
+            score -= 0.5
+        if section in dwarfed:
+            score -= 0.4
+        scores[section] = round(max(score, 0.0), 2)
+    return sections, scores
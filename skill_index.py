@@ -0,0 +1,141 @@
+import re
+from typing import Iterable
+
+from graph_schema import SKILL_INDEX_LABEL, SKILL_INDEX_REL, SKILL_FULLTEXT_INDEX
+from graph_search import build_lucene_query
+
+# Relationship types the LLM extractors use to attach skills to a person.
+SKILL_RELATIONSHIPS = ["HAS_SKILLS", "HAS_SKILL"]
+
+
+def normalize_skill_key(skill: str) -> str:
+    """
+    Normalize a skill string into the key shared by all its spellings
+
+    Args:
+        skill (str): Skill as extracted, e.g. " Python "
+
+    Returns:
+        str: Lowercased, whitespace-collapsed key, e.g. "python"
+    """
+    return re.sub(r"\s+", " ", skill).strip().lower()
+
+
+def index_person_skills(neo4j_connection, person_name: str, skills: Iterable[str],
+                        file_name: str) -> None:
+    """
+    Maintain the materialized skill -> person mapping for one document
+
+    Each (PERSON)-[:HAS_SKILL_INDEX]->(SKILL_INDEX) edge keeps the files that
+    mention the skill for that person, a mention count and when it was last
+    seen; each SKILL_INDEX node keeps its spellings and how many people have it.
+    Re-processing the same file leaves the counts unchanged.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to write with
+        person_name (str): Name of the person (the document's root entity)
+        skills (Iterable[str]): Skills extracted from the document
+        file_name (str): Name of the source file
+    """
+    rows = {}
+    for skill in skills:
+        if not skill or not skill.strip():
+            continue
+        key = normalize_skill_key(skill)
+        rows.setdefault(key, {"key": key, "name": skill.strip()})
+    if not person_name or not rows:
+        return
+
+    query = f"""
+    MERGE (p:PERSON {{ name: $person_name }})
+    WITH p
+    UNWIND $rows AS row
+    MERGE (s:{SKILL_INDEX_LABEL} {{ key: row.key }})
+    ON CREATE SET s.name = row.name, s.aliases = [row.name]
+    SET s.aliases = CASE
+            WHEN row.name IN s.aliases THEN s.aliases
+            ELSE s.aliases + row.name
+        END
+    SET s.alias_text = reduce(text = '', alias IN s.aliases | text + ' | ' + alias)
+    MERGE (p)-[k:{SKILL_INDEX_REL}]->(s)
+    SET k.files = CASE
+            WHEN $file_name IN coalesce(k.files, []) THEN k.files
+            ELSE coalesce(k.files, []) + $file_name
+        END
+    SET k.count = size(k.files),
+        k.last_seen = datetime()
+    WITH s
+    MATCH (s)<-[:{SKILL_INDEX_REL}]-(holder:PERSON)
+    WITH s, count(holder) AS person_count
+    SET s.person_count = person_count
+    """
+    neo4j_connection.write_transaction(
+        query,
+        {"person_name": person_name, "rows": list(rows.values()), "file_name": file_name},
+    )
+
+
+def index_skills_from_graph(neo4j_connection, root_entity_name: str, file_name: str) -> None:
+    """
+    Materialize skills the LLM linked to a root entity with HAS_SKILLS edges
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to use
+        root_entity_name (str): Name of the person entity
+        file_name (str): Name of the source file
+    """
+    query = """
+    MATCH (person:Entity { name: $root_entity_name })-[r]->(skill)
+    WHERE type(r) IN $skill_relationships AND skill.name IS NOT NULL
+    RETURN DISTINCT skill.name AS skill
+    """
+    records = neo4j_connection.query(
+        query,
+        {"root_entity_name": root_entity_name, "skill_relationships": SKILL_RELATIONSHIPS},
+    ) or []
+    index_person_skills(neo4j_connection, root_entity_name, [record["skill"] for record in records], file_name)
+
+
+def rank_people_for_skill(neo4j_connection, skill: str, top_k: int = 3) -> list:
+    """
+    Rank people for a skill with one lookup in the skill index
+
+    Skill words are matched as whole terms, without the prefix expansion of
+    interactive search, so "java" does not count JavaScript experience.
+
+    Args:
+        neo4j_connection (Neo4jConnection): Connection to query with
+        skill (str): Skill to rank for, e.g. "python"
+        top_k (int): Number of people to return
+
+    Returns:
+        list: Dicts with person, relevance, mentions, last_seen and the
+            matched skill spellings, best first
+    """
+    lucene_query = build_lucene_query(skill, prefix=False)
+    if not lucene_query:
+        return []
+
+    query = f"""
+    CALL db.index.fulltext.queryNodes($index, $lucene_query) YIELD node AS s, score
+    MATCH (p:PERSON)-[k:{SKILL_INDEX_REL}]->(s)
+    WITH p, sum(score * k.count) AS relevance, sum(k.count) AS mentions,
+         max(k.last_seen) AS last_seen, collect(s.name) AS skills
+    RETURN p.name AS person, relevance, mentions, last_seen, skills
+    ORDER BY relevance DESC, mentions DESC, last_seen DESC
+    LIMIT $top_k
+    """
+    records = neo4j_connection.query(
+        query,
+        {"index": SKILL_FULLTEXT_INDEX, "lucene_query": lucene_query, "top_k": int(top_k)},
+    ) or []
+    return [
+        {
+            "person": record["person"],
+            "relevance": record["relevance"],
+            "mentions": record["mentions"],
+            "last_seen": record["last_seen"],
+            "skills": list(record["skills"]),
+        }
+        for record in records
+    ]
@@ -0,0 +1,262 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+from dotenv import load_dotenv
+
+from graph_backend import BatchWriteError
+from output_repair import load_lenient_json
+
+load_dotenv()
+
+# Rows per UNWIND transaction, and how long a partial batch may wait before
+# it is written anyway.
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "25"))
+STREAM_FLUSH_SECONDS = float(os.getenv("STREAM_FLUSH_SECONDS", "0.5"))
+STREAMING_EXTRACTION = os.getenv("EXTRACTION_STREAMING", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+class StreamingJSONParser:
+    def __init__(self):
+        """
+        Incremental parser for the top-level object of a model's JSON output
+
+        feed() returns events as soon as they are complete:
+        ("field", key, value) for scalar members, ("item", key, value) for each
+        element of an array member and ("end", key, None) when the array closes.
+        Code fences and prose before the object are skipped, and single-quoted
+        strings are accepted.
+        """
+        self.buffer = ""
+        self.position = 0
+        self.started = False
+        self.depth = 0
+        self.quote = None
+        self.pending_close = False
+        self.key = None
+        self.expect = "key"
+        self.value_start = None
+        self.in_array = False
+
+    def _emit_value(self, end: int, events: list, kind: str) -> None:
+        text = self.buffer[self.value_start:end].strip()
+        self.value_start = None
+        if not text:
+            return
+        try:
+            value = load_lenient_json(text)
+        except ValueError:
+            value = text.strip("'\"")
+        if kind == "key":
+            self.key = value if isinstance(value, str) else str(value)
+            return
+        events.append((kind, self.key, value))
+
+    def feed(self, text: str) -> list:
+        """
+        Consume more model output
+
+        Args:
+            text (str): Next piece of the completion
+
+        Returns:
+            list: Events completed by this piece
+        """
+        self.buffer += text
+        events = []
+        while self.position < len(self.buffer):
+            index = self.position
+            char = self.buffer[index]
+            self.position += 1
+
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.quote:
+                # A single quote only ends a string when structure follows it,
+                # so the decision waits for the next non-space character.
+                if self.pending_close:
+                    if char.isspace():
+                        continue
+                    self.pending_close = False
+                    if char in ",:]}":
+                        self.quote = None
+                if self.quote:
+                    if char == "\\":
+                        self.position += 1
+                    elif char == self.quote:
+                        if self.quote == '"':
+                            self.quote = None
+                        else:
+                            self.pending_close = True
+                    continue
+
+            if char in "'\"":
+                self.quote = char
+                if self.value_start is None:
+                    self.value_start = index
+            elif char in "{[":
+                if self.depth == 1 and self.expect == "value" and char == "[":
+                    self.in_array = True
+                elif self.value_start is None:
+                    self.value_start = index
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1 and self.in_array:
+                    if self.value_start is not None:
+                        self._emit_value(index, events, "item")
+                    events.append(("end", self.key, None))
+                    self.in_array = False
+                    self.expect = "comma"
+                elif self.depth == 0:
+                    if self.expect == "value" and self.value_start is not None:
+                        self._emit_value(index, events, "field")
+                    self.started = False
+                    self.position = len(self.buffer)
+                    break
+            elif self.depth == 1 and char == ":" and self.expect == "key":
+                self._emit_value(index, events, "key")
+                self.expect = "value"
+            elif self.depth == 1 and char == ",":
+                if self.expect == "value" and self.value_start is not None:
+                    self._emit_value(index, events, "field")
+                self.expect = "key"
+            elif self.depth == 2 and self.in_array and char == ",":
+                if self.value_start is not None:
+                    self._emit_value(index, events, "item")
+            elif not char.isspace() and self.value_start is None:
+                self.value_start = index
+        return events
+
+    def close(self) -> list:
+        """
+        Flush a value left open by output that was cut off
+
+        Returns:
+            list: Remaining events
+        """
+        events = []
+        if self.pending_close:
+            self.quote = None
+            self.pending_close = False
+        if self.started and not self.quote and self.value_start is not None:
+            if self.in_array:
+                self._emit_value(len(self.buffer), events, "item")
+            elif self.expect == "value":
+                self._emit_value(len(self.buffer), events, "field")
+        return events
+
+
+class BatchedGraphWriter:
+    def __init__(self, neo4j_connection, batch_size: int = STREAM_BATCH_SIZE,
+                 flush_seconds: float = STREAM_FLUSH_SECONDS):
+        """
+        Background writer that groups rows per UNWIND query into batches
+
+        Rows are written by a worker thread while the caller keeps producing
+        them, so extraction and persistence overlap.
+
+        Args:
+            neo4j_connection (Neo4jConnection): Connection with write_batch
+            batch_size (int): Rows per transaction
+            flush_seconds (float): Longest time a partial batch waits
+        """
+        self.connection = neo4j_connection
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_failed = 0
+        self.batches_failed = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="graph-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, query: str, row: dict) -> None:
+        """
+        Queue one row for a query reading its input from $rows
+
+        Args:
+            query (str): UNWIND $rows AS row ... query
+            row (dict): Parameter map of the row
+        """
+        self._queue.put((query, row))
+
+    def _write(self, query: str, rows: List[dict]) -> None:
+        try:
+            self.batches_written += self.connection.write_batch(query, rows, self.batch_size)
+            self.rows_written += len(rows)
+        except BatchWriteError as e:
+            # Keep the worker alive so the remaining rows are still written.
+            self.batches_written += e.batches - e.failed
+            self.rows_written += len(rows) - e.failed_rows
+            self.batches_failed += e.failed
+            self.rows_failed += e.failed_rows
+
+    def _flush(self, pending: Dict[str, List[dict]]) -> None:
+        for query, rows in pending.items():
+            if rows:
+                self._write(query, rows)
+        pending.clear()
+
+    def _run(self) -> None:
+        pending: Dict[str, List[dict]] = {}
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush(pending)
+                deadline = None
+                continue
+            if item is None:
+                self._flush(pending)
+                return
+            query, row = item
+            rows = pending.setdefault(query, [])
+            rows.append(row)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_seconds
+            if len(rows) >= self.batch_size:
+                self._write(query, rows)
+                del pending[query]
+                if not pending:
+                    deadline = None
+
+    def close(self) -> None:
+        """
+        Write everything still queued and stop the worker
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+
+def stream_completion(chain, inputs: dict, on_event: Callable[[tuple], None]) -> str:
+    """
+    Run a prompt | llm chain in streaming mode, reporting parse events as they complete
+
+    Args:
+        chain: Runnable producing message chunks or strings
+        inputs (dict): Chain inputs
+        on_event (Callable): Called with each StreamingJSONParser event
+
+    Returns:
+        str: The full completion text
+    """
+    parser = StreamingJSONParser()
+    parts = []
+    for chunk in chain.stream(inputs):
+        text = chunk.content if hasattr(chunk, "content") else str(chunk)
+        parts.append(text)
+        for event in parser.feed(text):
+            on_event(event)
+    for event in parser.close():
+        on_event(event)
+    return "".join(parts)
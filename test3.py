@@ -1,4 +1,4 @@
-from neo4j import GraphDatabase
+from connection_manager import get_connection_manager
 import os
 import pandas as pd
 
@@ -11,14 +11,15 @@ AURA_INSTANCENAME='Instance01'
 # Define the database connection class
 class Neo4jConnection:
     def __init__(self, uri, user, password):
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
+        self._manager = get_connection_manager(uri, user, password)
 
     def close(self):
-        self._driver.close()
+        # The pooled driver is shared; it is closed by close_all_connections() at exit.
+        self._manager = None
 
     def run_query(self, query, parameters=None):
-        with self._driver.session() as session:
-            return session.run(query, parameters)
+        with self._manager.session() as session:
+            return list(session.run(query, parameters))
 
 # Connection parameters
 uri = NEO4J_URI  # Change if needed
@@ -1,12 +1,14 @@
-from neo4j import GraphDatabase, TrustSystemCAs  # Add TrustSystemCAs import
+from neo4j import TrustSystemCAs  # Add TrustSystemCAs import
 from typing import Union
 
 import os
 
+from connection_manager import get_connection_manager
+
 class Neo4jConnection:
     def __init__(self, uri: str, username: str, password: str, database: str = "neo4j"):
         """
-        Initialize Neo4j connection
+        Initialize Neo4j connection on top of the shared connection manager
         
         Args:
             uri (str): Neo4j URI (e.g., "bolt://localhost:7687")
@@ -18,36 +20,19 @@ class Neo4jConnection:
         self.username = username
         self.password = password
         self.database = database
-        self.driver = None
-        self._connect()
-        
-    def _connect(self):
-        """Establish connection to Neo4j"""
-        try:
-            self.driver = GraphDatabase.driver(
-                self.uri,
-                auth=(self.username, self.password),
-                trusted_certificates=TrustSystemCAs()  # Changed to TrustSystemCAs()
-            )
-            # Verify connection is working
-            with self.driver.session(database=self.database) as session:
-                session.run("RETURN 1").single()
-            print("Connection to Neo4j DB successful")
-        except Exception as e:
-            self.driver = None
-            raise Exception(f"Failed to connect to Neo4j DB: {e}")
+        self.manager = get_connection_manager(
+            uri, username, password, database,
+            trusted_certificates=TrustSystemCAs()  # Changed to TrustSystemCAs()
+        )
+        self.ensure_connection()
     
     def close(self):
-        """Close the Neo4j driver connection"""
-        if self.driver is not None:
-            self.driver.close()
-            self.driver = None
-            print("Neo4j connection closed")
+        """Release the connection; the pooled driver is closed at exit"""
+        self.manager = None
     
     def ensure_connection(self):
-        """Ensure driver is initialized, attempt reconnection if necessary"""
-        if self.driver is None:
-            self._connect()
+        """Ensure the shared driver is initialized, connecting with backoff if necessary"""
+        self.manager.driver
         
     def query(self, query: str, parameters: dict = None) -> Union[list, None]:
         """
@@ -61,21 +46,15 @@ class Neo4jConnection:
             list: Query results or None if error occurs
         """
         self.ensure_connection()
-        session = None
-        response = None
         
         try:
-            session = self.driver.session(database=self.database)
-            result = session.run(query, parameters or {})
-            response = [record.data() for record in result]
+            return self.manager.run_with_retry(
+                lambda session: [record.data() for record in session.run(query, parameters or {})],
+                database=self.database
+            )
         except Exception as e:
             print(f"Query failed: {e}")
             raise
-        finally:
-            if session is not None:
-                session.close()
-        
-        return response
 
     def write_transaction(self, query: str, parameters: dict = None):
         """
@@ -86,19 +65,13 @@ class Neo4jConnection:
             parameters (dict): Query parameters (optional)
         """
         self.ensure_connection()
-        session = None
         
         try:
-            session = self.driver.session(database=self.database)
-            session.execute_write(
-                lambda tx: tx.run(query, parameters or {})
-            )
+            with self.manager.session(database=self.database) as session:
+                session.execute_write(lambda tx: tx.run(query, parameters or {}).consume())
         except Exception as e:
             print(f"Write transaction failed: {e}")
             raise
-        finally:
-            if session is not None:
-                session.close()
 
 # Usage example with proper error handling
 try:
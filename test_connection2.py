@@ -1,4 +1,4 @@
-from neo4j import GraphDatabase
+from connection_manager import get_connection_manager
 
 import os
 
@@ -14,14 +14,11 @@ RETURN n
 """
 
 def main():
-    # Create a driver instance
-    driver = GraphDatabase.driver(
-        NEO4J_URI, 
-        auth=(NEO4J_USERNAME, NEO4J_PASSWORD)
-    )
+    # Borrow the shared pooled driver
+    manager = get_connection_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
 
     # Open a session
-    with driver.session() as session:
+    with manager.session() as session:
         # Run the test query
         result = session.run(test_query)
         for record in result:
@@ -30,7 +27,7 @@ def main():
             print(f"Created or updated node: {person_node}")
 
     # Close the driver connection
-    driver.close()
+    manager.close()
 
 if __name__ == "__main__":
     main()
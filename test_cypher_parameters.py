@@ -0,0 +1,42 @@
+import pytest
+
+from cypher_parameters import PlanCacheStats, parameterize
+
+
+@pytest.mark.parametrize("query, statement, parameters", [
+    ("RETURN .5, 0x1F", "RETURN $p0, $p1", {"p0": 0.5, "p1": 31}),
+    ("RETURN 0o17, 0XfF", "RETURN $p0, $p1", {"p0": 15, "p1": 255}),
+    ("RETURN 1.5e3, 2E-2, 7", "RETURN $p0, $p1, $p2", {"p0": 1500.0, "p1": 0.02, "p2": 7}),
+    ("RETURN [.25, 3]", "RETURN [$p0, $p1]", {"p0": 0.25, "p1": 3}),
+])
+def test_number_shapes_are_lifted_whole(query, statement, parameters):
+    assert parameterize(query) == (statement, parameters)
+
+
+def test_range_bounds_stay_literal():
+    statement, parameters = parameterize("MATCH (a)-[*1..3]->(b) RETURN b LIMIT 5")
+    assert statement == "MATCH (a)-[*1..3]->(b) RETURN b LIMIT $p0"
+    assert parameters == {"p0": 5}
+
+
+def test_statements_differing_only_in_values_share_a_shape():
+    first = parameterize("match (p:Person {name: 'Ada'}) return p.age + 1")
+    second = parameterize("MATCH (p:Person {name:\"Grace\"})  RETURN p.age + 2 // comment")
+    assert first[0] == second[0]
+    assert first[1] == {"p0": "Ada", "p1": 1}
+    assert second[1] == {"p0": "Grace", "p1": 2}
+
+
+def test_existing_parameters_are_not_reused():
+    statement, parameters = parameterize("MATCH (n {name: $p0}) SET n.age = 3", {"p0": "x"})
+    assert statement == "MATCH (n {name: $p0}) SET n.age = $p1"
+    assert parameters == {"p0": "x", "p1": 3}
+
+
+def test_plan_cache_stats_count_repeated_shapes():
+    stats = PlanCacheStats(capacity=1)
+    assert not stats.record("RETURN $p0", 1)
+    assert stats.record("RETURN $p0", 1)
+    assert not stats.record("RETURN $p0, $p1", 2)
+    assert not stats.record("RETURN $p0", 1)
+    assert stats.report()["hits"] == 1
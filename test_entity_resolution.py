@@ -0,0 +1,46 @@
+import pytest
+
+from entity_resolution import EntityResolver, normalize_entity
+from graph_schema import bootstrap_schema
+from memory_graph import InMemoryGraphConnection
+
+
+@pytest.mark.parametrize("stored, extracted", [
+    ("Windows 10", "Windows 11"),
+    ("SQL Server 2019", "SQL Server 2022"),
+    ("Python", "Python 2.7"),
+    ("Software Engineer", "Software Engineering"),
+    ("Java", "JavaScript"),
+])
+def test_different_entities_are_not_merged(stored, extracted):
+    resolver = EntityResolver()
+    resolver.add(stored)
+    assert resolver.resolve(extracted) == extracted
+
+
+@pytest.mark.parametrize("stored, extracted", [
+    ("JavaScript", "Javascript"),
+    ("Machine Learning", "Machine Lerning"),
+    ("Python", "python (Advanced)"),
+    ("English", "English - Fluent"),
+])
+def test_spellings_are_merged(stored, extracted):
+    resolver = EntityResolver()
+    resolver.add(stored)
+    assert resolver.resolve(extracted) == stored
+
+
+def test_versions_are_kept():
+    assert normalize_entity("Python 3 (Advanced)") == "python 3"
+
+
+def test_from_graph_reads_candidates_through_the_index():
+    connection = InMemoryGraphConnection("memory://test-entity-resolution")
+    bootstrap_schema(connection, force=True)
+    connection.write_batch("UNWIND $rows AS row CREATE (:ITEM { name: row.name })",
+                           [{"name": f"Skill {index}"} for index in range(500)] + [{"name": "TensorFlow"}])
+
+    resolver = EntityResolver.from_graph(connection, "ITEM")
+    assert resolver.resolve_all(["Tensorflow", "PyTorch"]) == ["TensorFlow", "PyTorch"]
+    # Only the index hits were loaded, not the whole label.
+    assert len(resolver.aliases) < 10
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from graph_export import export_graph, import_graph
+from memory_graph import InMemoryGraphConnection
+
+
+def test_round_trip_keeps_temporal_values(tmp_path):
+    source = InMemoryGraphConnection("memory://test-export-source")
+    created = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    source.write_transaction(
+        "CREATE (f:File {name: 'resume.pdf', created_at: $created, pages: 2})"
+        "-[:HAS_SECTION {seen: [$created, datetime()]}]->(:Section {name: 'Skills'})",
+        {"created": created},
+    )
+    path = str(tmp_path / "graph.jsonl.gz")
+    export_graph(source, path)
+
+    target = InMemoryGraphConnection("memory://test-export-target")
+    import_graph(target, path)
+    record = target.query(
+        "MATCH (f:File)-[r:HAS_SECTION]->(s:Section) "
+        "RETURN f.created_at AS created, f.pages AS pages, r.seen AS seen, s.name AS section"
+    )[0]
+    assert record["created"] == created
+    assert record["pages"] == 2
+    assert record["section"] == "Skills"
+    assert record["seen"][0] == created and isinstance(record["seen"][1], datetime)
+
+
+def test_failed_cleanup_is_raised(tmp_path):
+    source = InMemoryGraphConnection("memory://test-export-cleanup-source")
+    source.write_transaction("CREATE (:File {name: 'resume.pdf'})")
+    path = str(tmp_path / "graph.jsonl")
+    export_graph(source, path)
+
+    target = InMemoryGraphConnection("memory://test-export-cleanup-target")
+    write_transaction = target.write_transaction
+
+    def refuse_cleanup(query, parameters=None):
+        return "REMOVE" not in query and write_transaction(query, parameters)
+
+    target.write_transaction = refuse_cleanup
+    with pytest.raises(RuntimeError):
+        import_graph(target, path)
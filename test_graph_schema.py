@@ -0,0 +1,34 @@
+from graph_schema import merge_duplicate_names
+from memory_graph import InMemoryGraphConnection
+
+
+def test_duplicate_files_are_merged_into_the_first():
+    connection = InMemoryGraphConnection("memory://test-graph-schema")
+    connection.write_transaction("""
+        CREATE (a:File {name: 'ann.pdf', pages: 1})-[:HAS_SECTION]->(:Section {name: 'Skills', content: 'old'}),
+               (b:File {name: 'ann.pdf', pages: 2})-[:HAS_SECTION]->(:Section {name: 'Skills', content: 'new'}),
+               (b)-[:HAS_SECTION]->(:Section {name: 'Education'}),
+               (b)-[:BELONGS_TO {since: 2024}]->(:DocumentClass {name: 'RESUME'})
+    """)
+    assert merge_duplicate_names(connection, "File") == 1
+    record = connection.query("""
+        MATCH (f:File {name: 'ann.pdf'})-[:HAS_SECTION]->(s:Section)
+        WITH f, collect(s.name + ':' + coalesce(s.content, '')) AS sections
+        MATCH (f)-[r:BELONGS_TO]->(:DocumentClass)
+        RETURN f.pages AS pages, sections, r.since AS since
+    """)[0]
+    assert (record["pages"], sorted(record["sections"]), record["since"]) == (1, ["Education:", "Skills:old"], 2024)
+    assert connection.query("MATCH (s:Section) RETURN count(s) AS sections")[0]["sections"] == 2
+
+
+def test_failed_merge_leaves_the_duplicates():
+    connection = InMemoryGraphConnection("memory://test-graph-schema-failure")
+    connection.write_transaction("CREATE (:File {name: 'ann.pdf'}), (:File {name: 'ann.pdf'})")
+    write_statements = connection.write_statements
+
+    def fail_after(statements):
+        return write_statements(statements + [("RETURN 1 / 0", {})])
+
+    connection.write_statements = fail_after
+    assert merge_duplicate_names(connection, "File") == 0
+    assert connection.query("MATCH (f:File) RETURN count(f) AS files")[0]["files"] == 2
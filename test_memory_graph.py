@@ -0,0 +1,119 @@
+import itertools
+
+import pytest
+
+from graph_backend import BatchWriteError
+from memory_graph import InMemoryGraphConnection
+
+_uris = itertools.count()
+
+
+@pytest.fixture
+def graph():
+    return InMemoryGraphConnection(f"memory://test-memory-graph-{next(_uris)}")
+
+
+def names(records, column="name"):
+    return sorted(record[column] for record in records)
+
+
+def test_merge_runs_on_create_then_on_match(graph):
+    query = """
+    MERGE (p:PERSON {name: $name})
+    ON CREATE SET p.created = 1, p.seen = 1
+    ON MATCH SET p.seen = p.seen + 1
+    RETURN p.created AS created, p.seen AS seen
+    """
+    first = graph.query(query, {"name": "Ann"})[0]
+    second = graph.query(query, {"name": "Ann"})[0]
+    assert (first["created"], first["seen"]) == (1, 1)
+    assert (second["created"], second["seen"]) == (1, 2)
+    assert graph.query("MATCH (p:PERSON) RETURN count(p) AS people")[0]["people"] == 1
+
+
+def test_merge_relationship_is_not_duplicated(graph):
+    query = """
+    MERGE (p:PERSON {name: 'Ann'})
+    MERGE (s:ITEM {name: 'Python'})
+    MERGE (p)-[:HAS_SKILL]->(s)
+    """
+    graph.write_transaction(query)
+    graph.write_transaction(query)
+    assert graph.query("MATCH ()-[r:HAS_SKILL]->() RETURN count(r) AS edges")[0]["edges"] == 1
+
+
+def test_unwind_rows_writes_every_row(graph):
+    rows = [{"person": "Ann", "skill": "Python"}, {"person": "Ann", "skill": "SQL"},
+            {"person": "Bob", "skill": "Python"}]
+    assert graph.write_batch("""
+        UNWIND $rows AS row
+        MERGE (p:PERSON {name: row.person})
+        MERGE (s:ITEM {name: row.skill})
+        MERGE (p)-[:HAS_SKILL]->(s)
+    """, rows, batch_size=2) == 2
+    records = graph.query("""
+        MATCH (p:PERSON)-[:HAS_SKILL]->(s:ITEM)
+        RETURN p.name AS name, collect(s.name) AS skills, count(s) AS total
+        ORDER BY name
+    """)
+    assert [(record["name"], sorted(record["skills"]), record["total"]) for record in records] == [
+        ("Ann", ["Python", "SQL"], 2), ("Bob", ["Python"], 1),
+    ]
+
+
+def test_variable_length_expansion(graph):
+    graph.write_transaction("""
+        CREATE (:RESUME {name: 'resume'})-[:HAS_FILE]->(f:FILE {name: 'ann.pdf'}),
+               (f)-[:HAS_SKILLS]->(c:SKILLS {name: 'Ann_skills'}),
+               (c)-[:HAS_ITEM]->(:ITEM {name: 'Python'})
+    """)
+    reached = graph.query("MATCH (:RESUME {name: 'resume'})-[*1..2]->(n) RETURN DISTINCT n.name AS name")
+    assert names(reached) == ["Ann_skills", "ann.pdf"]
+    reached = graph.query("MATCH (:RESUME)-[*]->(n:ITEM) RETURN n.name AS name")
+    assert names(reached) == ["Python"]
+
+
+def test_aggregates(graph):
+    graph.write_batch("UNWIND $rows AS row CREATE (:ITEM {name: row.name, uses: row.uses})",
+                      [{"name": "Python", "uses": 3}, {"name": "SQL", "uses": 1}, {"name": "Go", "uses": 2}])
+    record = graph.query("""
+        MATCH (n:ITEM)
+        RETURN count(n) AS items, sum(n.uses) AS uses, max(n.uses) AS most, min(n.uses) AS least,
+               avg(n.uses) AS mean, collect(DISTINCT n.name) AS spellings
+    """)[0]
+    assert (record["items"], record["uses"], record["most"], record["least"], record["mean"]) == (3, 6, 3, 1, 2)
+    assert sorted(record["spellings"]) == ["Go", "Python", "SQL"]
+
+
+def test_element_id_lookup(graph):
+    node_id = graph.query("CREATE (n:ITEM {name: 'Python'}) RETURN elementId(n) AS id")[0]["id"]
+    graph.write_transaction("MATCH (n) WHERE elementId(n) = $id SET n.checked = true", {"id": node_id})
+    records = graph.query("UNWIND $ids AS id MATCH (n) WHERE elementId(n) = id RETURN n.name AS name, "
+                          "n.checked AS checked", {"ids": [node_id, "missing"]})
+    assert [(record["name"], record["checked"]) for record in records] == [("Python", True)]
+
+
+def test_union_removes_duplicate_rows(graph):
+    graph.write_transaction("CREATE (:Entity:PERSON {name: 'Ann'})")
+    query = """
+    MATCH (n:Entity {name: $name}) RETURN n.name AS name
+    UNION
+    MATCH (n:PERSON {name: $name}) RETURN n.name AS name
+    """
+    assert names(graph.query(query, {"name": "Ann"})) == ["Ann"]
+    assert names(graph.query(query.replace("UNION", "UNION ALL"), {"name": "Ann"})) == ["Ann", "Ann"]
+    assert graph.query(query + "UNION ALL MATCH (n:ITEM) RETURN n.name AS name", {"name": "Ann"}) is None
+
+
+def test_errors_match_the_neo4j_connection(graph):
+    assert graph.query("MATCH (n RETURN n") is None
+    assert graph.write_transaction("THIS IS NOT CYPHER") is False
+    with pytest.raises(BatchWriteError) as error:
+        graph.write_batch("UNWIND $rows AS row CREATE (n:ITEM {name: row.name}) RETURN n.name / 0 AS broken",
+                          [{"name": "a"}, {"name": "b"}], batch_size=1)
+    assert (error.value.batches, error.value.failed, error.value.failed_rows) == (2, 2, 2)
+
+
+def test_failed_statement_is_rolled_back(graph):
+    assert graph.write_transaction("CREATE (:ITEM {name: 'Python'}) WITH 1 AS one RETURN one / 0") is False
+    assert graph.query("MATCH (n:ITEM) RETURN count(n) AS items")[0]["items"] == 0
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from langchain_core.exceptions import OutputParserException
+
+import output_repair
+from output_repair import load_lenient_json, parse_llm_output, repair_json_text, repair_stats, reset_repair_stats
+
+
+class StrictParser:
+    """Stands in for PydanticOutputParser: strict JSON objects only."""
+
+    def parse(self, text):
+        try:
+            value = json.loads(text)
+        except ValueError as e:
+            raise OutputParserException(str(e))
+        if not isinstance(value, dict):
+            raise OutputParserException("expected an object")
+        return value
+
+
+class FixingParser:
+    """Stands in for OutputFixingParser without an LLM round trip."""
+
+    calls = 0
+
+    @classmethod
+    def from_llm(cls, parser, llm):
+        return cls()
+
+    def parse(self, text):
+        FixingParser.calls += 1
+        return {"fixed": True}
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    reset_repair_stats()
+    FixingParser.calls = 0
+    monkeypatch.setattr(output_repair, "OutputFixingParser", FixingParser)
+    yield
+    reset_repair_stats()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"name": "Ann"}\n```', {"name": "Ann"}),
+    ('Here is the result:\n```\n{"name": "Ann"}\n```\nLet me know!', {"name": "Ann"}),
+    ("{'name': 'Ann', 'title': 'O'Brien's lead'}", {"name": "Ann", "title": "O'Brien's lead"}),
+    ("{'summary': 'it's done, mostly'}", {"summary": "it's done, mostly"}),
+    ('{"skills": ["Python", "SQL",], "name": "Ann",}', {"skills": ["Python", "SQL"], "name": "Ann"}),
+    ('{"skills": ["Python", "SQL", "Sp', {"skills": ["Python", "SQL"]}),
+    ('{"name": "Ann", "skills": ["Python"', {"name": "Ann", "skills": ["Python"]}),
+    ('{"name": "Ann", "sk', {"name": "Ann"}),
+    ('{"name": "Ann", "active": True, "manager": None, "remote": False}',
+     {"name": "Ann", "active": True, "manager": None, "remote": False}),
+    ('{"note": "True story", "ok": True,}', {"note": "True story", "ok": True}),
+])
+def test_repair_json_text(text, expected):
+    assert json.loads(repair_json_text(text)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"name": "Ann"}', {"name": "Ann"}),
+    ("{'name': 'Ann', 'active': True}", {"name": "Ann", "active": True}),
+    ('```json\n["Python", "SQL",]\n```', ["Python", "SQL"]),
+])
+def test_load_lenient_json(text, expected):
+    assert load_lenient_json(text) == expected
+
+
+def test_load_lenient_json_rejects_text_without_json():
+    with pytest.raises(ValueError):
+        load_lenient_json("no structured output here")
+
+
+def test_valid_output_is_parsed_directly():
+    assert parse_llm_output(StrictParser(), '{"name": "Ann"}', llm=None) == {"name": "Ann"}
+    assert repair_stats() == {"direct": 1, "repaired": 0, "llm_fixed": 0, "failed": 0}
+    assert FixingParser.calls == 0
+
+
+def test_repairable_output_skips_the_llm():
+    for text in ("```json\n{'name': 'Ann',}\n```", '{"skills": ["Python", "SQ'):
+        parse_llm_output(StrictParser(), text, llm=None)
+    assert repair_stats() == {"direct": 0, "repaired": 2, "llm_fixed": 0, "failed": 0}
+    assert FixingParser.calls == 0
+
+
+def test_unrepairable_output_falls_back_to_the_llm():
+    assert parse_llm_output(StrictParser(), "I could not find any people.", llm=None) == {"fixed": True}
+    assert repair_stats() == {"direct": 0, "repaired": 0, "llm_fixed": 1, "failed": 0}
+    assert FixingParser.calls == 1
+
+
+def test_failed_llm_fix_is_counted(monkeypatch):
+    def give_up(self, text):
+        raise OutputParserException("still broken")
+
+    monkeypatch.setattr(FixingParser, "parse", give_up)
+    with pytest.raises(OutputParserException):
+        parse_llm_output(StrictParser(), "nothing useful", llm=None)
+    assert repair_stats() == {"direct": 0, "repaired": 0, "llm_fixed": 0, "failed": 1}
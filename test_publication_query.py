@@ -1,5 +1,5 @@
 import os
-from neo4j import GraphDatabase
+from connection_manager import get_connection_manager
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,11 +15,11 @@ print(f"URI: {uri}")
 print(f"Username: {username}")
 print(f"Password: {'*' * len(password) if password else 'None'}")
 
-# Create a driver
-driver = GraphDatabase.driver(uri, auth=(username, password))
+# Borrow the shared pooled driver
+manager = get_connection_manager(uri, username, password)
 
 def get_publications():
-    with driver.session() as session:
+    with manager.session() as session:
         # First, check if the publication node exists
         check_query = """
         MATCH (p:PUBLICATIONS {name: 'Hasnain Ali Poonja_publications'})
@@ -73,4 +73,4 @@ try:
 except Exception as e:
     print(f"\nError: {e}")
 finally:
-    driver.close() 
\ No newline at end of file
+    manager.close() 
\ No newline at end of file
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from relationship_registry import RelationshipRegistry, type_key
+
+INVERSE_PAIRS = [
+    ("CITED_BY", "CITES"),
+    ("EMPLOYED_BY", "EMPLOYS"),
+    ("PART_OF", "HAS_PART"),
+    ("STUDENT_OF", "HAS_STUDENT"),
+]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return RelationshipRegistry(str(tmp_path / "registry.json"))
+
+
+@pytest.mark.parametrize("passive, active", INVERSE_PAIRS)
+def test_inverse_types_keep_their_own_key(passive, active):
+    assert type_key(passive) != type_key(active)
+
+
+@pytest.mark.parametrize("passive, active", INVERSE_PAIRS)
+def test_inverse_types_are_not_merged(registry, passive, active):
+    registry.register([active] * 5)
+    assert registry.normalize(passive) == passive
+
+    registry.register([passive])
+    assert registry.normalize(active) == active
+    assert registry.vocabulary() == [active, passive]
+
+
+@pytest.mark.parametrize("passive, active", INVERSE_PAIRS)
+def test_inverse_types_keep_their_edge_direction(registry, passive, active):
+    registry.register([active] * 5)
+    query = f"MATCH (a {{name: 'x'}}), (b {{name: 'y'}}) MERGE (a)-[:{passive}]->(b)"
+    assert registry.rewrite_cypher(query) == query
+
+
+def test_near_duplicates_still_merge(registry):
+    registry.register(["HAS_SKILL"] * 3 + ["HAS_EDUCATION"])
+    assert registry.normalize("HAS_SKILLS") == "HAS_SKILL"
+    assert registry.normalize("has educations") == "HAS_EDUCATION"
+    assert registry.normalize("SKILL") == "HAS_SKILL"
+
+
+def test_recorded_inverse_flips_the_arrow(registry):
+    registry.register(["HAS_AUTHORED"])
+    assert registry.resolve("AUTHORED_BY") == ("HAS_AUTHORED", True)
+    assert (registry.rewrite_cypher("MERGE (paper)-[:AUTHORED_BY]->(person)")
+            == "MERGE (paper)<-[:HAS_AUTHORED]-(person)")
+    assert (registry.rewrite_cypher("MATCH (person)<-[r:AUTHORED_BY]-(paper) RETURN r")
+            == "MATCH (person)-[r:HAS_AUTHORED]->(paper) RETURN r")
+    assert registry.rewrite_cypher("MATCH (a)-[:AUTHORED_BY]-(b)") == "MATCH (a)-[:HAS_AUTHORED]-(b)"
+
+
+def test_stale_cross_direction_aliases_are_dropped(tmp_path):
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps({
+        "types": {"CITES": 4, "HAS_SKILL": 2},
+        "synonyms": {"CITED_BY": "CITES", "HAS_SKILLS": "HAS_SKILL"},
+    }))
+    registry = RelationshipRegistry(str(path))
+    assert registry.normalize("CITED_BY") == "CITED_BY"
+    assert registry.normalize("HAS_SKILLS") == "HAS_SKILL"
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from section_segmenter import score_sections, segment
+
+DOCS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "docs")
+# main.SECTION_CONFIDENCE_THRESHOLD's default: lower scores go to the LLM.
+THRESHOLD = 0.7
+REQUIRED = ("header", "education", "experience", "skills")
+
+RESUME = """Jane Doe
+jane@example.com
+Experience
+Senior Engineer, Acme (2020 - present)
+Projects:
+Built the billing service in Go and moved reporting to Spark.
+Tools
+Git, Docker, Kubernetes
+Engineer, Initech (2016 - 2020)
+Research
+Evaluated anomaly detection models for payment fraud.
+Education
+BSc Computer Science, State University (2016)
+TECHNICAL SKILLS
+Languages: Go, Python, SQL
+Tools & Technologies: Kubernetes, Terraform
+PROJECTS
+Open source contributions to a Kubernetes operator.
+"""
+
+
+def test_sub_headings_stay_inside_experience():
+    sections = segment(RESUME, "RESUME")
+    assert "Built the billing service" in sections["experience"]
+    assert "anomaly detection" in sections["experience"]
+    assert "Engineer, Initech" in sections["experience"]
+    assert sections["projects"] == "Open source contributions to a Kubernetes operator."
+
+
+def test_colon_lines_with_text_are_not_headings():
+    sections = segment(RESUME, "RESUME")
+    assert sections["skills"].startswith("Languages: Go, Python, SQL")
+    assert "languages" not in sections
+
+
+def test_lower_case_lines_are_not_headings():
+    text = "John Smith\nEducation\nBSc Physics, 2012, with honours\nand\nexperience\nin teaching first-year labs\n"
+    assert segment(text, "RESUME") == {
+        "header": "John Smith",
+        "education": "BSc Physics, 2012, with honours\nand\nexperience\nin teaching first-year labs",
+    }
+
+
+def test_section_bodies_exclude_headings():
+    sections = segment("Jane Doe\n  2. Work Experience:  \nEngineer at Acme\n", "RESUME")
+    assert sections["experience"] == "Engineer at Acme"
+
+
+def read_resume(file_name):
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    reader = PyPDF2.PdfReader(os.path.join(DOCS_DIR, file_name))
+    return "".join(page.extract_text() + "\n\n" for page in reader.pages)
+
+
+def test_section_swallowed_by_its_neighbour_is_not_trusted():
+    text = ("Jane Doe\nExperience\nResearch engineer at a robotics lab, 2019 to present.\n"
+            "PROJECTS\n" + "Designed a path planner for warehouse robots in ROS and C++.\n" * 40
+            + "EDUCATION\n" + "MS Robotics, National University of Sciences and Technology.\n" * 10)
+    sections, scores = score_sections(text, "RESUME", REQUIRED)
+    assert scores["experience"] < THRESHOLD
+    assert scores["projects"] >= THRESHOLD
+
+
+def test_section_holding_the_whole_document_is_not_trusted():
+    text = "Jane Doe\nSkills\n" + "Python, SQL, Spark, Airflow, dbt, Kubernetes.\n" * 40
+    sections, scores = score_sections(text, "RESUME", REQUIRED)
+    assert scores["skills"] < THRESHOLD
+    assert scores["experience"] == 0.0
+
+
+@pytest.mark.parametrize("file_name", [
+    "Bob Smith 1.pdf", "Evan Patel 1.pdf", "Fiona Zhang 1.pdf", "George Kim 1.pdf",
+])
+def test_generated_resumes_are_trusted(file_name):
+    sections, scores = score_sections(read_resume(file_name), "RESUME", REQUIRED)
+    assert all(scores[name] >= THRESHOLD for name in REQUIRED)
+
+
+def test_experience_keeps_its_project_blocks():
+    sections, scores = score_sections(read_resume("Hasnain Ali Resume.pdf"), "RESUME", REQUIRED)
+    assert "projects" not in sections
+    assert len(sections["experience"]) > 5000
+    assert scores["experience"] >= THRESHOLD
+    assert scores["skills"] == 0.0
+
+
+def test_skill_lists_are_not_headings():
+    sections, scores = score_sections(read_resume("Immar_Karim 1.pdf"), "RESUME", REQUIRED)
+    assert sections["skills"].startswith("Languages")
+    assert all(scores[name] >= THRESHOLD for name in REQUIRED)
+
+
+def test_unsegmentable_resume_goes_to_the_llm():
+    sections, scores = score_sections(read_resume("Muhammad Faris Khan CV.pdf"), "RESUME", REQUIRED)
+    assert all(scores[name] < THRESHOLD for name in REQUIRED)